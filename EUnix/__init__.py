@@ -1,3 +1,46 @@
+"""
+EUnix energy market platform.
+
+The public names of `EUnix.market`, `EUnix.simulation`, `EUnix.clock` and
+`EUnix.async_simulation` are available from the package, loaded on first
+access: ``import EUnix`` itself does not import pandas, numpy or redis.
+The order and transaction columns are in `EUnix.schema`.
+"""
 import EUnix.auctions
-from EUnix.market import *
-from EUnix.simulation import *
\ No newline at end of file
+from EUnix.lazy import lazy_exports
+
+
+_NAMES = {
+    'Market': 'EUnix.market',
+    'MECHANISM': 'EUnix.market',
+    'MechanismRegistry': 'EUnix.market',
+    'clear_orders': 'EUnix.market',
+    'child_seed': 'EUnix.market',
+    'Simulation': 'EUnix.simulation',
+    'SimulationConfig': 'EUnix.simulation',
+    'Clock': 'EUnix.clock',
+    'RealTimeClock': 'EUnix.clock',
+    'VirtualClock': 'EUnix.clock',
+    'AsyncSimulation': 'EUnix.async_simulation',
+    'Mechanism': 'EUnix.mechanisms.mechanism',
+    'P2PTrading': 'EUnix.mechanisms.p2p_random',
+    'p2p_random': 'EUnix.mechanisms.p2p_random',
+    'UniformPrice': 'EUnix.mechanisms.uniform',
+    'uniform_price_mechanism': 'EUnix.mechanisms.uniform',
+    'create_transaction': 'EUnix.mechanisms.uniform',
+    'ContinuousDoubleAuction': 'EUnix.mechanisms.continuous',
+    'merge_same_price': 'EUnix.auctions.process',
+    'split_transactions_merged_players': 'EUnix.transactions.processing',
+    'OrderManager': 'EUnix.auctions.orders',
+    'GridFee': 'EUnix.tariffs',
+    'TransactionManager': 'EUnix.transactions.transactions',
+}
+__all__ = list(_NAMES)
+
+__getattr__, __dir__ = lazy_exports(__name__, (
+    'EUnix.market',
+    'EUnix.mechanisms',
+    'EUnix.simulation',
+    'EUnix.clock',
+    'EUnix.async_simulation',
+), names=_NAMES)
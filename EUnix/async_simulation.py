@@ -0,0 +1,159 @@
+"""
+Asyncio variant of `EUnix.simulation.Simulation`.
+
+Gates follow each other without waiting for results: once the gate of a
+slot closes, its orders are drained and the slot is cleared and published
+in a background task while the next gate is already open. Matching runs in
+a worker thread, one slot at a time and in slot order, so a seeded
+mechanism draws the same pairs as in `Simulation`; statistics, sink writes
+and result publications also follow the slot order. Decoding, statistics
+and encoding run in worker threads as well, so the event loop only waits on
+I/O. The latency of a slot is then bounded by its slowest stage instead of
+the sum of the stages.
+
+Usage::
+
+    simu = AsyncSimulation(data, startSlot, steps, "p2p", grid_fee)
+    asyncio.run(simu.run())
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from EUnix.redisconnection import codec
+from EUnix.redisconnection.async_publish import AsyncProcessSlots
+from EUnix.simulation import Simulation
+
+
+class AsyncSimulation(Simulation):
+
+    slots_class = AsyncProcessSlots
+
+    def __init__(self, *args, max_pending = 4, **kwargs):
+        """Takes the parameters of `Simulation`.
+
+        `transport` may also be an
+        `EUnix.redisconnection.async_transport.AsyncTransport`; ``"redis"``
+        (default) uses `redis.asyncio`. At most `max_pending` slots are
+        being cleared or published at once: beyond that, the next gate
+        waits for the oldest one.
+        """
+        super().__init__(*args, **kwargs)
+        self.max_pending = max_pending
+        self.matcher = ThreadPoolExecutor(1) # Clears the slots one by one, in order
+        self.pending = deque()
+
+
+    async def ingest(self, slot):
+        """Takes the orders submitted for `slot`, as columns (None when there are none)"""
+        with self.metrics.stage(slot, "read"):
+            bid_offer_data = await self.pub_ins.read_from_redis(slot)
+        if bid_offer_data is None:
+            return None
+        return await asyncio.to_thread(self.decode, slot, bid_offer_data)
+
+
+    def decode(self, slot, bid_offer_data):
+        """Order columns of the entries drained for `slot`, as stored (run in a worker thread)"""
+        with self.profiled(slot, "ingest"), self.metrics.stage(slot, "decode"):
+            orders = codec.order_columns(self.pub_ins.decode(bid_offer_data))
+        if orders is not None:
+            self.metrics.count(slot, "orders", len(orders['type']))
+        return orders
+
+
+    def encode(self, slot, trans_df, trans_stat):
+        """Entries published for a cleared slot, see `result_batch` (run in a worker thread)"""
+        with self.profiled(slot, "publish"):
+            return self.result_batch(slot, trans_df, trans_stat)
+
+
+    async def publish(self, slot, trans_df, trans_stat):
+        """Publishes the results of a cleared slot"""
+        with self.metrics.stage(slot, "publish"):
+            batch = await asyncio.to_thread(self.encode, slot, trans_df, trans_stat)
+            await self.pub_ins.send_many_to_redis(batch)
+        self.metrics.count_published(slot, batch)
+        print(f"The result of {slot} is stored in the exchange")
+
+
+    async def process_slot(self, slot, step, orders, previous=None):
+        """Clears `slot` and, once slot `previous` is done, post-processes and publishes it"""
+        trans_df = None
+        if orders is not None:
+            loop = asyncio.get_running_loop()
+            trans_df = await loop.run_in_executor(self.matcher, self.clear, orders, slot)
+        if previous is not None:
+            await previous #Results are published in slot order
+
+        if orders is None:
+            print(f"No Bid or Offer data received for slot {slot}")
+        elif trans_df.empty:
+            print("The results is empty.")
+        else:
+            trans_stat = await asyncio.to_thread(self.post, slot, trans_df) #Statistics and sink off the loop
+            await self.publish(slot, trans_df, trans_stat)
+        self.finish_slot(slot)
+        if step is not None:
+            await self.pub_ins.publish_slot(slot, step, "Results") #Market  slot ends and results published
+
+
+    async def mach_function(self, prev_step, step=None):
+        """Drains the orders of `prev_step` and clears it in the background
+
+        Returns the task clearing and publishing the slot; with `step`, the
+        "Results" announcement of the slot is part of the task.
+        """
+        while self.pending and self.pending[0].done():
+            self.pending.popleft().result() # Raises the errors of finished slots
+        while len(self.pending) >= self.max_pending:
+            await self.pending.popleft()
+
+        if self.partition is not None and self.executor is None:
+            self.executor = ProcessPoolExecutor(self.workers)
+        orders = await self.ingest(prev_step) #Read market bids and offers data time
+        previous = self.pending[-1] if self.pending else None
+        task = asyncio.create_task(self.process_slot(prev_step, step, orders, previous))
+        self.pending.append(task)
+        return task
+
+
+    async def simulate(self):
+        if not self.pub_ins.registered:
+            await self.pub_ins.open_registration()
+        for index, (_, row) in enumerate(self.simu_slots.iterrows()): #Step numbers start at 0 from startSlot
+            slot = (row['Datetime']).isoformat()
+            await self.pub_ins.publish_slot(slot, index, "Begin") #start new  market slot
+            self.clock.open_gate(slot)
+            if self.order_source is not None:
+                await self.pub_ins.submit_orders(slot, self.order_source(slot)) #Replay orders of the slot
+            if index !=0:
+                await self.mach_function(prev_slot, index) #Match previous slot in the background
+
+            prev_slot = slot
+            await self.clock.wait_gate_async(slot, self.pub_ins) #Gate closes on deadline or once all agents submitted
+        return prev_slot, index
+
+
+    async def closeSimulation(self, prev_slot, index):
+        await self.mach_function(prev_slot, index)
+        while self.pending:
+            await self.pending.popleft()
+        await self.clock.sleep_async(1)
+        await self.pub_ins.publish_slot("End", index +1, "end")
+
+        if self.sink is not None:
+            self.sink.close()
+        self.metrics.close()
+        self.matcher.shutdown()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        print("End of Simulation")
+        await self.pub_ins.delete_from_redis("registraion")
+
+
+    async def run(self):
+        """Runs the whole simulation"""
+        prev_slot, index = await self.simulate()
+        await self.closeSimulation(prev_slot, index)
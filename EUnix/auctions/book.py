@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class OrderBook():
+    """
+    Orders of a slot split by side and sorted in merit order.
+
+    `Market.run` builds the book of a slot once (see `OrderManager.book`)
+    and hands it to the mechanism, which shares it between the checks run
+    before clearing, the supply and demand curves and the matching, so the
+    orders are sorted a single time per slot.
+
+    Positions are zero-based rows of the order frame (for ``iloc``). Among
+    orders at the same price, the earlier row comes first.
+
+    Attributes
+    ----------
+    is_buy : np.ndarray
+        Whether each order is a bid.
+    rates, quantities : np.ndarray
+        ``energy_rate`` and ``energy_qty`` of each order, as floats.
+    labels : np.ndarray
+        Index labels of the orders.
+    bids : np.ndarray
+        Positions of the bids, by decreasing price.
+    offers : np.ndarray
+        Positions of the offers, by increasing price.
+    bid_rates, offer_rates : np.ndarray
+        Prices of `bids` and `offers`, in that order.
+    bid_cum, offer_cum : np.ndarray
+        Cumulative quantities along `bids` and `offers`.
+
+    All arrays are read-only.
+    """
+
+    def __init__(self, orders):
+        self.is_buy = orders['type'].to_numpy().astype(bool)
+        self.rates = orders['energy_rate'].to_numpy(dtype=float)
+        self.quantities = orders['energy_qty'].to_numpy(dtype=float)
+        self.labels = orders.index.to_numpy()
+
+        buying = np.flatnonzero(self.is_buy)
+        selling = np.flatnonzero(~self.is_buy)
+        self.bids = buying[np.argsort(-self.rates[buying], kind='stable')]
+        self.offers = selling[np.argsort(self.rates[selling], kind='stable')]
+        self.bid_rates = self.rates[self.bids]
+        self.offer_rates = self.rates[self.offers]
+        self.bid_cum = np.cumsum(self.quantities[self.bids])
+        self.offer_cum = np.cumsum(self.quantities[self.offers])
+
+        for name, value in list(vars(self).items()):
+            value = value.view()  # The frame keeps its own arrays writeable
+            value.flags.writeable = False
+            setattr(self, name, value)
+
+    def __len__(self):
+        return len(self.is_buy)
+
+    def one_sided(self):
+        """Whether the book holds only bids or only offers (or nothing)."""
+        return len(self.bids) in (0, len(self))
+
+    def demand_curve(self):
+        """
+        Stepwise demand curve of the bids.
+
+        Returns
+        -------
+        curve : np.ndarray
+            Rows ``(cumulative quantity, price)`` ending with ``(inf, 0)``.
+        labels : np.ndarray
+            Index labels of the bids, in the order of the curve.
+        """
+        curve = np.vstack([np.column_stack([self.bid_cum, self.bid_rates]), [np.inf, 0]])
+        return curve, self.labels[self.bids]
+
+    def supply_curve(self):
+        """Stepwise supply curve of the offers, ending with ``(inf, inf)`` (see `demand_curve`)."""
+        curve = np.vstack([np.column_stack([self.offer_cum, self.offer_rates]), [np.inf, np.inf]])
+        return curve, self.labels[self.offers]
+
@@ -1,9 +1,18 @@
-import pandas as pd
+import numpy as np
+
+from EUnix.auctions.book import OrderBook
+from EUnix.schema import ORDER_COLUMNS
 
 
 class OrderManager:
     """
-    Manages a collection of market orders (bids and offers) in a structured format.
+    Manages a collection of market orders (bids and offers) in a columnar format.
+
+    Every column is kept in its own growable NumPy array. Quantities, rates
+    and power are stored as float64 and the order type as bool. Identifiers,
+    areas and timestamps are int-coded against a per-column list of
+    categories (code -1 stands for a missing value), while free-form
+    ``attributes`` and ``requirements`` are kept as Python objects.
 
     Attributes
     ----------
@@ -11,31 +20,79 @@ class OrderManager:
         Column names for the DataFrame representing stored orders.
     n_orders : int
         Counter for total number of orders added.
-    orders : list of tuple
-        List of all orders added to the manager.
     """
 
-    col_names = [
-        'User',
-        'User_id',
-        'Unit_area',
-        'Order_id',
-        'energy_qty',
-        'energy_rate',
-        'bid_offer_time',
-        'delivery_time',
-        'type',  
-        'attributes',
-        'requirements',
-        'power[kW]',
-        'area',
-        'direction',
-    ]
-
-    def __init__(self):
-        """Initializes the OrderManager with no orders."""
+    col_names = list(ORDER_COLUMNS)
+
+    float_cols = ('energy_qty', 'energy_rate', 'power[kW]')
+    bool_cols = ('type',)
+    object_cols = ('attributes', 'requirements')
+    coded_cols = (
+        'User', 'User_id', 'Unit_area', 'Order_id', 'bid_offer_time',
+        'delivery_time', 'area', 'direction',
+    )
+
+    def __init__(self, capacity=1024):
+        """Initializes the OrderManager with no orders.
+
+        Parameters
+        ----------
+        capacity : int, default=1024
+            Initial number of rows allocated per column. Columns double in
+            size whenever they run out of space.
+        """
         self.n_orders = 0
-        self.orders = []
+        self._capacity = max(int(capacity), 1)
+        self._data = {
+            name: np.empty(self._capacity, dtype=self._dtype(name))
+            for name in self.col_names
+        }
+        self._categories = {name: [] for name in self.coded_cols}
+        self._lookup = {name: {} for name in self.coded_cols}
+        self._df = None
+        self._book = None
+
+    def _dtype(self, name):
+        if name in self.float_cols:
+            return np.float64
+        if name in self.bool_cols:
+            return np.bool_
+        if name in self.object_cols:
+            return object
+        return np.int32
+
+    def _reserve(self, n_new):
+        """Grows every column so that `n_new` more orders fit."""
+        needed = self.n_orders + n_new
+        if needed <= self._capacity:
+            return
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, col in self._data.items():
+            grown = np.empty(capacity, dtype=col.dtype)
+            grown[:self.n_orders] = col[:self.n_orders]
+            self._data[name] = grown
+        self._capacity = capacity
+
+    def _encode_one(self, name, value):
+        if value is None or value != value:
+            return -1
+        lookup = self._lookup[name]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self._categories[name])
+            self._categories[name].append(value)
+        return code
+
+    def _encode(self, name, values):
+        import pandas as pd  # Loaded on first use, see `EUnix.schema`
+        local, uniques = pd.factorize(np.asarray(values, dtype=object))
+        codes = np.empty(len(uniques) + 1, dtype=np.int32)
+        for i, value in enumerate(uniques):
+            codes[i] = self._encode_one(name, value)
+        codes[-1] = -1  # local code -1 (missing) picks this entry
+        return codes[local]
 
     def add_order(
         self,
@@ -47,7 +104,7 @@ class OrderManager:
         energy_rate,
         bid_offer_time,
         delivery_time,
-        type,  
+        type,
         attributes=None,
         requirements=None,
         power=0,
@@ -99,17 +156,156 @@ class OrderManager:
             requirements, power, area, direction
         )
 
-        self.orders.append(new_order)
+        self._reserve(1)
+        i = self.n_orders
+        for name, value in zip(self.col_names, new_order):
+            if name in self._lookup:
+                value = self._encode_one(name, value)
+            self._data[name][i] = value
+
         self.n_orders += 1
+        self._df = self._book = None
         return self.n_orders - 1
 
+    def add_orders(
+        self,
+        User,
+        User_id,
+        Unit_area,
+        Order_id,
+        energy_qty,
+        energy_rate,
+        bid_offer_time,
+        delivery_time,
+        type,
+        attributes=None,
+        requirements=None,
+        power=0,
+        area=None,
+        direction=None
+    ):
+        """
+        Adds a batch of bids and offers given column by column.
+
+        Every parameter is either a sequence (list, ndarray, Series) with one
+        entry per order or a scalar shared by the whole batch. See
+        `add_order` for the meaning of each column.
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the added orders (zero-based).
+        """
+        new_orders = (
+            User, User_id, Unit_area, Order_id, energy_qty, energy_rate,
+            bid_offer_time, delivery_time, type, attributes,
+            requirements, power, area, direction
+        )
+        n = max(
+            (len(col) for col in new_orders if np.ndim(col) == 1 and not isinstance(col, str)),
+            default=1
+        )
+
+        self._reserve(n)
+        start = self.n_orders
+        for name, values in zip(self.col_names, new_orders):
+            target = self._data[name][start:start + n]
+            if np.ndim(values) == 0 or isinstance(values, str):
+                if name in self._lookup:
+                    values = self._encode_one(name, values)
+                target[:] = values
+            elif name in self._lookup:
+                target[:] = self._encode(name, values)
+            elif name in self.object_cols:
+                target[:] = list(values)
+            else:
+                target[:] = np.asarray(values, dtype=target.dtype)
+
+        self.n_orders += n
+        self._df = self._book = None
+        return np.arange(start, start + n)
+
+    def view(self, name):
+        """
+        Returns a read-only view of a stored column, without copying.
+
+        Coded columns are returned as their int32 codes; see `categories`.
+
+        Parameters
+        ----------
+        name : str
+            One of `col_names`.
+
+        Returns
+        -------
+        np.ndarray
+            Array with one entry per stored order.
+        """
+        col = self._data[name][:self.n_orders]
+        col.flags.writeable = False
+        return col
+
+    def categories(self, name):
+        """Returns the values behind the codes of a coded column."""
+        return list(self._categories[name])
+
+    def decode(self, name):
+        """Returns the values of a coded column as an object array."""
+        values = np.empty(len(self._categories[name]) + 1, dtype=object)
+        values[:-1] = self._categories[name]
+        values[-1] = None
+        return values[self._data[name][:self.n_orders]]
+
+    def __len__(self):
+        return self.n_orders
+
     def get_df(self):
         """
         Returns all stored orders as a pandas DataFrame.
 
+        Coded columns become categoricals. The columns are cached until
+        new orders are added and every call returns a new frame sharing
+        them, so replacing or adding whole columns only changes the
+        caller's frame. The shared arrays are read-only: with pandas
+        copy-on-write (the default from pandas 3) writing into a frame
+        (``df.loc[...] = ...``) copies the column first, otherwise it
+        raises a ValueError; use ``df.copy()`` to get an editable frame.
+
+        With pandas >= 3, ``copy=False`` keeps one block per column and the
+        numeric columns are views of the stored arrays; older versions
+        consolidate them into a copy.
+
         Returns
         -------
         pd.DataFrame
             DataFrame of all stored orders.
         """
-        return pd.DataFrame(self.orders, columns=self.col_names)
+        return self._frame().copy(deep=False)
+
+    def _frame(self):
+        """Frame of the stored orders, cached until new orders are added."""
+        if self._df is None:
+            import pandas as pd
+            n = self.n_orders
+            data = {}
+            for name in self.col_names:
+                col = self._data[name][:n]
+                col.flags.writeable = False
+                if name in self._lookup:
+                    categories = pd.Index(self._categories[name], dtype=object)
+                    col = pd.Categorical.from_codes(col, categories=categories)
+                data[name] = col
+            self._df = pd.DataFrame(data, columns=self.col_names, copy=False)
+        return self._df
+
+    def book(self):
+        """
+        Returns the orders split by side and sorted by price.
+
+        The `EUnix.auctions.book.OrderBook` of the frames of `get_df`
+        (same rows and labels) is cached until new orders are added; edits
+        made to those frames do not reach it.
+        """
+        if self._book is None:
+            self._book = OrderBook(self._frame())
+        return self._book
@@ -4,70 +4,69 @@ Implements processing techniques applied to bids before mechanisms can use them.
 """
 import numpy as np
 import pandas as pd
-from collections import OrderedDict
 
 
-def new_player_id(start_index: int):
+def merged_order_ids(df, mapping):
     """
+    Returns the ``Order_id`` of every aggregated order of `df`.
 
+    Groups of a single order keep its id; groups of several orders get the
+    synthetic id ``"merged-<group>"``. When an ``Order_id``, ``User`` or
+    ``User_id`` of `df` already has that form, the prefix is repeated
+    (``"merged-merged-<group>"``, ...) until the synthetic ids are distinct
+    from every real one.
     """
-    new_player_id.index = start_index
+    first = np.unique(mapping, return_index=True)[1]
+    ids = np.asarray(df['Order_id'], dtype=object)[first]
+    merged = np.flatnonzero(np.bincount(mapping) > 1)
+    labels = merged.astype(str).astype(object)
 
-    def assign_id(users):
-        if len(users) > 1:
-            new_id = new_player_id.index
-            new_player_id.index += 1
-            return new_id
-        return users[0]
+    taken = set()
+    for col in ('Order_id', 'User', 'User_id'):
+        taken.update(str(value) for value in df[col].unique() if str(value).startswith("merged-"))
+    prefix = "merged-"
+    while any(prefix + label in taken for label in labels):
+        prefix = "merged-" + prefix
 
-    return assign_id
+    ids[merged] = prefix + labels
+    return ids
 
 
 def merge_same_price(df: pd.DataFrame, prec: int = 5):
+    """
+    Aggregates the orders of each side that have the same price.
+
+    Orders are grouped, in a single groupby, by ``type`` and by
+    ``energy_rate`` rounded to `prec` decimals. Every group becomes one
+    order holding the total ``energy_qty`` of its members and the other
+    columns of its first member; groups of several orders get synthetic
+    ``User``, ``User_id`` and ``Order_id`` (see `merged_order_ids`).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Order book, as returned by `OrderManager.get_df`.
+    prec : int, default=5
+        Number of decimals of the price levels.
+
+    Returns
+    -------
+    merged_df : pd.DataFrame
+        Aggregated order book, indexed by group number.
+    mapping : np.ndarray
+        Group (row of `merged_df`) of every order of `df`, by position.
+    """
+    rounded_price = df['energy_rate'].to_numpy(dtype=float).round(prec)
+    mapping = df.groupby([df['type'].to_numpy(dtype=bool), rounded_price], sort=False).ngroup().to_numpy()
 
+    first = np.unique(mapping, return_index=True)[1]
+    merged_df = df.iloc[first].reset_index(drop=True)
+    merged_df['energy_qty'] = np.bincount(mapping, weights=df['energy_qty'].to_numpy(dtype=float))
 
-    # Start assigning virtual user IDs after the highest current ID
-    id_gen = new_player_id(df.user.max() + 1)
-
-    original_columns = df.columns.copy()
-    df = df.copy().reset_index().rename(columns={'index': 'bid'})
-
-    # Split into buying and selling sides
-    buy_df = df[df['buying']]
-    sell_df = df[~df['buying']]
-
-    all_sides = [buy_df, sell_df]
-    merged_dfs = []
-    bid_mapping = OrderedDict()
-
-    # Define how each column should be aggregated
-    agg_functions = {
-        'bid': list,
-        'user': list,
-        'quantity': sum,
-        'buying': lambda x: x.iloc[0],
-        'time': lambda x: x.iloc[0],
-        'divisible': lambda x: x.iloc[0]
-    }
-
-    for side_df in all_sides:
-        # Group by rounded price
-        rounded_price = side_df.price.round(prec)
-        grouped = side_df.groupby(rounded_price).agg(agg_functions).reset_index()
-
-        # Assign new user IDs (same if only 1 user; new ID if >1)
-        grouped['user'] = grouped['user'].apply(id_gen)
-
-        # Keep track of bid origins
-        for i, bids in enumerate(grouped['bid']):
-            bid_mapping[i] = bids
-
-        merged_dfs.append(grouped)
-
-    # Combine buy and sell sides
-    merged_df = pd.concat(merged_dfs).reset_index(drop=True)
-
-    # Reorder columns to match original input
-    merged_df = merged_df[original_columns]
+    ids = merged_order_ids(df, mapping)
+    several = np.bincount(mapping) > 1
+    merged_df['Order_id'] = ids
+    for col in ('User', 'User_id'):
+        merged_df[col] = np.where(several, ids, merged_df[col].to_numpy(dtype=object))
 
-    return merged_df, bid_mapping
+    return merged_df, mapping
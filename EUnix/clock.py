@@ -0,0 +1,159 @@
+"""
+Simulation clocks deciding when market gates close.
+
+`RealTimeClock` paces a simulation on the wall clock: every gate stays open
+until its deadline, or until all the expected agents have submitted orders
+for the slot. `VirtualClock` runs as fast as possible: it never sleeps and
+only keeps track of the virtual time a real-time run would have reached, so
+a slot advances as soon as it is cleared.
+
+Every blocking method has an awaitable counterpart (suffixed ``_async``)
+used by `EUnix.async_simulation.AsyncSimulation`.
+"""
+import asyncio
+import threading
+import time
+
+
+class Clock():
+    """Common gate bookkeeping of the simulation clocks.
+
+    Parameters
+    ----------
+    gate_length : float, default=2.0
+        Seconds a gate stays open after its "Begin" announcement.
+    publish_delay : float, default=0.5
+        Seconds waited before every slot announcement.
+    expected_agents : int, optional
+        Number of agents expected to submit orders in every slot. Once all
+        of them have submitted, the gate closes without waiting further.
+    poll_interval : float, default=0.05
+        Seconds between two checks of the submitted orders.
+    """
+
+    def __init__(self, gate_length=2.0, publish_delay=0.5, expected_agents=None, poll_interval=0.05):
+        self.gate_length = gate_length
+        self.publish_delay = publish_delay
+        self.expected_agents = expected_agents
+        self.poll_interval = poll_interval
+        self.gates = {}
+
+    def time(self):
+        """Current time of the clock, in seconds."""
+        raise NotImplementedError
+
+    def sleep(self, seconds):
+        """Lets `seconds` of clock time pass."""
+        raise NotImplementedError
+
+    def before_publish(self):
+        """Called before every slot announcement."""
+        self.sleep(self.publish_delay)
+
+    def open_gate(self, slot):
+        """Records the opening of the gate of `slot`."""
+        self.gates[slot] = self.time()
+
+    def all_submitted(self, slot, pub_ins):
+        """Whether every expected agent has submitted orders for `slot`."""
+        if self.expected_agents is None:
+            return False
+        return pub_ins.count_submitters(slot) >= self.expected_agents
+
+    def wait_gate(self, slot, pub_ins):
+        """Blocks until the gate of `slot` closes."""
+        raise NotImplementedError
+
+    async def sleep_async(self, seconds):
+        raise NotImplementedError
+
+    async def before_publish_async(self):
+        await self.sleep_async(self.publish_delay)
+
+    async def all_submitted_async(self, slot, pub_ins):
+        """`all_submitted` for an `AsyncProcessSlots`."""
+        if self.expected_agents is None:
+            return False
+        return await pub_ins.count_submitters(slot) >= self.expected_agents
+
+    async def wait_gate_async(self, slot, pub_ins):
+        """Waits until the gate of `slot` closes, `pub_ins` being an `AsyncProcessSlots`."""
+        raise NotImplementedError
+
+
+class RealTimeClock(Clock):
+    """Wall clock: gates close on their deadline or once all agents submitted."""
+
+    def time(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait_gate(self, slot, pub_ins):
+        deadline = self.gates.pop(slot, self.time()) + self.gate_length
+        while not self.all_submitted(slot, pub_ins):
+            remaining = deadline - self.time()
+            if remaining <= 0:
+                return
+            time.sleep(min(self.poll_interval, remaining) if self.expected_agents else remaining)
+
+    async def sleep_async(self, seconds):
+        if seconds > 0:
+            await asyncio.sleep(seconds)
+
+    async def wait_gate_async(self, slot, pub_ins):
+        deadline = self.gates.pop(slot, self.time()) + self.gate_length
+        while not await self.all_submitted_async(slot, pub_ins):
+            remaining = deadline - self.time()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(self.poll_interval, remaining) if self.expected_agents else remaining)
+
+
+class VirtualClock(Clock):
+    """As-fast-as-possible clock running on virtual time.
+
+    Nothing sleeps: `time` returns the virtual time a real-time run would
+    have reached. When `expected_agents` is set, a gate still waits (on the
+    wall clock, polling every `poll_interval`) until they have all
+    submitted, or until `timeout` seconds have passed.
+    """
+
+    def __init__(self, gate_length=2.0, publish_delay=0.5, expected_agents=None, poll_interval=0.01,
+                 timeout=None):
+        super().__init__(gate_length, publish_delay, expected_agents, poll_interval)
+        self.timeout = timeout
+        self.now = 0.0
+        self._lock = threading.Lock()  # Slots may be published from worker threads
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.now += max(seconds, 0)
+
+    def wait_gate(self, slot, pub_ins):
+        if self.expected_agents is not None:
+            give_up = None if self.timeout is None else time.monotonic() + self.timeout
+            while not self.all_submitted(slot, pub_ins):
+                if give_up is not None and time.monotonic() >= give_up:
+                    break
+                time.sleep(self.poll_interval)
+        with self._lock:
+            self.now = max(self.now, self.gates.pop(slot, self.now) + self.gate_length)
+
+    async def sleep_async(self, seconds):
+        self.sleep(seconds)
+
+    async def wait_gate_async(self, slot, pub_ins):
+        if self.expected_agents is not None:
+            give_up = None if self.timeout is None else time.monotonic() + self.timeout
+            while not await self.all_submitted_async(slot, pub_ins):
+                if give_up is not None and time.monotonic() >= give_up:
+                    break
+                await asyncio.sleep(self.poll_interval)
+        with self._lock:
+            self.now = max(self.now, self.gates.pop(slot, self.now) + self.gate_length)
@@ -0,0 +1,73 @@
+"""
+Lazy package exports (PEP 562).
+
+The packages of EUnix used to star-import their modules, so importing any
+of them loaded pandas, numpy, every mechanism and the Redis client.
+`lazy_exports` gives a package the same names, loaded on first access.
+"""
+import importlib
+import sys
+import types
+
+
+class _LazyPackage(types.ModuleType):
+    """Package whose exported names are not replaced by its submodules.
+
+    Importing ``package.name`` binds the submodule as the attribute `name`
+    of the package. When the package exports a `name` of its own (e.g. the
+    function `p2p_random` of the module `p2p_random`), the export is kept,
+    as with the former star imports; the submodule stays in `sys.modules`.
+    """
+
+    def __setattr__(self, name, value):
+        if (isinstance(value, types.ModuleType) and name in self.__dict__.get('_lazy_names', ())
+                and value.__name__ == f"{self.__name__}.{name}"):
+            return
+        super().__setattr__(name, value)
+
+
+def lazy_exports(package, modules, names=None):
+    """
+    Returns the ``__getattr__`` and ``__dir__`` functions of a package.
+
+    Parameters
+    ----------
+    package : str
+        Name of the package (``__name__``).
+    modules : sequence of str
+        Modules whose public names the package exposes, searched in order.
+    names : dict, optional
+        Module of the main names, imported directly without searching
+        `modules`.
+    """
+    names = dict(names or {})
+    package_module = sys.modules[package]
+    package_module._lazy_names = frozenset(names)
+    package_module.__class__ = _LazyPackage  # Submodules do not shadow `names`
+
+    def __getattr__(name):
+        namespace = vars(importlib.import_module(package))
+        if name in names:
+            value = getattr(importlib.import_module(names[name]), name)
+        elif name.startswith('_'):
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        else:
+            try:
+                return importlib.import_module(f"{package}.{name}")  # Submodule
+            except ModuleNotFoundError as e:
+                if e.name != f"{package}.{name}":
+                    raise
+            for module in modules:
+                module = importlib.import_module(module)
+                if hasattr(module, name):
+                    value = getattr(module, name)
+                    break
+            else:
+                raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        namespace[name] = value  # Later accesses skip __getattr__
+        return value
+
+    def __dir__():
+        return sorted(set(vars(importlib.import_module(package))) | set(names))
+
+    return __getattr__, __dir__
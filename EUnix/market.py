@@ -1,20 +1,100 @@
+import importlib
+import zlib
+from collections.abc import MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+
+from .auctions.book import OrderBook
 from .auctions.orders import OrderManager
-from EUnix.mechanisms import *
+from EUnix.tariffs import GridFee
+from EUnix.transactions.transactions import TransactionManager
+
+
+class MechanismRegistry(MutableMapping):
+    """Market mechanisms by name.
+
+    Entries are `Mechanism` classes or ``"module:Class"`` paths, imported on
+    first use: a process only loads the mechanisms it runs.
+    """
+
+    def __init__(self, entries=()):
+        self._entries = dict(entries)
+
+    def __getitem__(self, name):
+        entry = self._entries[name]
+        if isinstance(entry, str):
+            module, _, attr = entry.partition(":")
+            entry = self._entries[name] = getattr(importlib.import_module(module), attr)
+        return entry
+
+    def __setitem__(self, name, mechanism):
+        self._entries[name] = mechanism
+
+    def __delitem__(self, name):
+        del self._entries[name]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._entries!r})"
+
 
+MECHANISM = MechanismRegistry({
+    'uniform': 'EUnix.mechanisms.uniform:UniformPrice',
+    'p2p': 'EUnix.mechanisms.p2p_random:P2PTrading',
+    'continuous': 'EUnix.mechanisms.continuous:ContinuousDoubleAuction',
+})
 
-MECHANISM = {
-    'uniform': UniformPrice,
-    'p2p': P2PTrading,
-}
 
 
+def child_seed(seed, key):
+    """Seed of the stream `key` (e.g. a slot or a partition) derived from `seed`.
+
+    `seed` is an int or a `np.random.SeedSequence`. The child only depends
+    on `seed` and `key`, not on the other streams drawn from `seed`.
+    """
+    seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (zlib.crc32(str(key).encode()),))
+
+
+
+def clear_orders(algo, orders, args=(), kwargs=None, seed=None, book=None):
+    """Clears an order book with the mechanism `algo`.
+
+    Defined at module level so that it can run in worker processes. With
+    `seed` (an int or a `np.random.SeedSequence`), the mechanism draws
+    from its own ``r = RandomState`` created from it in the worker. `book`
+    is the `OrderBook` of `orders`, when already built.
+    """
+    kwargs = dict(kwargs or {})
+    if seed is not None:
+        kwargs["r"] = np.random.RandomState(np.random.MT19937(seed))
+    if book is not None:
+        kwargs["book"] = book
+    mec = MECHANISM[algo](orders, *args, **kwargs)
+    return mec.run()
 
 
 class Market():
  
-    def __init__(self):
-        """TODO: to be defined."""
+    def __init__(self, fees=None):
+        """TODO: to be defined.
+
+        `fees` is an optional `EUnix.tariffs.GridFee` (or a flat fee) added
+        to the offers before matching and removed from the sellers' prices
+        in `get_results`.
+        """
         self.bm = OrderManager()
+        self.fees = None if fees is None else GridFee.coerce(fees)
+        self.offer_fees = None
+        self.books = {}
+        self.transactions = TransactionManager()
         
         
 
@@ -28,6 +108,61 @@ class Market():
 
 
 
+    def submit_order(self, *args):
+
+        """Adds an order and matches it on arrival
+
+        Continuous trading: the order (same arguments as `accept_order`) is
+        matched against the limit order book of its delivery time (see
+        `EUnix.mechanisms.continuous`), the trades are added to
+        `transactions` and what is left of the order rests in the book. The
+        books persist in `books` until `close_book`. Orders submitted this
+        way must not be cleared again with `run`.
+
+        `Simulation` does not use it and does not match orders while a gate
+        is open: it drains the orders of a slot once its gate has closed
+        and clears them with `run`, where the "continuous" mechanism
+        replays them by ``bid_offer_time`` on new books.
+        """
+        from EUnix.mechanisms.continuous import ORDER_FIELDS, LimitOrderBook
+        order_id = self.bm.add_order(*args)
+        order = dict(zip(ORDER_FIELDS, args))
+        if self.fees is not None and not order['type']:
+            fee = self.fees.offer_fee(order['Unit_area'], order['delivery_time'])
+            order['energy_rate'] += fee
+            if self.offer_fees is None:
+                self.offer_fees = {}
+            self.offer_fees[order['Order_id']] = fee
+        book = self.books.get(order['delivery_time'])
+        if book is None:
+            book = self.books[order['delivery_time']] = LimitOrderBook()
+        for row in book.submit(order):
+            self.transactions.add_transaction(*row)
+        return order_id
+
+
+
+    def close_book(self, delivery_time):
+        """Closes the gate of `delivery_time`: its book is dropped and returned
+
+        The trades were made on arrival and are already in `transactions`;
+        the orders still resting in the returned book are left unmatched.
+        """
+        return self.books.pop(delivery_time, None)
+
+
+
+    def accept_orders(self, *args, **kwargs):
+
+        """Adds a batch of orders given column by column
+
+        See `OrderManager.add_orders`.
+        """
+        order_ids = self.bm.add_orders(*args, **kwargs)
+        return order_ids
+
+
+
     def get_oders(self):
         """get the bids and offers
 
@@ -40,16 +175,73 @@ class Market():
 
 
 
-    def run(self, algo, *args, **kwargs):
-        """Runs 
+    def run(self, algo, *args, partition=None, executor=None, max_workers=None, seed=None, **kwargs):
+        """Runs the mechanism `algo` on the order book
 
-        
+        With `partition`, the book is split into independent markets that
+        are cleared separately and whose transactions are merged. It is
+        either a column name (e.g. ``"Unit_area"``) or a callable returning
+        one partition label per order of the book. The partitions are
+        cleared on `executor` (any `concurrent.futures.Executor`) or, when
+        none is given, on a `ProcessPoolExecutor` with `max_workers`
+        processes created for this run. `extra` then maps every partition
+        label to the extra information of its mechanism.
+
+        With `seed` (an int or a `np.random.SeedSequence`), the mechanism
+        gets a random generator ``r`` seeded from it; every partition gets
+        its own child seed derived from its label (see `child_seed`), so
+        the draws of a partition do not depend on the other partitions.
         """
         df = self.bm.get_df()
-        mec = MECHANISM[algo](df, *args, **kwargs)
-        transactions, extra = mec.run()
+        if self.fees is not None:
+            df, self.offer_fees = self.fees.apply_orders(df)
+        if partition is None:
+            # Sorted once for the whole slot, then shared by the mechanism
+            book = self.bm.book() if self.fees is None else OrderBook(df)
+            transactions, extra = clear_orders(algo, df, args, kwargs, seed, book)
+        else:
+            transactions, extra = self._run_partitioned(
+                algo, df, partition, executor, max_workers, args, kwargs, seed)
         self.transactions = transactions
         self.extra = extra
         return transactions, extra
 
+
+
+    def _run_partitioned(self, algo, df, partition, executor, max_workers, args, kwargs, seed=None):
+        """Clears every partition of the book and merges the results"""
+        keys = df[partition] if isinstance(partition, str) else partition(df)
+        groups = df.groupby(keys, sort=True, observed=True).indices
+        names = list(groups)
+        parts = [df.iloc[groups[name]] for name in names]
+        n = len(parts)
+        seeds = [None if seed is None else child_seed(seed, name) for name in names]
+
+        if n <= 1:
+            results = [clear_orders(algo, part, args, kwargs, s) for part, s in zip(parts, seeds)]
+        elif executor is not None:
+            results = list(executor.map(clear_orders, repeat(algo, n), parts, repeat(args, n), repeat(kwargs, n), seeds))
+        else:
+            with ProcessPoolExecutor(max_workers) as pool:
+                results = list(pool.map(clear_orders, repeat(algo, n), parts, repeat(args, n), repeat(kwargs, n), seeds))
+
+        transactions = TransactionManager()
+        for trans, _ in results:
+            transactions = transactions.merge(trans)
+        extra = {name: ex for name, (_, ex) in zip(names, results)}
+        return transactions, extra
+
+
+
+    def get_results(self):
+        """Returns the transactions of the last run as a DataFrame
+
+        With fees, a ``User Rate`` column holds the price seen by each user
+        and ``Offer_rate`` is reported without the fee.
+        """
+        trans_df = self.transactions.get_df()
+        if self.fees is not None and not trans_df.empty:
+            trans_df = self.fees.apply_transactions(trans_df, self.offer_fees)
+        return trans_df
+
     
\ No newline at end of file
@@ -1,5 +1,24 @@
-from EUnix.mechanisms.mechanism import *
-from EUnix.mechanisms.p2p_random import *
-from EUnix.mechanisms.uniform import *
+from EUnix.lazy import lazy_exports
 
 
+_NAMES = {
+    'Mechanism': 'EUnix.mechanisms.mechanism',
+    'P2PTrading': 'EUnix.mechanisms.p2p_random',
+    'p2p_random': 'EUnix.mechanisms.p2p_random',
+    'UniformPrice': 'EUnix.mechanisms.uniform',
+    'uniform_price_mechanism': 'EUnix.mechanisms.uniform',
+    'create_transaction': 'EUnix.mechanisms.uniform',
+    'ContinuousDoubleAuction': 'EUnix.mechanisms.continuous',
+    'continuous_double_auction': 'EUnix.mechanisms.continuous',
+    'LimitOrderBook': 'EUnix.mechanisms.continuous',
+    'merge_same_price': 'EUnix.auctions.process',
+    'split_transactions_merged_players': 'EUnix.transactions.processing',
+}
+__all__ = list(_NAMES)
+
+__getattr__, __dir__ = lazy_exports(__name__, (
+    'EUnix.mechanisms.mechanism',
+    'EUnix.mechanisms.p2p_random',
+    'EUnix.mechanisms.uniform',
+    'EUnix.mechanisms.continuous',
+), names=_NAMES)
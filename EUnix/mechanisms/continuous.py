@@ -0,0 +1,150 @@
+"""
+Continuous double auction on a limit order book with price-time priority.
+
+Every order is matched on arrival against the best resting orders of the
+other side, as long as prices cross; trades take the price of the resting
+order. What is left of the incoming order rests in the book. Both sides
+are heaps keyed by price, then arrival, so that each match costs
+O(log N). Time priority is the order of arrival in the book:
+`continuous_double_auction` submits the orders by ``bid_offer_time``.
+
+Only `EUnix.market.Market.submit_order` matches orders as they arrive.
+`Simulation` replays the whole batch of a slot once its gate has closed.
+"""
+import heapq
+import itertools
+import uuid
+
+import numpy as np
+
+from EUnix.transactions.transactions import TransactionManager
+from EUnix.mechanisms.mechanism import Mechanism
+
+
+ORDER_FIELDS = (
+    'User', 'User_id', 'Unit_area', 'Order_id', 'energy_qty',
+    'energy_rate', 'bid_offer_time', 'delivery_time', 'type'
+)
+
+
+class LimitOrderBook():
+    """
+    Limit order book of a single delivery slot.
+
+    Orders are dicts with the `ORDER_FIELDS` of the order book; resting
+    orders also hold their unmatched quantity under ``remaining``.
+    """
+
+    def __init__(self):
+        self.bids = []    # heap of (-energy_rate, seq, order)
+        self.offers = []  # heap of (energy_rate, seq, order)
+        self._seq = itertools.count()
+        self.last_price = None
+
+    def __len__(self):
+        return len(self.bids) + len(self.offers)
+
+    def best_bid(self):
+        """Returns the best resting bid, or None."""
+        return self.bids[0][2] if self.bids else None
+
+    def best_offer(self):
+        """Returns the best resting offer, or None."""
+        return self.offers[0][2] if self.offers else None
+
+    def submit(self, order):
+        """
+        Matches `order` against the book and rests what is left of it.
+
+        `order` itself is left untouched: the book rests a copy of it.
+
+        Returns
+        -------
+        list of tuple
+            Two transaction rows per trade (buying record, then selling
+            record), in the layout of `TransactionManager.add_transaction`.
+        """
+        order = dict(order)
+        buying = bool(order['type'])
+        rate = order['energy_rate']
+        remaining = order['energy_qty']
+        opposite = self.offers if buying else self.bids
+
+        rows = []
+        while remaining > 0 and opposite:
+            best = opposite[0][2]
+            if (best['energy_rate'] > rate) if buying else (best['energy_rate'] < rate):
+                break
+            qty = min(remaining, best['remaining'])
+            bid, offer = (order, best) if buying else (best, order)
+            rows.extend(self._trade(bid, offer, best['energy_rate'], qty))
+            remaining -= qty
+            best['remaining'] -= qty
+            if best['remaining'] <= 0:
+                heapq.heappop(opposite)
+
+        if remaining > 0:
+            order['remaining'] = remaining
+            key = -rate if buying else rate
+            heapq.heappush(self.bids if buying else self.offers, (key, next(self._seq), order))
+        return rows
+
+    def _trade(self, bid, offer, price, qty):
+        """Transaction rows of a trade between `bid` and `offer`."""
+        self.last_price = price
+        trans_id = str(uuid.uuid4())
+
+        def row(unit_area, trans_type):
+            return (
+                trans_id, bid['User'], bid['User_id'], unit_area, bid['Order_id'],
+                bid['energy_qty'], bid['energy_rate'], bid['bid_offer_time'],
+                offer['User'], offer['User_id'], offer['Order_id'], offer['energy_qty'],
+                offer['energy_rate'], offer['bid_offer_time'], price, qty,
+                bid['delivery_time'], trans_type
+            )
+        return [row(bid['Unit_area'], "Buying"), row(offer['Unit_area'], "Selling")]
+
+
+def continuous_double_auction(orders, books=None):
+    """
+    Matches orders one by one, in order of arrival, on a limit order book per
+    delivery time.
+
+    Orders arrive by ``bid_offer_time`` and then by position in `orders`.
+    With `books`, a dict ``{delivery_time: LimitOrderBook}``, the books are
+    kept between calls: resting orders of earlier calls can be matched and
+    the orders left unmatched stay in them.
+    """
+    books = {} if books is None else books
+    trans = TransactionManager()
+
+    arrival = np.argsort(orders['bid_offer_time'].astype(str).to_numpy(), kind='stable')
+    columns = [orders[name].to_numpy(dtype=object)[arrival].tolist() for name in ORDER_FIELDS]
+    for values in zip(*columns):
+        order = dict(zip(ORDER_FIELDS, values))
+        book = books.get(order['delivery_time'])
+        if book is None:
+            book = books[order['delivery_time']] = LimitOrderBook()
+        for row in book.submit(order):
+            trans.add_transaction(*row)
+
+    extra = {
+        delivery_time: {
+            'resting bids': len(book.bids),
+            'resting offers': len(book.offers),
+            'last price': book.last_price,
+        }
+        for delivery_time, book in books.items()
+    }
+    return trans, extra
+
+
+class ContinuousDoubleAuction(Mechanism):
+    """Interface for the continuous double auction."""
+
+    def __init__(self, orders, *args, **kwargs):
+        super().__init__(continuous_double_auction, orders, *args, **kwargs)
+
+    def _run(self):
+        """Runs the mechanism, even on one-sided books (orders rest in the book)"""
+        return self.algo(self.orders, *self.args, **self.kwargs)
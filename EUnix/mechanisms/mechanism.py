@@ -1,5 +1,6 @@
 import pandas as pd
 
+from EUnix.auctions.book import OrderBook
 from EUnix.auctions.process import merge_same_price
 from EUnix.transactions.processing import split_transactions_merged_players
 from EUnix.transactions.transactions import TransactionManager
@@ -12,15 +13,21 @@ class Mechanism():
     """
     """
 
-    def __init__(self, algo, orders, *args, merge=False, **kwargs):
+    uses_book = False  # Whether `algo` takes the `OrderBook` as `book`
+
+    def __init__(self, algo, orders, *args, merge=False, book=None, **kwargs):
         """Creates a mechanisms with bids
 
+        `book` is the `EUnix.auctions.book.OrderBook` of `orders`, when
+        already built (see `OrderManager.book`); it is built from `orders`
+        otherwise, and from the aggregated orders with `merge`.
         """
         self.algo = algo
         self.args = args
         self.kwargs = kwargs
         self.merge = merge
         self.orders = self._sanitize_bids(orders)
+        self.book = None if merge else book
 
     def _sanitize_bids(self, orders):
         """
@@ -38,12 +45,11 @@ class Mechanism():
 
     def _run(self):
         """Runs the mechanisms"""
-        orders = self.orders
-        N = orders.shape[0]
-
-        if (orders.loc[orders['type']].shape[0] not in [0, N]):
+        book = OrderBook(self.orders) if self.book is None else self.book
+        if not book.one_sided():
 
-            trans, extra = self.algo(self.orders, *self.args, **self.kwargs)
+            kwargs = dict(self.kwargs, book=book) if self.uses_book else self.kwargs
+            trans, extra = self.algo(self.orders, *self.args, **kwargs)
             return trans, extra
         else:
 
@@ -57,7 +63,7 @@ class Mechanism():
 
         if self.merge:
             trans = split_transactions_merged_players(
-                trans, self.old_bids, self.maping)
+                trans, self.old_orders, self.maping)
 
         return trans
 
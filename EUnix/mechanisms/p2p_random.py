@@ -10,94 +10,385 @@ This file includes modifications made by Godwin Okwuibe in 2025.
 import pandas as pd
 #import networkx as nx
 import numpy as np
-import uuid
 
-from EUnix.transactions.transactions import TransactionManager
+from EUnix.transactions.transactions import TransactionManager, new_trans_ids
+from EUnix.auctions.book import OrderBook
 from EUnix.auctions.orders import OrderManager
 from EUnix.mechanisms import Mechanism
 
 
+class _Fenwick:
+    """Binary indexed tree over 0/1 flags, used to draw free sellers."""
 
-def p2p_random(orders, p_coef=0.5, r=None):
+    def __init__(self, flags):
+        n = len(flags)
+        tree = [0] * (n + 1)
+        for i, flag in enumerate(flags, 1):
+            tree[i] += int(flag)
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.n = n
+        self.tree = tree
+        self.step = 1 << n.bit_length()
+
+    def prefix(self, k):
+        """Number of flags set among the first `k` positions."""
+        tree = self.tree
+        total = 0
+        while k > 0:
+            total += tree[k]
+            k -= k & -k
+        return total
+
+    def remove(self, pos):
+        """Clears the flag at zero-based position `pos`."""
+        tree, n = self.tree, self.n
+        i = pos + 1
+        while i <= n:
+            tree[i] -= 1
+            i += i & -i
+
+    def find(self, k):
+        """Zero-based position of the (k+1)-th flag that is set."""
+        tree, n = self.tree, self.n
+        pos = 0
+        step = self.step
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= k:
+                pos = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+PAIRINGS = ('uniform', 'compatible', 'all_pairs')
+
+
+class _Draws:
+    """Uniform floats in [0, 1) drawn from `r` in blocks."""
+
+    def __init__(self, r, size=1024):
+        self.r = r
+        self.size = size
+        self.block = []
+
+    def index(self, n):
+        """Uniform integer in [0, n)."""
+        if not self.block:
+            self.block = self.r.random_sample(self.size).tolist()
+        return int(self.block.pop() * n)
+
+
+def _take(items, positions, item):
+    """Removes `item` from the list `items` in O(1) (its order is not kept)."""
+    i = positions.pop(item)
+    last = items.pop()
+    if last != item:
+        items[i] = last
+        positions[last] = i
+
+
+def _greedy_matching(b, s, n):
     """
-    
+    Positions of the pairs kept by scanning the pairs (`b`, `s`) in order
+    and keeping every pair whose buyer and seller are both still free.
 
+    Computed in a few vectorized passes: a pair that comes first for both
+    its buyer and its seller is kept by the scan, so such pairs are kept
+    and the pairs sharing one of their orders are dropped, until none is
+    left. Orders are positions below `n`.
     """
+    rank = np.arange(b.size)
+    kept = []
+    while b.size:
+        order = np.arange(b.size)
+        first_b = np.full(n, b.size)
+        first_s = np.full(n, b.size)
+        np.minimum.at(first_b, b, order)
+        np.minimum.at(first_s, s, order)
+        first = (first_b[b] == order) & (first_s[s] == order)
+        kept.append(rank[first])
+        used = np.zeros(n, dtype=bool)
+        used[b[first]] = True
+        used[s[first]] = True
+        left = ~used[b] & ~used[s]
+        b, s, rank = b[left], s[left], rank[left]
+    return np.sort(np.concatenate(kept)) if kept else rank
+
+
+def _all_pairs_round(r, draws, free_b, free_s, n, tried, tried_keys):
+    """
+    Pairs of one round: every pair is drawn uniformly among the pairs of
+    free buyers and sellers that were never drawn, and both orders then
+    leave the round.
+
+    Pairs are keyed ``buyer * n + seller``; `tried` and `tried_keys` hold
+    the keys drawn before, the latter only those of orders with quantity
+    left. As long as most of the grid of free buyers and sellers is
+    untried, pairs are drawn on the grid and redrawn when already tried.
+    The rest of the round is a random order of the untried pairs scanned
+    greedily, which draws every pair uniformly among the ones left.
+    """
+    free_b, free_s = free_b.tolist(), free_s.tolist()
+    pos_b = {b: i for i, b in enumerate(free_b)}
+    pos_s = {s: i for i, s in enumerate(free_s)}
+    round_b, round_s = [], []
+    while free_b and free_s and 2 * tried_keys.size < len(free_b) * len(free_s):
+        b = free_b[draws.index(len(free_b))]
+        s = free_s[draws.index(len(free_s))]
+        if b * n + s in tried:
+            continue
+        _take(free_b, pos_b, b)
+        _take(free_s, pos_s, s)
+        round_b.append(b)
+        round_s.append(s)
+
+    round_b = np.array(round_b, dtype=np.int64)
+    round_s = np.array(round_s, dtype=np.int64)
+    if free_b and free_s:
+        free_b = np.array(free_b, dtype=np.int64)
+        free_s = np.array(free_s, dtype=np.int64)
+        row = np.full(n, -1)
+        col = np.full(n, -1)
+        row[free_b] = np.arange(free_b.size)
+        col[free_s] = np.arange(free_s.size)
+        untried = np.ones((free_b.size, free_s.size), dtype=bool)
+        row_t, col_t = row[tried_keys // n], col[tried_keys % n]
+        free_t = (row_t >= 0) & (col_t >= 0)
+        untried[row_t[free_t], col_t[free_t]] = False
+        rows, cols = np.nonzero(untried)
+        pairs = r.permutation(rows.size)
+        b, s = free_b[rows[pairs]], free_s[cols[pairs]]
+        kept = _greedy_matching(b, s, n)
+        round_b = np.concatenate([round_b, b[kept]])
+        round_s = np.concatenate([round_s, s[kept]])
+    return round_b, round_s
+
+
+def _all_pairs_rounds(r, book, quantities):
+    """
+    Rounds of random pairs of orders with quantity left, every pair of
+    orders being drawn at most once.
+
+    Incompatible pairs (bid below the offer) use up their round like any
+    other pair. A compatible pair trades, which exhausts one of its orders,
+    so among the active orders the untried pairs include every compatible
+    one: the rounds stop once none is left.
+    """
+    draws = _Draws(r)
+    n = len(book)
+    prices = book.rates
+    buying = np.flatnonzero(book.is_buy)
+    selling = np.flatnonzero(~book.is_buy)
+    tried = set()
+    tried_keys = np.empty(0, dtype=np.int64)
+    while True:
+        active = quantities > 0
+        active_b = buying[active[buying]]
+        active_s = selling[active[selling]]
+        if active_b.size == 0 or active_s.size == 0:
+            return
+        if prices[active_b].max() < prices[active_s].min():
+            return  # The pairs left can never trade
+        tried_keys = tried_keys[active[tried_keys // n] & active[tried_keys % n]]
+        round_b, round_s = _all_pairs_round(r, draws, active_b, active_s, n, tried, tried_keys)
+        keys = round_b * n + round_s
+        tried.update(keys.tolist())
+        tried_keys = np.concatenate([tried_keys, keys])
+        yield round_b, round_s
+
+
+def _crossing_round(r, reach, free_b, free_s):
+    """
+    Pairs of one round: every pair is drawn uniformly among the crossing
+    pairs of free bids and offers, and both orders then leave the round.
+
+    Bids and offers are in price order (see `OrderBook`) and bid ``k`` can
+    pay the offers before ``reach[k]``. The pairs are drawn from a snapshot
+    of the free orders, in which bid ``k`` can pay its ``count[k]`` first
+    free offers: a draw in ``[0, sum(count))`` is a uniform crossing pair of
+    the snapshot. Pairs whose bid or offer has left the round since are
+    redrawn, which keeps every draw uniform among the pairs left; the
+    snapshot is taken again once most draws are redrawn.
+    """
+    round_b, round_s = [], []
+    free_b, free_s = free_b.tolist(), free_s.tolist()
+    while True:
+        offers = np.flatnonzero(free_s)
+        count = np.where(free_b, np.searchsorted(offers, reach), 0)
+        cum = np.cumsum(count)
+        total = int(cum[-1]) if cum.size else 0
+        if total == 0:
+            return round_b, round_s
+        size = max(1, min(np.count_nonzero(count), offers.size))
+        while True:
+            draws = r.randint(total, size=size)
+            bids = np.searchsorted(cum, draws, side='right')
+            sellers = offers[draws - cum[bids] + count[bids]]
+            accepted = 0
+            for b, s in zip(bids.tolist(), sellers.tolist()):
+                if free_b[b] and free_s[s]:
+                    free_b[b] = free_s[s] = False
+                    round_b.append(b)
+                    round_s.append(s)
+                    accepted += 1
+            if 2 * accepted < size:
+                break  # New snapshot
+
+
+def _uniform_rounds(r, book, quantities):
+    """
+    Rounds of random crossing pairs of orders with quantity left.
+
+    A pair that is drawn trades and exhausts one of its orders, so no pair
+    is drawn twice and only per-order arrays are kept. The rounds stop once
+    no crossing pair is left.
+    """
+    bids, offers = book.bids, book.offers
+    reach = np.searchsorted(book.offer_rates, book.bid_rates, side='right')
+    while True:
+        round_b, round_s = _crossing_round(r, reach, quantities[bids] > 0, quantities[offers] > 0)
+        if not round_b:
+            return
+        yield bids[round_b], offers[round_s]
 
-    r = np.random.RandomState() if r is None else r
-    trans = TransactionManager()
-    buying = orders[orders.type]
-    selling = orders[orders.type == False]
-    
 
+def _compatible_rounds(r, book, quantities):
+    """
+    Rounds in which every active buyer, in a random order, is paired with a
+    seller drawn among the free sellers that ask at most its price.
+    """
+    prices = book.rates
+    buying = np.flatnonzero(book.is_buy)
+    # Sellers sorted by price: a buyer can trade with a prefix of them
+    selling = book.offers
+    reach = np.searchsorted(book.offer_rates, prices[buying], side='right')
 
-    Nb, Ns = buying.shape[0], selling.shape[0]
+    while True:
+        free_s = quantities[selling] > 0
+        avail = np.concatenate(([0], np.cumsum(free_s)))
+        candidates = np.flatnonzero((quantities[buying] > 0) & (avail[reach] > 0))
+        if candidates.size == 0:
+            return
 
-    quantities = orders.energy_qty.values.copy()
-    prices = orders.energy_rate.values.copy()
+        tree = _Fenwick(free_s.tolist())
+        round_b, round_s = [], []
+        for k in r.permutation(candidates).tolist():
+            n_free = tree.prefix(int(reach[k]))
+            if n_free == 0:
+                continue
+            j = tree.find(r.randint(n_free))
+            tree.remove(j)
+            round_b.append(k)
+            round_s.append(j)
+        yield buying[round_b], selling[round_s]
+
+
+def p2p_random(orders, p_coef=0.5, r=None, pairing='uniform', book=None):
+    """
+    Random peer-to-peer matching of bids and offers.
 
+    Trading happens in rounds of random pairs, each buyer and seller being
+    in at most one pair per round. The pairs in which the bid covers the
+    offer trade the minimum of both remaining quantities at
+    ``p_coef * bid_rate + (1 - p_coef) * offer_rate``.
 
+    With ``pairing="uniform"`` (default), every pair of a round is drawn
+    uniformly among the crossing pairs (bid at least the offer) of free
+    orders with quantity left. Rounds are repeated until no crossing pair
+    is left. Orders without quantity never trade.
 
-    inactive_buying = []
-    inactive_selling = []
+    With ``pairing="compatible"``, the active buyers are visited in a
+    random order and every one is paired with a seller drawn among the free
+    sellers that ask at most its price, until no compatible pair is left.
 
-    # Enumerate all possible trades
-    pairs = np.ones((Nb + Ns, Nb * Ns), dtype=bool)
-    pairs_inv = []
-    i = 0
-    for b in buying.index:
-        for s in selling.index:
-            pairs[b, i] = False  # Row b has 0s whenever the pair involves b
-            pairs[s, i] = False  # Same for s
-            pairs_inv.append((b, s))
-            i += 1
+    Both draw no pair that cannot trade and keep only per-order arrays, so
+    time and memory grow with the number of orders, not with the number of
+    possible pairs; the matches follow different distributions.
+
+    ``pairing="all_pairs"`` is the pairing of the original implementation:
+    every pair of a round is drawn uniformly among the pairs of orders with
+    quantity left that were never drawn before, whether their prices cross
+    or not, so an incompatible pair uses up its round. The pairs drawn
+    without a trade are kept, and both time and memory grow with the
+    number of bids times the number of offers: only use it on small books.
+
+    Parameters
+    ----------
+    orders : pd.DataFrame
+        Order book as produced by `OrderManager.get_df`.
+    p_coef : float, default=0.5
+        Weight of the bid price in the transaction price.
+    r : np.random.RandomState, optional
+        Random state used to draw the pairs.
+    pairing : {"uniform", "compatible", "all_pairs"}, default="uniform"
+        How the pairs of a round are drawn, see above.
+    book : OrderBook, optional
+        `EUnix.auctions.book.OrderBook` of `orders`, built when not given.
+
+    Returns
+    -------
+    trans : TransactionManager
+        One buying and one selling record per traded pair.
+    extra : dict
+        ``trading_list`` holds the pairs (order index labels) drawn in every
+        round.
+    """
+    if pairing not in PAIRINGS:
+        raise ValueError(f"Unknown pairing: {pairing}")
+    r = np.random.RandomState() if r is None else r
+    trans = TransactionManager()
+
+    book = OrderBook(orders) if book is None else book
+    quantities = book.quantities.copy()
+    prices = book.rates
+    labels = book.labels
+    rounds = {
+        'uniform': _uniform_rounds,
+        'compatible': _compatible_rounds,
+        'all_pairs': _all_pairs_rounds,
+    }[pairing]
 
-    active = np.ones(Nb * Ns, dtype=bool)
-    tmp_active = active.copy()
     general_trading_list = []
-    # Loop while there is quantities to trade or not all
-    # possibilities have been tried
-    while quantities.sum() > 0 and tmp_active.sum() > 0:
-        trading_list = []
-        while tmp_active.sum() > 0:  # We can select a pair
-            where = np.where(tmp_active == 1)[0]
-            x = r.choice(where)
-            trade = pairs_inv[x]
-            active[x] = False  # Pair has already traded
-            trading_list.append(trade)
-            tmp_active &= pairs[trade[0], :]  # buyer and seller already used
-            tmp_active &= pairs[trade[1], :]
-
-        general_trading_list.append(trading_list)
-        for (b, s) in trading_list:
-            if prices[b] >= prices[s]:
-                q = min(quantities[b], quantities[s])
-                p = prices[b] * p_coef + (1 - p_coef) * prices[s]
-                #trans_b = (b, q, p, s, (quantities[b] - q) > 0)
-                #trans_s = (s, q, p, b, (quantities[s] - q) > 0)
-                xb = buying.loc[b]
-                xs = selling.loc[s]               
-                trx_id = str(uuid.uuid4())
-                trans_b = (trx_id, xb.User, xb.User_id, xb.Unit_area, xb.Order_id, xb.energy_qty, xb.energy_rate, xb.bid_offer_time,
-                 xs.User, xs.User_id, xs.Order_id, xs.energy_qty, xs.energy_rate, xs.bid_offer_time,p,q, xb.delivery_time, "Buying")
-                trans_s = (trx_id, xb.User, xb.User_id, xs.Unit_area, xb.Order_id, xb.energy_qty, xb.energy_rate, xb.bid_offer_time,
-                 xs.User, xs.User_id, xs.Order_id, xs.energy_qty, xs.energy_rate, xs.bid_offer_time,p,q, xb.delivery_time, "Selling")
-
-                quantities[b] -= q
-                quantities[s] -= q
-                trans.add_transaction(*trans_b)
-                trans.add_transaction(*trans_s)
-            else:
-                trans_b = (b, 0, 0, s, True)
-                trans_s = (s, 0, 0, b, True)
-
-
-        inactive_buying = [b for b in buying.index if quantities[b] == 0]
-        inactive_selling = [s for s in selling.index if quantities[s] == 0]
-
-        tmp_active = active.copy()
-        for inactive in inactive_buying + inactive_selling:
-            tmp_active &= pairs[inactive, :]
+    traded_b, traded_s, traded_q, traded_p = [], [], [], []
+    for b, s in rounds(r, book, quantities):
+        general_trading_list.append(list(zip(labels[b].tolist(), labels[s].tolist())))
+        crossing = prices[b] >= prices[s]
+        b, s = b[crossing], s[crossing]
+        q = np.minimum(quantities[b], quantities[s])
+        quantities[b] -= q
+        quantities[s] -= q
+
+        traded_b.append(b)
+        traded_s.append(s)
+        traded_q.append(q)
+        traded_p.append(prices[b] * p_coef + (1 - p_coef) * prices[s])
+
+    if traded_b:
+        b = np.concatenate(traded_b)
+        s = np.concatenate(traded_s)
+        q = np.concatenate(traded_q)
+        p = np.concatenate(traded_p)
+
+        def pairs(name, idx):
+            # Buying and selling records of a pair share the same fields
+            return np.repeat(orders[name].to_numpy()[idx], 2)
+
+        unit_area = np.empty(2 * len(b), dtype=object)
+        unit_area[0::2] = orders['Unit_area'].to_numpy()[b]
+        unit_area[1::2] = orders['Unit_area'].to_numpy()[s]
+
+        trans.add_transactions(
+            np.repeat(new_trans_ids(len(b)), 2),
+            pairs('User', b), pairs('User_id', b), unit_area, pairs('Order_id', b),
+            pairs('energy_qty', b), pairs('energy_rate', b), pairs('bid_offer_time', b),
+            pairs('User', s), pairs('User_id', s), pairs('Order_id', s),
+            pairs('energy_qty', s), pairs('energy_rate', s), pairs('bid_offer_time', s),
+            np.repeat(p, 2), np.repeat(q, 2), pairs('delivery_time', b),
+            np.tile(np.array(["Buying", "Selling"], dtype=object), len(b)),
+        )
 
     extra = {'trading_list': general_trading_list}
     return trans, extra
@@ -105,6 +396,8 @@ def p2p_random(orders, p_coef=0.5, r=None):
 
 class P2PTrading(Mechanism):
 
+    uses_book = True
+
     def __init__(self, orders, *args, **kwargs):
 
         Mechanism.__init__(self, p2p_random, orders, *args, **kwargs)
@@ -12,44 +12,45 @@ import pandas as pd
 import numpy as np
 import uuid
 
-from EUnix.transactions.transactions import TransactionManager
+from EUnix.transactions.transactions import TransactionManager, new_trans_ids
+from EUnix.auctions.book import OrderBook
 from EUnix.auctions.orders import OrderManager
 from EUnix.mechanisms import Mechanism
 from EUnix.mechanisms import uniform_process as dv
 
 
-def uniform_price_mechanism(orders):
+def uniform_price_mechanism(orders, book=None):
     trans = TransactionManager()
 
-    buy, _ = dv.demand_curve_from_bids(orders)
-    sell, _ = dv.supply_curve_from_bids(orders)
+    book = OrderBook(orders) if book is None else book  # Sorted once per slot by the market
+    buy, _ = book.demand_curve()
+    sell, _ = book.supply_curve()
     q_, price, b_, s_ = dv.intersect_stepwise(buy, sell)
 
     if price is None:
         return trans, []
 
-    bids = orders[orders.type].sort_values('energy_rate', ascending=False).iloc[:b_+1]
-    offers = orders[~orders.type].sort_values('energy_rate').iloc[:s_+1]
+    # The book already holds both sides in merit order
+    bids = orders.iloc[book.bids[:b_+1]]
+    offers = orders.iloc[book.offers[:s_+1]]
 
-    buying_qty = bids.energy_qty.sum()
-    selling_qty = offers.energy_qty.sum()
+    bid_qty = book.quantities[book.bids[:b_+1]]
+    offer_qty = book.quantities[book.offers[:s_+1]]
+    buying_qty = bid_qty.sum()
+    selling_qty = offer_qty.sum()
     traded_qty = min(buying_qty, selling_qty)
 
-    short_side = bids if buying_qty <= selling_qty else offers
-    long_side = offers if buying_qty <= selling_qty else bids
+    short_side, short_qty = (bids, bid_qty) if buying_qty <= selling_qty else (offers, offer_qty)
+    long_side, long_qty = (offers, offer_qty) if buying_qty <= selling_qty else (bids, bid_qty)
 
     # Add all short side transactions (fully matched)
-    for _, row in short_side.iterrows():
-        trans.add_transaction(*create_transaction(row, price, row.energy_qty))
+    trans.add_transactions(**create_transactions(short_side, price, short_qty))
 
     # Add partial from long side until matched quantity is fulfilled
-    quantity_added = 0
-    for _, row in long_side.iterrows():
-        if quantity_added >= traded_qty:
-            break
-        x_qty = min(row.energy_qty, traded_qty - quantity_added)
-        trans.add_transaction(*create_transaction(row, price, x_qty))
-        quantity_added += x_qty
+    added_before = np.cumsum(long_qty) - long_qty
+    filled = added_before < traded_qty
+    long_matched = np.minimum(long_qty, traded_qty - added_before)[filled]
+    trans.add_transactions(**create_transactions(long_side[filled], price, long_matched))
 
     return trans, {
         'clearing quantity': q_,
@@ -57,6 +58,35 @@ def uniform_price_mechanism(orders):
     }
 
 
+def create_transactions(rows, price, matched_qty):
+    """
+    Vectorized `create_transaction` for a block of orders of the same side.
+
+    Returns a dict of transaction columns ready for
+    `TransactionManager.add_transactions`.
+    """
+    n = len(rows)
+    blank = np.full(n, "", dtype=object)
+    own = [
+        rows.User.to_numpy(dtype=object), rows.User_id.to_numpy(dtype=object),
+        rows.Order_id.to_numpy(dtype=object), rows.energy_qty.to_numpy(),
+        rows.energy_rate.to_numpy(), rows.bid_offer_time.to_numpy(dtype=object),
+    ]
+    empty = [blank] * len(own)
+    buyer, seller = (own, empty) if n and rows.type.iloc[0] else (empty, own)
+
+    return {
+        'Trans_id': new_trans_ids(n),
+        'Buyer': buyer[0], 'Buyer_id': buyer[1], 'Unit_area': rows.Unit_area.to_numpy(dtype=object),
+        'Bid_id': buyer[2], 'Bid_qty': buyer[3], 'Bid_rate': buyer[4], 'Bid_time': buyer[5],
+        'Seller': seller[0], 'Seller_id': seller[1], 'Offer_id': seller[2],
+        'Offer_qty': seller[3], 'Offer_rate': seller[4], 'Offer_time': seller[5],
+        'Clearing_rate': price, 'Matched_qty': matched_qty,
+        'Delivery_time': rows.delivery_time.to_numpy(dtype=object),
+        'Trans_type': "Buying" if buyer is own else "Selling",
+    }
+
+
 def create_transaction(row, price, matched_qty):
     """Helper to generate a transaction tuple from a row."""
     tx_id = str(uuid.uuid4())
@@ -78,5 +108,7 @@ def create_transaction(row, price, matched_qty):
 class UniformPrice(Mechanism):
     """Interface for uniform price mechanism."""
 
+    uses_book = True
+
     def __init__(self, bids, *args, **kwargs):
         super().__init__(uniform_price_mechanism, bids, *args, **kwargs)
@@ -8,52 +8,64 @@ This file includes modifications made by Godwin Okwuibe in 2025.
 """
 
 import numpy as np
-import pandas as pd
+
+from EUnix.auctions.book import OrderBook
 
 
 
 
 def demand_curve_from_bids(bids):
-    """Creates a demand curve from buying bids."""
-    buying = bids[bids.type].sort_values('energy_rate', ascending=False)
-    buying['acum'] = buying.energy_qty.cumsum()
-    demand_curve = np.vstack([buying[['acum', 'energy_rate']].values, [np.inf, 0]])
-    return demand_curve, buying.index.values.astype('int64')
+    """Creates a demand curve from buying bids (see `OrderBook.demand_curve`)."""
+    demand_curve, labels = OrderBook(bids).demand_curve()
+    return demand_curve, labels.astype('int64')
 
 
 def supply_curve_from_bids(bids):
-    """Creates a supply curve from selling bids."""
-    selling = bids[~bids.type].sort_values('energy_rate')
-    selling['acum'] = selling.energy_qty.cumsum()
-    supply_curve = np.vstack([selling[['acum', 'energy_rate']].values, [np.inf, np.inf]])
-    return supply_curve, selling.index.values.astype('int64')
+    """Creates a supply curve from selling bids (see `OrderBook.supply_curve`)."""
+    supply_curve, labels = OrderBook(bids).supply_curve()
+    return supply_curve, labels.astype('int64')
 
 
 def get_value_stepwise(x, f):
     """Returns value of a stepwise constant function f evaluated at x."""
     if x < 0:
         return None
-    for step in f:
-        if x <= step[0]:
-            return step[1]
+    i = np.searchsorted(f[:, 0], x, side='left')
+    if i < len(f):
+        return f[i, 1]
 
 
 def intersect_stepwise(Buy, Sell):
     """
     Determines the market clearing point from stepwise demand and supply curves.
-    Returns (quantity, price, buyer_index, seller_index)
-    """
-    if len(Buy) <= 2 and len(Sell) <= 2:
-        buy_price, sell_price = Buy[0][1], Sell[0][1]
-        if buy_price > sell_price:
-            return min(Buy[0][0], Sell[0][0]), (buy_price + sell_price) / 2, 0, 0
-
-    buy_cumsum = np.cumsum(Buy[:, 0])
-    sell_cumsum = np.cumsum(Sell[:, 0])
 
-    for b_, bq in enumerate(buy_cumsum):
-        for s_, sq in enumerate(sell_cumsum):
-            if bq >= sq and Buy[b_, 1] >= Sell[s_, 1]:
-                return sq, (Buy[b_, 1] + Sell[s_, 1]) / 2, b_, s_
-
-    return None, None, None, None
+    Both curves hold rows ``(cumulative quantity, price)`` sorted by quantity,
+    as built by `demand_curve_from_bids` and `supply_curve_from_bids`. The
+    quantity axis is split at every breakpoint of either curve and, with
+    `np.searchsorted`, the active bid and offer of each interval are found.
+    Since the demand price never increases and the supply price never
+    decreases, the intervals where the bid covers the offer form a prefix;
+    its last interval gives the marginal bid and offer.
+
+    Returns (quantity, price, buyer_index, seller_index), where the indices
+    are positions in the curves and the price is the mean of both marginal
+    prices, or four Nones when no trade is possible.
+    """
+    buy_q, buy_p = Buy[np.isfinite(Buy[:, 0])].T
+    sell_q, sell_p = Sell[np.isfinite(Sell[:, 0])].T
+    if buy_q.size == 0 or sell_q.size == 0:
+        return None, None, None, None
+
+    limit = min(buy_q[-1], sell_q[-1])
+    starts = np.unique(np.concatenate(([0.0], buy_q, sell_q)))
+    starts = starts[starts < limit]
+
+    b_idx = np.searchsorted(buy_q, starts, side='right')
+    s_idx = np.searchsorted(sell_q, starts, side='right')
+    feasible = buy_p[b_idx] >= sell_p[s_idx]
+    n = feasible.size if feasible.all() else int(np.argmin(feasible))
+    if n == 0:
+        return None, None, None, None
+
+    b_, s_ = int(b_idx[n - 1]), int(s_idx[n - 1])
+    return min(buy_q[b_], sell_q[s_]), (buy_p[b_] + sell_p[s_]) / 2, b_, s_
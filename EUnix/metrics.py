@@ -0,0 +1,283 @@
+"""
+Per-slot latency metrics of a simulation.
+
+`SlotMetrics` times the stages every closed slot goes through and counts
+what flows through them; once a slot is published, its record is handed to
+the metrics sinks. The stages are
+
+* ``read``: draining the orders of the slot from the transport,
+* ``decode``: turning the entries into order columns,
+* ``accept``: loading the orders into the `Market` order book,
+* ``match``: running the mechanism (`Market.run`),
+* ``fees``: grid-fee post-processing of the transactions,
+* ``stats``: slot and running statistics,
+* ``sink``: writing the transactions to the result sink,
+* ``publish``: serialising and publishing the results.
+
+A record also holds the number of orders and transactions of the slot, the
+bytes published, and its ``latency``: the time from the start of ``read``
+until the slot is done. Stages of different slots may overlap (see
+`EUnix.pipeline` and `EUnix.async_simulation`), so the latency can be more
+than the sum of its stages.
+
+Two sinks are provided: `MemoryMetrics`, keeping the records and
+histograms in memory, and `PrometheusTextFile`, rewriting a file in the
+Prometheus text format after every slot (e.g. for the textfile collector of
+the node exporter), so alerts can fire on slots approaching gate closure.
+"""
+import bisect
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+
+STAGES = ("read", "decode", "accept", "match", "fees", "stats", "sink", "publish")
+COUNTS = ("orders", "transactions", "bytes")
+
+# Upper bounds (s) of the histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def entry_size(value):
+    """Size in bytes of the published `value`: serialised results as they are, other objects as JSON."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if not isinstance(value, str):
+        value = json.dumps(value)
+    return len(value.encode('utf-8'))
+
+
+class SlotRecord():
+    """Metrics of one slot: `stages` maps stage names to seconds, `counts` count names to totals."""
+
+    def __init__(self, slot):
+        self.slot = slot
+        self.stages = defaultdict(float)
+        self.counts = dict.fromkeys(COUNTS, 0)
+        self.latency = 0.0
+        self._start = None
+
+    def as_dict(self):
+        """Flat dict: the slot, the latency, one entry per stage and count."""
+        row = {"slot": self.slot, "latency": self.latency}
+        row.update((stage, self.stages.get(stage, 0.0)) for stage in STAGES)
+        row.update(self.counts)
+        return row
+
+
+class SlotMetrics():
+    """
+    Collects the metrics of the slots and sends them to `sinks`.
+
+    Parameters
+    ----------
+    sinks : MetricsSink or list of MetricsSink, optional
+        Receivers of the record of every finished slot. Without sinks,
+        nothing is measured.
+
+    The methods take the slot they account for, so stages of different
+    slots can run at once, on several threads.
+    """
+
+    def __init__(self, sinks=None):
+        if sinks is None:
+            sinks = []
+        elif isinstance(sinks, MetricsSink):
+            sinks = [sinks]
+        self.sinks = list(sinks)
+        self.enabled = bool(self.sinks)
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def _record(self, slot):
+        record = self._records.get(slot)
+        if record is None:
+            record = self._records[slot] = SlotRecord(slot)
+        return record
+
+    @contextlib.contextmanager
+    def _timed(self, slot, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                record = self._record(slot)
+                record.stages[stage] += end - start
+                if record._start is None:
+                    record._start = start
+
+    def stage(self, slot, stage):
+        """Context manager timing `stage` of `slot`."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed(slot, stage)
+
+    def count(self, slot, name, value):
+        """Adds `value` to the count `name` of `slot`."""
+        if self.enabled:
+            with self._lock:
+                self._record(slot).counts[name] += value
+
+    def count_published(self, slot, items):
+        """Counts the bytes of the ``(key, data)`` entries published for `slot`."""
+        if self.enabled:
+            self.count(slot, "bytes", sum(entry_size(data) for _, data in items))
+
+    def finish(self, slot):
+        """Ends the measures of `slot` and sends its record to the sinks."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            record = self._records.pop(slot, None)
+        if record is None:
+            return None
+        if record._start is not None:
+            record.latency = time.perf_counter() - record._start
+        for sink in self.sinks:
+            sink.record(record)
+        return record
+
+    def close(self):
+        """Closes the sinks."""
+        for sink in self.sinks:
+            sink.close()
+
+
+class MetricsSink():
+    """Base class of the metrics sinks: `record` receives every finished `SlotRecord`."""
+
+    def record(self, record):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class Histogram():
+    """Cumulative histogram of durations, with Prometheus buckets."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # Last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """``(upper bound, count of values below)`` pairs, ending with +Inf."""
+        return list(zip(self.buckets + (float("inf"),), np.cumsum(self.counts).tolist()))
+
+
+class MemoryMetrics(MetricsSink):
+    """
+    Keeps the slot records and a histogram per stage and for the latency.
+
+    `max_records` bounds the number of records kept (the oldest are
+    dropped); the histograms cover every slot.
+    """
+
+    def __init__(self, buckets=BUCKETS, max_records=None):
+        self.buckets = tuple(buckets)
+        self.max_records = max_records
+        self.records = []
+        self.histograms = defaultdict(lambda: Histogram(self.buckets))
+        self.totals = dict.fromkeys(COUNTS, 0)
+
+    def record(self, record):
+        self.records.append(record)
+        if self.max_records is not None and len(self.records) > self.max_records:
+            del self.records[0]
+        self.histograms["latency"].observe(record.latency)
+        for stage, seconds in record.stages.items():
+            self.histograms[stage].observe(seconds)
+        for name, value in record.counts.items():
+            self.totals[name] += value
+
+    def histogram(self, name):
+        """Histogram of a stage, or of ``"latency"``."""
+        return self.histograms[name]
+
+    def quantile(self, name, q):
+        """Quantile `q` of a stage (or of ``"latency"``) over the kept records."""
+        values = [r.latency if name == "latency" else r.stages.get(name, 0.0) for r in self.records]
+        return float(np.quantile(values, q)) if values else float("nan")
+
+    def slow_slots(self, threshold):
+        """Records of the kept slots whose latency exceeds `threshold` seconds."""
+        return [r for r in self.records if r.latency > threshold]
+
+    def get_df(self):
+        """The kept records as a DataFrame, one row per slot."""
+        import pandas as pd
+        return pd.DataFrame([r.as_dict() for r in self.records])
+
+
+class PrometheusTextFile(MemoryMetrics):
+    """
+    Exports the metrics in the Prometheus text format to `path`.
+
+    The file is replaced atomically after every slot with histograms of
+    the stages (``eunix_stage_seconds``) and of the slot latency
+    (``eunix_slot_latency_seconds``), the totals of orders, transactions
+    and bytes, and the latency of the last slot.
+    """
+
+    def __init__(self, path, buckets=BUCKETS, prefix="eunix"):
+        super().__init__(buckets, max_records=1)
+        self.path = path
+        self.prefix = prefix
+
+    def record(self, record):
+        super().record(record)
+        self.write()
+
+    def _histogram(self, lines, name, hist, labels=""):
+        sep = "," if labels else ""
+        for bound, count in hist.cumulative():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {hist.sum!r}")
+        lines.append(f"{name}_count{suffix} {hist.count}")
+
+    def render(self):
+        """Returns the content of the exported file."""
+        p = self.prefix
+        lines = [f"# HELP {p}_stage_seconds Time spent in each stage of a slot.",
+                 f"# TYPE {p}_stage_seconds histogram"]
+        for stage in STAGES:
+            if stage in self.histograms:
+                self._histogram(lines, f"{p}_stage_seconds", self.histograms[stage], f'stage="{stage}"')
+        lines += [f"# HELP {p}_slot_latency_seconds Time from reading the orders of a slot to its publication.",
+                  f"# TYPE {p}_slot_latency_seconds histogram"]
+        self._histogram(lines, f"{p}_slot_latency_seconds", self.histograms["latency"])
+        for name in COUNTS:
+            lines += [f"# HELP {p}_{name}_total Total {name} of the cleared slots.",
+                      f"# TYPE {p}_{name}_total counter",
+                      f"{p}_{name}_total {self.totals[name]}"]
+        if self.records:
+            last = self.records[-1]
+            lines += [f"# HELP {p}_last_slot_latency_seconds Latency of the last slot.",
+                      f"# TYPE {p}_last_slot_latency_seconds gauge",
+                      f'{p}_last_slot_latency_seconds {last.latency!r}']
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+
+    def close(self):
+        self.write()
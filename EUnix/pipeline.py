@@ -0,0 +1,100 @@
+"""
+Pipelined processing of the closed slots of a `Simulation`.
+
+The stages of `Simulation.mach_function` (ingest, clear, post-process,
+publish) run on one worker thread each, connected by bounded queues. The
+main loop only hands over a slot when its gate closes, so a slow clearing
+no longer delays the announcement of the next slots: clearing slot N
+overlaps with the order collection of slot N+1. Every stage handles the
+slots one at a time, in order, so results are still published in slot
+order.
+"""
+import queue
+import threading
+
+
+_STOP = object()
+
+
+class SlotPipeline():
+    """
+    Worker threads running the slot stages of a simulation.
+
+    Parameters
+    ----------
+    simulation : Simulation
+        Simulation whose `ingest`, `clear`, `post` and `publish` stages run.
+    queue_size : int, default=2
+        Capacity of the queue in front of every stage. When the queue of the
+        first stage is full, `submit` blocks until the pipeline catches up.
+    """
+
+    def __init__(self, simulation, queue_size=2):
+        self.simu = simulation
+        self.error = None
+        stages = [self._ingest, self._clear, self._post, self._publish]
+        self.queues = [queue.Queue(queue_size) for _ in stages]
+        outboxes = self.queues[1:] + [None]
+        self.threads = [
+            threading.Thread(target=self._work, args=(stage, inbox, outbox),
+                             name=f"slot-{stage.__name__[1:]}", daemon=True)
+            for stage, inbox, outbox in zip(stages, self.queues, outboxes)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _work(self, stage, inbox, outbox):
+        while True:
+            item = inbox.get()
+            if item is _STOP:
+                if outbox is not None:
+                    outbox.put(_STOP)
+                return
+            if self.error is not None:
+                continue  # Later slots are dropped once a stage failed
+            try:
+                item = stage(*item)
+            except Exception as e:
+                self.error = e
+                continue
+            if outbox is not None:
+                outbox.put(item)
+
+    def _ingest(self, slot, step):
+        return slot, step, self.simu.ingest(slot)
+
+    def _clear(self, slot, step, orders):
+        return slot, step, None if orders is None else self.simu.clear(orders, slot)
+
+    def _post(self, slot, step, trans_df):
+        trans_stat = None
+        if trans_df is not None and not trans_df.empty:
+            trans_stat = self.simu.post(slot, trans_df)
+        return slot, step, trans_df, trans_stat
+
+    def _publish(self, slot, step, trans_df, trans_stat):
+        if trans_df is None:
+            print(f"No Bid or Offer data received for slot {slot}")
+        elif trans_stat is None:
+            print("The results is empty.")
+        else:
+            self.simu.publish(slot, trans_df, trans_stat)
+        self.simu.finish_slot(slot)
+        self.simu.pub_ins.publish_slot(slot, step, "Results") #Market  slot ends and results published
+
+    def check(self):
+        """Raises the error of a failed stage, if any."""
+        if self.error is not None:
+            raise RuntimeError("A slot processing stage failed") from self.error
+
+    def submit(self, slot, step):
+        """Hands over the closed slot `slot`, announced with "Results" at `step`."""
+        self.check()
+        self.queues[0].put((slot, step))
+
+    def close(self):
+        """Waits until every submitted slot has been published and stops the workers."""
+        self.queues[0].put(_STOP)
+        for thread in self.threads:
+            thread.join()
+        self.check()
@@ -0,0 +1,187 @@
+"""
+Opt-in profiling of selected market slots.
+
+`SlotProfiler` runs cProfile and tracemalloc while the stages of chosen
+slots are processed, and writes a report per slot with the top functions
+by cumulative time and the top allocation sites. Slots are chosen by name,
+or by latency: with a `threshold`, every slot is profiled and only those
+slower than the threshold are reported.
+
+Usage::
+
+    profiler = SlotProfiler(slots=["2014-12-01T10:00"], threshold=1.5)
+    simu = Simulation(data, startSlot, steps, "p2p", profiler=profiler)
+
+Only one stage is profiled at a time: when stages of different slots
+overlap (see `EUnix.pipeline`), the profiled ones run one after the other.
+Allocations are traced for the whole process, so the report of a slot may
+include allocations of slots processed at the same time.
+"""
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+
+_ACTIVE = threading.Lock() # One profiled stage at a time
+
+
+class _SlotProfile():
+    """Profile being collected for one slot."""
+
+    def __init__(self):
+        self.cpu = cProfile.Profile()
+        self.start = time.perf_counter()
+        self.base = None      # Allocations when the slot started
+        self.snapshot = None  # Allocations at the end of its largest stage
+        self.largest = -1
+        self.peak = 0
+        self.stages = []
+
+
+class SlotProfiler():
+    """
+    Profiles the stages of selected slots.
+
+    Parameters
+    ----------
+    slots : iterable of str, optional
+        Slots always profiled, e.g. ``"2014-12-01T10:00"``.
+    threshold : float, optional
+        Latency in seconds above which a slot is reported. Every slot is
+        then profiled, which slows the simulation down.
+    directory : str, optional
+        Directory of the reports; by default the one of the simulation
+        results.
+    top : int, default=25
+        Number of functions and allocation sites reported.
+    sort : str, default="cumulative"
+        `pstats` sort key of the functions.
+    frames : int, default=1
+        Frames kept by tracemalloc per allocation.
+    memory : bool, default=True
+        Whether allocations are traced.
+    dump : bool, default=True
+        Whether the raw cProfile statistics are also written (``.prof``),
+        e.g. for snakeviz.
+    """
+
+    def __init__(self, slots=None, threshold=None, directory=None, top=25, sort="cumulative",
+                 frames=1, memory=True, dump=True):
+        self.slots = {pd.Timestamp(slot).isoformat() for slot in slots or ()}
+        self.threshold = threshold
+        self.directory = directory
+        self.top = top
+        self.sort = sort
+        self.frames = frames
+        self.memory = memory
+        self.dump = dump
+        self.reports = [] # Paths of the written reports
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._tracing = False
+
+    def selected(self, slot):
+        """Whether the stages of `slot` are profiled."""
+        return self.threshold is not None or slot in self.slots
+
+    def stage(self, slot, name=None):
+        """Context manager profiling a stage of `slot` (a no-op for the other slots)."""
+        if not self.selected(slot):
+            return contextlib.nullcontext()
+        return self._profiled(slot, name)
+
+    @contextlib.contextmanager
+    def _profiled(self, slot, name):
+        with _ACTIVE:
+            with self._lock:
+                profile = self._profiles.get(slot)
+                if profile is None:
+                    profile = self._profiles[slot] = _SlotProfile()
+            if self.memory:
+                self._start_tracing(profile)
+            profile.stages.append(name)
+            profile.cpu.enable()
+            try:
+                yield
+            finally:
+                profile.cpu.disable()
+                if self.memory:
+                    self._trace(profile)
+
+    def _start_tracing(self, profile):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._tracing = True
+        if profile.base is None:
+            tracemalloc.reset_peak()
+            profile.base = tracemalloc.take_snapshot()
+
+    def _trace(self, profile):
+        current, peak = tracemalloc.get_traced_memory()
+        profile.peak = max(profile.peak, peak)
+        if current > profile.largest:
+            profile.largest = current
+            profile.snapshot = tracemalloc.take_snapshot()
+
+    def finish(self, slot):
+        """
+        Ends the profile of `slot`, and writes its report when the slot was
+        selected by name or slower than `threshold`.
+
+        Returns the path of the report, or None.
+        """
+        with self._lock:
+            profile = self._profiles.pop(slot, None)
+            if self._tracing and not self._profiles:
+                tracemalloc.stop()
+                self._tracing = False
+        if profile is None:
+            return None
+        latency = time.perf_counter() - profile.start
+        if slot not in self.slots and latency <= self.threshold:
+            return None
+        return self.write(slot, profile, latency)
+
+    def _filters(self):
+        return [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+
+    def render(self, slot, profile, latency):
+        """Text report of the profile of `slot`."""
+        out = io.StringIO()
+        out.write(f"Slot {slot}: {latency:.3f} s, stages {', '.join(str(s) for s in profile.stages)}\n")
+        if self.threshold is not None:
+            out.write(f"Latency threshold: {self.threshold} s\n")
+        out.write(f"\n== Functions (top {self.top} by {self.sort}) ==\n")
+        pstats.Stats(profile.cpu, stream=out).sort_stats(self.sort).print_stats(self.top)
+        if profile.snapshot is not None:
+            out.write(f"== Allocations (top {self.top} by size, since the slot started) ==\n")
+            out.write(f"Peak traced memory: {profile.peak / 2**20:.2f} MiB\n")
+            snapshot = profile.snapshot.filter_traces(self._filters())
+            base = profile.base.filter_traces(self._filters())
+            for stat in snapshot.compare_to(base, "traceback" if self.frames > 1 else "lineno")[:self.top]:
+                out.write(f"{stat}\n")
+                if self.frames > 1:
+                    out.writelines(f"    {line}\n" for line in stat.traceback.format())
+        return out.getvalue()
+
+    def write(self, slot, profile, latency):
+        """Writes the report of `slot` and returns its path."""
+        directory = self.directory or "."
+        os.makedirs(directory, exist_ok=True)
+        name = "profile_" + re.sub(r"[^0-9A-Za-z]+", "-", slot).strip("-")
+        path = os.path.join(directory, name + ".txt")
+        with open(path, "w") as f:
+            f.write(self.render(slot, profile, latency))
+        if self.dump:
+            profile.cpu.dump_stats(os.path.join(directory, name + ".prof"))
+        self.reports.append(path)
+        print(f"Profile of slot {slot} saved to {path}")
+        return path
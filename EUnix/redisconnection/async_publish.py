@@ -0,0 +1,121 @@
+"""
+Asyncio counterpart of `EUnix.redisconnection.publish.ProcessSlots`.
+"""
+import asyncio
+import uuid
+
+from EUnix.clock import RealTimeClock
+from EUnix.redisconnection.async_transport import make_async_transport
+from EUnix.redisconnection.codec import ENCODINGS, submitters
+from EUnix.redisconnection.publish import ProcessSlots
+
+
+class AsyncProcessSlots:
+
+    def __init__(self, data, startSlot = None, steps = 96, redis_config = None, clock = None, namespace = None, transport = None, encoding = "json"):
+        """Same parameters as `ProcessSlots`; every exchange with the agents is a coroutine.
+
+        `transport` is an `AsyncTransport`, a synchronous `Transport`
+        (run in worker threads), ``"redis"`` (default, on `redis.asyncio`)
+        or ``"memory"``. `encoding` is the encoding of the results. The
+        registration channel is opened by `open_registration`, which must be
+        awaited before the first slot.
+        """
+        self.data = data
+        self.startSlot  = startSlot
+        self.Nstep = steps
+        self.namespace = namespace
+        self.encoding = encoding
+        self.clock = RealTimeClock() if clock is None else clock
+        self.transport = make_async_transport(transport, redis_config)
+        self._submitters = {} #Slot list -> (entries counted, users), see count_submitters
+        self.registered = False
+
+
+    key = ProcessSlots.key
+    get_timeSlot = ProcessSlots.get_timeSlot
+
+
+    async def open_registration(self):
+        action = "Registration open"
+        unique_id = str(uuid.uuid4())
+        await self.transport.publish(self.key('registration_channel'), f"{action}:{unique_id}")
+        r_data = {
+            "action": "Registration open",
+            "platID": unique_id,
+            "encodings": list(ENCODINGS), #Accepted for orders
+            "encoding": self.encoding,    #Used for results
+              }
+        await self.send_to_redis("registraion", r_data)
+        self.registered = True
+        print("Regiistration channel opened")
+
+
+    async def send_to_redis(self, inst, data):
+        await self.transport.push(self.key(inst), data)
+        await self.transport.expire(self.key(inst), 300)
+
+
+    async def send_many_to_redis(self, items, ttl=300):
+        """Pushes several ``(key, data)`` entries in one batch (see `ProcessSlots.send_many_to_redis`)."""
+        await self.transport.push_many([(self.key(inst), data) for inst, data in items], ttl)
+
+
+    async def submit_orders(self, slot_time, records):
+        """Pushes order records to the list of a slot, as agents do."""
+        if records:
+            await self.transport.push(self.key(slot_time), *records)
+
+
+    async def publish_slot(self, slot_time, step, msg="end"):
+        await self.clock.before_publish_async()
+        if step == self.Nstep:
+            await self.transport.publish(self.key('slot_channel'), "end")
+            print("Main Script: Sending termination signal")
+        else:
+            await self.transport.publish(self.key('slot_channel'), msg+" Slot "+ slot_time)
+            print(f"Market slot {slot_time} {msg}")
+
+
+    async def read_from_redis(self, key, chunk_size=None):
+        """Takes and removes every entry of the list `key` (see `ProcessSlots.read_from_redis`).
+
+        The entries are not decoded: pass them to `decode` in a worker thread.
+        """
+        key = self.key(key)
+        chunks = await self.transport.drain(key, chunk_size)
+        self._submitters.pop(key, None)
+        data_dict = []
+        for chunk in chunks:
+            data_dict.extend(chunk)
+        if not data_dict:
+            print("No data found in the Redis list.")
+            return
+        return data_dict
+
+
+    async def count_submitters(self, key):
+        """Number of distinct users with orders in the list `key` (see `ProcessSlots.count_submitters`)."""
+        key = self.key(key)
+        counted, users = self._submitters.get(key, (0, set()))
+        entries = await self.transport.peek(key, counted)
+        users |= await asyncio.to_thread(lambda: submitters(self.decode(entries)))
+        self._submitters[key] = (counted + len(entries), users)
+        return len(users)
+
+
+    def decode(self, entries):
+        """Values of entries read from the transport (synchronous, CPU bound)."""
+        return self.transport.decode(entries)
+
+
+    async def delete_from_redis(self, key):
+        key = self.key(key)
+        self._submitters.pop(key, None)
+        if await self.transport.exists(key):
+            await self.transport.delete(key)
+            print(f"Key '{key}' deleted from Redis.")
+            return True
+        else:
+            print(f"Key '{key}' does not exist in Redis.")
+            return False
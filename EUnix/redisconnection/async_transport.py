@@ -0,0 +1,164 @@
+"""
+Asyncio message transports.
+
+`AsyncTransport` mirrors `EUnix.redisconnection.transport.Transport` with
+coroutines. `AsyncRedisTransport` talks to Redis through `redis.asyncio`;
+`AsyncTransportAdapter` runs any synchronous transport (e.g. the in-memory
+one) in worker threads.
+
+`drain` and `peek` return the entries as they are stored and `decode`
+turns them into values: decoding is CPU bound, so callers run it in a
+worker thread rather than on the event loop.
+"""
+import asyncio
+
+from EUnix.redisconnection.connection import get_async_client
+from EUnix.redisconnection.transport import (
+    Transport, check_chunk_size, decode_entry, encode_entry, make_transport,
+)
+
+
+class AsyncTransport():
+    """Interface of the asyncio transports (see `Transport`)."""
+
+    async def publish(self, channel, message):
+        raise NotImplementedError
+
+    async def push(self, key, *values):
+        raise NotImplementedError
+
+    async def push_many(self, items, ttl=None):
+        raise NotImplementedError
+
+    async def drain(self, key, chunk_size=None):
+        """Returns the chunks taken from the list `key` (see `Transport.drain`), not decoded."""
+        raise NotImplementedError
+
+    async def peek(self, key, start=0):
+        """Returns the entries of the list `key` from position `start` (see `Transport.peek`), not decoded."""
+        raise NotImplementedError
+
+    def decode(self, entries):
+        """Values of `entries` returned by `drain` or `peek` (synchronous, CPU bound)."""
+        return entries
+
+    async def expire(self, key, ttl):
+        raise NotImplementedError
+
+    async def exists(self, key):
+        raise NotImplementedError
+
+    async def delete(self, key):
+        raise NotImplementedError
+
+
+class AsyncRedisTransport(AsyncTransport):
+    """Transport on a Redis server through `redis.asyncio`, encoded like `RedisTransport`."""
+
+    def __init__(self, redis_config=None):
+        redis_config = redis_config or {}
+        self.r = get_async_client(decode_responses=True, **redis_config)
+        self.red_cl = get_async_client(**redis_config)
+
+    async def publish(self, channel, message):
+        await self.r.publish(channel, message)
+
+    async def push(self, key, *values):
+        if values:
+            await self.red_cl.rpush(key, *[encode_entry(value) for value in values])
+
+    async def push_many(self, items, ttl=None):
+        async with self.red_cl.pipeline(transaction=False) as pipe:
+            for key, value in items:
+                pipe.rpush(key, encode_entry(value))
+                if ttl is not None:
+                    pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def drain(self, key, chunk_size=None):
+        check_chunk_size(chunk_size)
+        chunks = []
+        while True:
+            async with self.red_cl.pipeline(transaction=True) as pipe:
+                if chunk_size is None:
+                    pipe.lrange(key, 0, -1)
+                    pipe.delete(key)
+                else:
+                    pipe.lrange(key, 0, chunk_size - 1)
+                    pipe.ltrim(key, chunk_size, -1)
+                data_list, _ = await pipe.execute()
+            if data_list:
+                chunks.append(data_list)
+            if chunk_size is None or len(data_list) < chunk_size:
+                return chunks
+
+    async def peek(self, key, start=0):
+        return await self.red_cl.lrange(key, start, -1)
+
+    def decode(self, entries):
+        return [decode_entry(item) for item in entries]
+
+    async def expire(self, key, ttl):
+        await self.red_cl.expire(key, ttl)
+
+    async def exists(self, key):
+        return bool(await self.r.exists(key))
+
+    async def delete(self, key):
+        await self.r.delete(key)
+
+    async def aclose(self):
+        """Closes the connections of the clients."""
+        await self.r.aclose()
+        await self.red_cl.aclose()
+
+
+class AsyncTransportAdapter(AsyncTransport):
+    """
+    Runs the operations of a synchronous `Transport` in worker threads.
+
+    The synchronous transport decodes its entries in the worker thread of
+    `drain` and `peek`, so `decode` has nothing left to do.
+    """
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def publish(self, channel, message):
+        await asyncio.to_thread(self.transport.publish, channel, message)
+
+    async def push(self, key, *values):
+        await asyncio.to_thread(self.transport.push, key, *values)
+
+    async def push_many(self, items, ttl=None):
+        await asyncio.to_thread(self.transport.push_many, list(items), ttl)
+
+    async def drain(self, key, chunk_size=None):
+        check_chunk_size(chunk_size)
+        return await asyncio.to_thread(lambda: list(self.transport.drain(key, chunk_size)))
+
+    async def peek(self, key, start=0):
+        return await asyncio.to_thread(self.transport.peek, key, start)
+
+    async def expire(self, key, ttl):
+        await asyncio.to_thread(self.transport.expire, key, ttl)
+
+    async def exists(self, key):
+        return await asyncio.to_thread(self.transport.exists, key)
+
+    async def delete(self, key):
+        await asyncio.to_thread(self.transport.delete, key)
+
+
+def make_async_transport(transport=None, redis_config=None):
+    """
+    Returns an asyncio transport from an `AsyncTransport`, a `Transport`,
+    "redis" (default, on `redis.asyncio`) or "memory".
+    """
+    if isinstance(transport, AsyncTransport):
+        return transport
+    if transport is None or transport == "redis":
+        return AsyncRedisTransport(redis_config)
+    if isinstance(transport, Transport):
+        return AsyncTransportAdapter(transport)
+    return AsyncTransportAdapter(make_transport(transport, redis_config))
@@ -0,0 +1,182 @@
+"""
+Binary wire format for batches of orders and transactions.
+
+Instead of one JSON document per order, an agent can push a whole batch of
+orders as a single binary entry, and the platform can publish transaction
+blocks the same way. An entry is::
+
+    b"EUNX" | version (1 byte) | kind (b"O" orders, b"T" transactions) | .npy
+
+where the payload is a NumPy structured array in the ``.npy`` format
+(no pickles): strings are UTF-8 bytes, quantities and prices float64 and
+the order type a bool. Order batches use the column names of
+`OrderManager` (``User`` ... ``type``), so they go straight into the
+columnar order book.
+
+The registration message announces the encodings accepted for orders
+(``"encodings"``) and the one used for results (``"encoding"``). This is an
+announcement, not a negotiation: every agent picks the encoding of each
+order entry it pushes, JSON and binary entries may be mixed in the same
+slot, and the results of a run all use the encoding of the `Simulation`.
+"""
+import io
+
+import numpy as np
+
+from EUnix.schema import ORDER_RECORD_KEYS
+
+
+MAGIC = b"EUNX"
+VERSION = 1
+ORDERS = b"O"
+TRANSACTIONS = b"T"
+ENCODINGS = ("npy", "json")
+
+# Order columns of a batch, with the keys of the JSON records sent by the agents
+ORDER_FIELDS = ORDER_RECORD_KEYS
+ORDER_NUMERIC = {'energy_qty': np.float64, 'energy_rate': np.float64, 'type': np.bool_}
+
+
+def is_binary(entry):
+    """Whether `entry` is a binary batch."""
+    return isinstance(entry, (bytes, bytearray, memoryview)) and bytes(entry[:4]) == MAGIC
+
+
+def _utf8(values):
+    """UTF-8 bytes array of `values` (missing values become empty strings)."""
+    import pandas as pd
+    values = pd.Series(values, copy=False)
+    values = values.astype(object).where(values.notna(), "").astype(str)
+    return np.char.encode(values.to_numpy(dtype=str), "utf-8")
+
+
+def _pack(kind, cols):
+    names = list(cols)
+    batch = np.empty(len(cols[names[0]]) if names else 0,
+                     dtype=[(name, cols[name].dtype) for name in names])
+    for name in names:
+        batch[name] = cols[name]
+    buffer = io.BytesIO()
+    buffer.write(MAGIC + bytes([VERSION]) + kind)
+    np.lib.format.write_array(buffer, batch, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def decode(entry):
+    """
+    Decodes a binary batch.
+
+    Returns
+    -------
+    kind : bytes
+        `ORDERS` or `TRANSACTIONS`.
+    batch : np.ndarray
+        Structured array with one field per column.
+    """
+    entry = bytes(entry)
+    if entry[:4] != MAGIC:
+        raise ValueError("Not a binary batch")
+    if entry[4] != VERSION:
+        raise ValueError(f"Unsupported binary batch version: {entry[4]}")
+    batch = np.lib.format.read_array(io.BytesIO(entry[6:]), allow_pickle=False)
+    return entry[5:6], batch
+
+
+def _text(values):
+    """str array of UTF-8 bytes `values`."""
+    try:
+        return values.astype(str)  # Fast path, ASCII only
+    except UnicodeDecodeError:
+        return np.char.decode(values, "utf-8")
+
+
+def columns(batch):
+    """Returns the columns of a decoded batch, strings decoded to str."""
+    return {
+        name: _text(batch[name]) if batch.dtype[name].kind == "S" else batch[name]
+        for name in batch.dtype.names
+    }
+
+
+def encode_orders(orders):
+    """
+    Encodes a batch of orders.
+
+    `orders` is a DataFrame or a dict of columns, with either the column
+    names of `OrderManager` or the keys of the JSON records (e.g.
+    ``"bid-offer-time"``, ``"Type"``).
+    """
+    packed = {}
+    for name, key in ORDER_FIELDS.items():
+        values = orders[name] if name in orders else orders[key]
+        if name in ORDER_NUMERIC:
+            packed[name] = np.asarray(values, dtype=ORDER_NUMERIC[name])
+        else:
+            packed[name] = _utf8(values)
+    return _pack(ORDERS, packed)
+
+
+def encode_transactions(trans_df):
+    """Encodes a block of transactions (numeric columns as float64, others as UTF-8)."""
+    import pandas as pd
+    packed = {}
+    for name in trans_df.columns:
+        values = trans_df[name]
+        if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+            packed[name] = values.to_numpy(dtype=np.bool_ if pd.api.types.is_bool_dtype(values) else float)
+        else:
+            packed[name] = _utf8(values)
+    return _pack(TRANSACTIONS, packed)
+
+
+def decode_transactions(entry):
+    """Decodes a block of transactions into a DataFrame."""
+    import pandas as pd
+    kind, batch = decode(entry)
+    if kind != TRANSACTIONS:
+        raise ValueError("Not a transaction batch")
+    return pd.DataFrame(columns(batch))
+
+
+def submitters(entries):
+    """Returns the distinct ``User_id`` of the orders in `entries` (records and batches)."""
+    users = set()
+    for entry in entries:
+        if is_binary(entry):
+            users.update(_text(decode(entry)[1]['User_id']).tolist())
+        else:
+            users.add(entry.get('User_id'))
+    return users
+
+
+def order_columns(entries):
+    """
+    Gathers the orders of a slot, given as JSON records and binary batches,
+    into the columns of `OrderManager.add_orders`.
+
+    Returns a dict of arrays, or None when there are no orders.
+    """
+    records = [entry for entry in entries if not is_binary(entry)]
+    parts = []
+    if records:
+        import pandas as pd
+        df = pd.DataFrame(records)
+        part = {name: df[key].to_numpy() for name, key in ORDER_FIELDS.items()}
+        part['type'] = part['type'] != False  # Only False is an offer
+        parts.append(part)
+    for entry in entries:
+        if is_binary(entry):
+            kind, batch = decode(entry)
+            if kind != ORDERS:
+                raise ValueError("Not an order batch")
+            parts.append(columns(batch))
+    parts = [part for part in parts if len(part['type'])]
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return parts[0]
+    return {
+        name: np.concatenate([np.asarray(part[name], dtype=object if name not in ORDER_NUMERIC else None)
+                              for part in parts])
+        for name in ORDER_FIELDS
+    }
@@ -0,0 +1,134 @@
+"""
+Shared Redis connection pools for the redisconnection package.
+
+Every client handed out by `get_client` draws its connections from a pool
+shared by all clients of the process that use the same settings, so many
+`Simulation` or `ProcessSlots` instances do not open their own sockets.
+
+The default endpoint is read from the environment (``EUNIX_REDIS_HOST``,
+``EUNIX_REDIS_PORT``, ``EUNIX_REDIS_DB``, ``EUNIX_REDIS_SOCKET``) and can be
+changed with `configure`. The ``redis`` package is only imported when
+the first client is requested.
+"""
+import os
+import threading
+
+
+_settings = {
+    'host': os.environ.get('EUNIX_REDIS_HOST', 'localhost'),
+    'port': int(os.environ.get('EUNIX_REDIS_PORT', 6379)),
+    'db': int(os.environ.get('EUNIX_REDIS_DB', 0)),
+    'unix_socket_path': os.environ.get('EUNIX_REDIS_SOCKET') or None,
+    'max_connections': None,
+    'socket_timeout': None,
+    'socket_connect_timeout': None,
+}
+_pools = {}
+_lock = threading.Lock()
+
+
+def configure(**settings):
+    """
+    Changes the default connection settings.
+
+    Parameters
+    ----------
+    host : str
+        Redis host name.
+    port : int
+        Redis TCP port.
+    db : int
+        Database number.
+    unix_socket_path : str or None
+        Path of a unix socket; when given, host and port are ignored.
+    max_connections : int or None
+        Maximum number of connections per pool (unbounded when None).
+    socket_timeout, socket_connect_timeout : float or None
+        Timeouts in seconds for commands and for connecting.
+    """
+    unknown = set(settings) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown Redis settings: {', '.join(sorted(unknown))}")
+    with _lock:
+        _settings.update(settings)
+
+
+def get_settings(**overrides):
+    """Returns the default settings updated with `overrides`."""
+    unknown = set(overrides) - set(_settings)
+    if unknown:
+        raise ValueError(f"Unknown Redis settings: {', '.join(sorted(unknown))}")
+    settings = dict(_settings)
+    settings.update(overrides)
+    return settings
+
+
+def get_pool(decode_responses=False, **overrides):
+    """
+    Returns the shared connection pool for the given settings.
+
+    Parameters
+    ----------
+    decode_responses : bool, default=False
+        Whether replies are decoded to str.
+    **overrides
+        Settings that differ from the defaults (see `configure`).
+    """
+    import redis
+    settings = get_settings(**overrides)
+    key = (decode_responses,) + tuple(sorted(settings.items()))
+    with _lock:
+        pool = _pools.get(key)
+        if pool is None:
+            kwargs = {
+                'db': settings['db'],
+                'max_connections': settings['max_connections'],
+                'socket_timeout': settings['socket_timeout'],
+                'socket_connect_timeout': settings['socket_connect_timeout'],
+                'decode_responses': decode_responses,
+            }
+            if settings['unix_socket_path']:
+                kwargs.pop('socket_connect_timeout')
+                pool = redis.ConnectionPool(
+                    connection_class=redis.UnixDomainSocketConnection,
+                    path=settings['unix_socket_path'], **kwargs)
+            else:
+                pool = redis.ConnectionPool(
+                    host=settings['host'], port=settings['port'], **kwargs)
+            _pools[key] = pool
+    return pool
+
+
+def get_client(decode_responses=False, **overrides):
+    """Returns a Redis client backed by the shared pool for the settings."""
+    import redis
+    return redis.Redis(connection_pool=get_pool(decode_responses, **overrides))
+
+
+def get_async_client(decode_responses=False, **overrides):
+    """
+    Returns a `redis.asyncio` client for the settings.
+
+    Asyncio connections are bound to the event loop that opened them, so
+    the client has its own pool and must be used from a single loop.
+    """
+    import redis.asyncio
+    settings = get_settings(**overrides)
+    kwargs = {
+        'db': settings['db'],
+        'max_connections': settings['max_connections'],
+        'socket_timeout': settings['socket_timeout'],
+        'decode_responses': decode_responses,
+    }
+    if settings['unix_socket_path']:
+        return redis.asyncio.Redis(unix_socket_path=settings['unix_socket_path'], **kwargs)
+    return redis.asyncio.Redis(host=settings['host'], port=settings['port'],
+                               socket_connect_timeout=settings['socket_connect_timeout'], **kwargs)
+
+
+def disconnect_all():
+    """Closes every pooled connection and forgets the pools."""
+    with _lock:
+        for pool in _pools.values():
+            pool.disconnect()
+        _pools.clear()
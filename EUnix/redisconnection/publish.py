@@ -1,29 +1,46 @@
-import redis
-import time
-import os
 import pandas as pd
 import uuid
-import json
-import csv
+
+from EUnix.clock import RealTimeClock
+from EUnix.redisconnection.codec import ENCODINGS, submitters
+from EUnix.redisconnection.transport import make_transport
 #print()
 
 
 class ProcessSlots:
 
-    def __init__(self, data, startSlot = None, steps = 96):
-        """TODO: to be defined."""
+    def __init__(self, data, startSlot = None, steps = 96, redis_config = None, clock = None, namespace = None, transport = None, encoding = "json"):
+        """TODO: to be defined.
+
+        `redis_config` holds connection settings (host, port, db, unix socket,
+        pool size, timeouts) overriding those of
+        `EUnix.redisconnection.connection.configure`. `clock` paces the slot
+        announcements (see `EUnix.clock`); a `RealTimeClock` by default.
+        With `namespace`, every key and channel is prefixed with
+        ``"<namespace>:"`` so that several simulations can share a server.
+        `transport` carries the messages (see
+        `EUnix.redisconnection.transport`): a `Transport`, ``"redis"``
+        (default) or ``"memory"`` to run without a server. The registration
+        message announces the encodings accepted for orders and `encoding`,
+        the one of the results (see `EUnix.redisconnection.codec`).
+        """
         self.data = data
         self.startSlot  = startSlot
         self.Nstep = steps
-        self.r = redis.Redis(host='localhost', port=6379, decode_responses=True)
-        self.red_cl = redis.StrictRedis(host='localhost', port=6379, db=0)
+        self.namespace = namespace
+        self.encoding = encoding
+        self.clock = RealTimeClock() if clock is None else clock
+        self.transport = make_transport(transport, redis_config)
+        self._submitters = {} #Slot list -> (entries counted, users), see count_submitters
         action = "Registration open"
         unique_id = str(uuid.uuid4())
         message = f"{action}:{unique_id}"
-        self.r.publish('registration_channel', message) 
+        self.transport.publish(self.key('registration_channel'), message)
         r_data = {
             "action": "Registration open",
             "platID": unique_id,
+            "encodings": list(ENCODINGS), #Accepted for orders
+            "encoding": self.encoding,    #Used for results
               }  
         self.send_to_redis("registraion", r_data)
         
@@ -32,6 +49,11 @@ class ProcessSlots:
        
 
 
+    def key(self, name):
+        """Returns the Redis key (or channel) `name` within the namespace."""
+        return f"{self.namespace}:{name}" if self.namespace else name
+
+
     def get_timeSlot(self):
     
         # Convert the Datetime column and startSlot to datetime objects
@@ -55,41 +77,95 @@ class ProcessSlots:
 
     def send_to_redis(self, inst, data):
         # Push to Redis
-        self.red_cl.rpush(inst, json.dumps(data))
+        self.transport.push(self.key(inst), data)
 
         # Set expiration (e.g., 1 hour = 3600 seconds)
-        self.red_cl.expire(inst, 300) 
+        self.transport.expire(self.key(inst), 300)
+
+
+
+
+
+    def send_many_to_redis(self, items, ttl=300):
+        """
+        Pushes several entries in a single pipelined round trip.
+
+        `items` is an iterable of ``(key, data)`` pairs. Each data is pushed
+        like in `send_to_redis`, and the expiration of every key (`ttl`
+        seconds) is set in the same batch.
+        """
+        self.transport.push_many(((self.key(inst), data) for inst, data in items), ttl)
+
+
+    def submit_orders(self, slot_time, records):
+        """
+        Pushes order records to the list of a slot, as agents do.
+
+        Used to replay recorded or synthetic orders without live agents.
+        """
+        if records:
+            self.transport.push(self.key(slot_time), *records)
 
 
 
 
 
     def publish_slot(self, slot_time, step, msg="end"):
-        time.sleep(0.5)
+        self.clock.before_publish()
         if step == self.Nstep:
-            self.r.publish('slot_channel', "end")
+            self.transport.publish(self.key('slot_channel'), "end")
             print("Main Script: Sending termination signal")
         else:
-            self.r.publish('slot_channel', msg+" Slot "+ slot_time)  # Publish step
+            self.transport.publish(self.key('slot_channel'), msg+" Slot "+ slot_time)  # Publish step
             print(f"Market slot {slot_time} {msg}")
             #time.sleep(1)  # Simulate delay or processing time
             
   
   
-    def read_from_redis(self, key):
-        # Retrieve all the data from the "time_series_data" list (or set a range)
-        data_list = self.red_cl.lrange(key, 0, -1)  # 0 to -1 to get all elements
-        if not data_list:
+    def read_from_redis(self, key, chunk_size=None):
+        """
+        Takes and removes every entry of the list `key`, decoded from JSON.
+
+        The list is drained atomically (on Redis, LRANGE and DEL run in a
+        single MULTI/EXEC round trip), so entries pushed meanwhile are
+        neither lost nor read twice. With `chunk_size`, the list is drained
+        in chunks of that many entries, each one taken atomically.
+        """
+        data_dict = []
+        for chunk in self.iter_from_redis(key, chunk_size):
+            data_dict.extend(chunk)
+        if not data_dict:
             print("No data found in the Redis list.")
             return
-        # Process each entry in the list
-        data_dict = [json.loads(item.decode('utf-8')) for item in data_list]
-        #df = pd.DataFrame(parsed_data)
-        for item in data_list:
-            self.red_cl.lrem(key, 1, item) #Delete read data
-            
-        return data_dict        
-                
+        return data_dict
+
+
+    def iter_from_redis(self, key, chunk_size=None):
+        """
+        Drains the list `key` like `read_from_redis`, yielding decoded chunks.
+        """
+        key = self.key(key)
+        chunks = self.transport.drain(key, chunk_size)
+        self._submitters.pop(key, None)
+        return chunks
+
+
+    def count_submitters(self, key):
+        """
+        Returns the number of distinct users with orders in the list `key`,
+        without removing them.
+
+        The users are kept from one call to the next and only the entries
+        pushed since the previous call are read, so polling a gate costs
+        the new orders only. The count restarts once the list is drained or
+        deleted.
+        """
+        key = self.key(key)
+        counted, users = self._submitters.get(key, (0, set()))
+        entries = self.transport.peek(key, counted)
+        users |= submitters(entries)
+        self._submitters[key] = (counted + len(entries), users)
+        return len(users)
 
 
     def delete_from_redis(self, key):
@@ -100,8 +176,10 @@ class ProcessSlots:
         # Connect to Redis
         
         # Check if the key exists
-        if self.r.exists(key):
-            self.r.delete(key)
+        key = self.key(key)
+        self._submitters.pop(key, None)
+        if self.transport.exists(key):
+            self.transport.delete(key)
             print(f"Key '{key}' deleted from Redis.")
             return True
         else:
@@ -109,28 +187,6 @@ class ProcessSlots:
             return False
 
 
-    def json_to_csv(self, json_data, output_file):
-        try:
-            # Parse the input JSON string
-            parsed_data = []
-            
-            for item in json_data:
-                # Convert the string item to a list of dictionaries
-                parsed_item = json.loads(item)
-                # Append the parsed item to the main list
-                parsed_data.extend(parsed_item)
-            
-            # Create a DataFrame from the parsed data
-            df_r = pd.DataFrame(parsed_data)
-            
-            # Save the DataFrame to a CSV file
-            df_r.to_csv(output_file, index=False)
-            print(f"Result data successfully saved to {output_file}")
-        
-        except Exception as e:
-            print(f"Error while converting JSON to CSV: {e}")
-
-
 
 
 
@@ -1,23 +1,21 @@
-import redis
-import json
+from EUnix.redisconnection.transport import make_transport
 
-# Connect to Redis
-redis_client = redis.StrictRedis(host='localhost', port=6379, db=0)
 
-def read_from_redis():
-    # Retrieve all the data from the "time_series_data" list (or set a range)
-    data_list = redis_client.lrange("time_series_data", 0, -1)  # 0 to -1 to get all elements
+def read_from_redis(transport=None, redis_config=None):
+    # Connect through the transport ("redis" by default, see `make_transport`)
+    transport = make_transport(transport, redis_config)
+
+    # Retrieve all the data from the "time_series_data" list, decoded
+    data_list = transport.peek("time_series_data")
 
     if not data_list:
         print("No data found in the Redis list.")
         return
 
     # Process each entry in the list
-    for index, data in enumerate(data_list):
-        # Convert each JSON string back to a Python dictionary
-        data_dict = json.loads(data.decode('utf-8'))
+    for index, data_dict in enumerate(data_list):
         print(f"Data {index + 1}: {data_dict}")
 
 if __name__ == "__main__":
     # Read data from Redis
-    read_from_redis()
\ No newline at end of file
+    read_from_redis()
@@ -0,0 +1,244 @@
+"""
+Message transports used by the platform to talk to agents.
+
+A transport offers the few broker operations the platform needs: publish
+on a channel, push to and drain lists, expire and delete keys. Values are
+plain Python objects; `RedisTransport` stores them JSON encoded on a Redis
+server while `MemoryTransport` keeps them as they are in the process, for
+offline back-tests and benchmarks without a server. Binary batches (see
+`EUnix.redisconnection.codec`) are stored as they are by both.
+"""
+import json
+import threading
+import time
+from collections import defaultdict
+from numbers import Integral
+
+from EUnix.redisconnection.codec import MAGIC
+from EUnix.redisconnection.connection import get_client
+
+
+def encode_entry(value):
+    """Entry stored on Redis for `value`: binary batches as they are, JSON otherwise.
+
+    Bytes that are not a batch of `EUnix.redisconnection.codec` (``EUNX``
+    header) raise a ValueError, as `decode_entry` could not tell them from
+    JSON.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        if value[:4] != MAGIC:
+            raise ValueError("Binary entries must be EUNX batches (see EUnix.redisconnection.codec)")
+        return bytes(value)
+    return json.dumps(value)
+
+
+def check_chunk_size(chunk_size):
+    """Raises a ValueError unless `chunk_size` is None or a positive integer."""
+    if chunk_size is not None and not (isinstance(chunk_size, Integral) and chunk_size >= 1):
+        raise ValueError(f"chunk_size must be None or at least 1, not {chunk_size!r}")
+
+
+def decode_entry(item):
+    """Inverse of `encode_entry`."""
+    if item[:4] == MAGIC:
+        return item
+    return json.loads(item)
+
+
+class Transport():
+    """Interface of the message transports."""
+
+    def publish(self, channel, message):
+        """Publishes `message` on `channel`."""
+        raise NotImplementedError
+
+    def push(self, key, *values):
+        """Appends `values` to the list `key`."""
+        raise NotImplementedError
+
+    def push_many(self, items, ttl=None):
+        """Appends every ``(key, value)`` of `items` and sets the `ttl` of the keys."""
+        raise NotImplementedError
+
+    def drain(self, key, chunk_size=None):
+        """Atomically takes and removes the entries of the list `key`.
+
+        Yields lists of entries, `chunk_size` entries at most (all at once
+        when None). A `chunk_size` below 1 raises a ValueError.
+        """
+        raise NotImplementedError
+
+    def peek(self, key, start=0):
+        """Returns the entries of the list `key` from position `start`, without removing them."""
+        raise NotImplementedError
+
+    def expire(self, key, ttl):
+        """Removes `key` after `ttl` seconds."""
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+
+class RedisTransport(Transport):
+    """Transport on a Redis server, through the shared connection pools.
+
+    Parameters
+    ----------
+    redis_config : dict, optional
+        Connection settings overriding those of
+        `EUnix.redisconnection.connection.configure`.
+    """
+
+    def __init__(self, redis_config=None):
+        redis_config = redis_config or {}
+        self.r = get_client(decode_responses=True, **redis_config)
+        self.red_cl = get_client(**redis_config)
+
+    def publish(self, channel, message):
+        self.r.publish(channel, message)
+
+    def push(self, key, *values):
+        if values:
+            self.red_cl.rpush(key, *[encode_entry(value) for value in values])
+
+    def push_many(self, items, ttl=None):
+        pipe = self.red_cl.pipeline(transaction=False)
+        for key, value in items:
+            pipe.rpush(key, encode_entry(value))
+            if ttl is not None:
+                pipe.expire(key, ttl)
+        pipe.execute()
+
+    def drain(self, key, chunk_size=None):
+        check_chunk_size(chunk_size)
+        return self._drain(key, chunk_size)
+
+    def _drain(self, key, chunk_size):
+        while True:
+            pipe = self.red_cl.pipeline(transaction=True)
+            if chunk_size is None:
+                pipe.lrange(key, 0, -1)
+                pipe.delete(key)
+            else:
+                pipe.lrange(key, 0, chunk_size - 1)
+                pipe.ltrim(key, chunk_size, -1)
+            data_list, _ = pipe.execute()
+            if data_list:
+                yield [decode_entry(item) for item in data_list]
+            if chunk_size is None or len(data_list) < chunk_size:
+                return
+
+    def peek(self, key, start=0):
+        return [decode_entry(item) for item in self.red_cl.lrange(key, start, -1)]
+
+    def expire(self, key, ttl):
+        self.red_cl.expire(key, ttl)
+
+    def exists(self, key):
+        return bool(self.r.exists(key))
+
+    def delete(self, key):
+        self.r.delete(key)
+
+
+class MemoryTransport(Transport):
+    """In-process transport: lists and channels live in dictionaries.
+
+    Values are stored without any serialisation. Expired keys are dropped
+    when next accessed. Messages published on a channel are passed to the
+    callbacks registered with `subscribe` and kept in `messages`. All
+    operations are thread-safe.
+    """
+
+    def __init__(self):
+        self.lists = defaultdict(list)
+        self.deadlines = {}
+        self.messages = defaultdict(list)
+        self.subscribers = defaultdict(list)
+        self._lock = threading.RLock()
+
+    def _expire_stale(self, key):
+        deadline = self.deadlines.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self.lists.pop(key, None)
+            del self.deadlines[key]
+
+    def subscribe(self, channel, callback):
+        """Calls `callback(message)` for every message published on `channel`."""
+        with self._lock:
+            self.subscribers[channel].append(callback)
+
+    def publish(self, channel, message):
+        with self._lock:
+            self.messages[channel].append(message)
+            callbacks = list(self.subscribers[channel])
+        for callback in callbacks:
+            callback(message)
+
+    def push(self, key, *values):
+        with self._lock:
+            self._expire_stale(key)
+            self.lists[key].extend(values)
+
+    def push_many(self, items, ttl=None):
+        with self._lock:
+            for key, value in items:
+                self.push(key, value)
+                if ttl is not None:
+                    self.expire(key, ttl)
+
+    def drain(self, key, chunk_size=None):
+        check_chunk_size(chunk_size)
+        return self._drain(key, chunk_size)
+
+    def _drain(self, key, chunk_size):
+        while True:
+            with self._lock:
+                self._expire_stale(key)
+                entries = self.lists.get(key, [])
+                n = len(entries) if chunk_size is None else chunk_size
+                chunk, rest = entries[:n], entries[n:]
+                if rest:
+                    self.lists[key] = rest
+                else:
+                    self.lists.pop(key, None)
+                    self.deadlines.pop(key, None)
+            if chunk:
+                yield chunk
+            if chunk_size is None or len(chunk) < chunk_size:
+                return
+
+    def peek(self, key, start=0):
+        with self._lock:
+            self._expire_stale(key)
+            return self.lists.get(key, [])[start:]
+
+    def expire(self, key, ttl):
+        with self._lock:
+            if key in self.lists:
+                self.deadlines[key] = time.monotonic() + ttl
+
+    def exists(self, key):
+        with self._lock:
+            self._expire_stale(key)
+            return key in self.lists
+
+    def delete(self, key):
+        with self._lock:
+            self.lists.pop(key, None)
+            self.deadlines.pop(key, None)
+
+
+def make_transport(transport=None, redis_config=None):
+    """Returns a transport from a `Transport`, "redis" (default) or "memory"."""
+    if isinstance(transport, Transport):
+        return transport
+    if transport is None or transport == "redis":
+        return RedisTransport(redis_config)
+    if transport == "memory":
+        return MemoryTransport()
+    raise ValueError(f"Unknown transport: {transport}")
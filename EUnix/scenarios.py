@@ -0,0 +1,181 @@
+"""
+Batch runner for many simulations in parallel.
+
+Every scenario is a full `Simulation` on virtual time, with its own key
+namespace and a deterministic seed (its own, or one derived from the seed
+of the sweep and its index), run in a worker process. Orders are
+replayed from an order source instead of live agents, by default through
+an in-memory transport so that no Redis server is needed, and the
+transactions of all the runs are gathered in a single DataFrame.
+"""
+import itertools
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from EUnix.clock import VirtualClock
+from EUnix.market import child_seed
+from EUnix.simulation import Simulation, SimulationConfig
+from EUnix.transactions.sink import MemoryResultSink
+
+
+class Scenario():
+    """
+    Settings of one simulation run.
+
+    Parameters
+    ----------
+    name : str
+        Identifier of the scenario, reported in the results.
+    mechanism : str, default="p2p"
+        Market mechanism (key of `EUnix.market.MECHANISM`).
+    grid_fee : float or GridFee, default=0
+        Grid fee of the run.
+    seed : int, optional
+        Seed of the mechanism's random state; `run_scenarios` derives one
+        from the seed of the sweep when None.
+    start_slot : str, optional
+        First slot, as in `Simulation` (first slot of the data by default).
+    steps : int, default=96
+        Number of slots simulated.
+    **options
+        Further keyword arguments of `Simulation`.
+    """
+
+    def __init__(self, name, mechanism="p2p", grid_fee=0, seed=None, start_slot=None, steps=96, **options):
+        self.name = name
+        self.mechanism = mechanism
+        self.grid_fee = grid_fee
+        self.seed = seed
+        self.start_slot = start_slot
+        self.steps = steps
+        self.options = options
+
+    def __repr__(self):
+        return f"<Scenario {self.name}: {self.mechanism}, fee {self.grid_fee}, seed {self.seed}>"
+
+
+def scenario_grid(mechanisms=("p2p",), grid_fees=(0,), seeds=(None,), start_slots=(None,), steps=96, **options):
+    """Returns one `Scenario` per combination of the given settings."""
+    return [
+        Scenario(f"{mechanism}-fee{fee}-seed{seed}-{start}", mechanism, fee, seed, start, steps, **options)
+        for mechanism, fee, seed, start in itertools.product(mechanisms, grid_fees, seeds, start_slots)
+    ]
+
+
+class FrameOrderSource():
+    """
+    Order source replaying the records of a DataFrame.
+
+    The frame holds one order per row, in the format sent by the agents;
+    the orders of a slot are the rows whose `slot_column` is the same time
+    as the slot. Times are compared as ISO strings (`slot_key`), so
+    ``"2014-12-01T00:15"``, ``"2014-12-01 00:15:00"`` and timestamps all
+    select the slot ``"2014-12-01T00:15:00"`` of `Simulation`.
+    """
+
+    def __init__(self, orders, slot_column="delivery-time"):
+        codes, times = pd.factorize(orders[slot_column])
+        keys = np.array([slot_key(time) for time in times] + [None], dtype=object)[codes]
+        self.slots = {
+            slot: group.to_dict("records")
+            for slot, group in orders.groupby(keys, sort=False)
+        }
+
+    def __call__(self, slot):
+        return self.slots.get(slot_key(slot), [])
+
+
+def scenario_seed(seed, index):
+    """Seed of the scenario at `index` of a sweep seeded with `seed` (see `child_seed`)."""
+    return int(child_seed(seed, index).generate_state(1)[0])
+
+
+def slot_key(time):
+    """ISO representation of a slot time, as used by `Simulation`."""
+    return pd.Timestamp(time).isoformat()
+
+
+def run_scenario(data, scenario, order_source, redis_config=None, namespace=None, transport="memory",
+                 seed=None):
+    """
+    Runs a single scenario and returns its transactions.
+
+    The run uses a `VirtualClock`, the `transport` of `Simulation` and the
+    key namespace `namespace` (derived from the scenario name by default).
+    `seed` is used when the scenario has none. The returned frame has one
+    row per transaction, with the slot and the scenario settings, seed
+    included, as extra columns.
+    """
+    if scenario.seed is not None:
+        seed = scenario.seed
+    start_slot = scenario.start_slot
+    if start_slot is None:
+        start_slot = pd.to_datetime(data["Datetime"].iloc[0]).strftime("%Y-%m-%dT%H:%M")
+    options = dict(scenario.options)
+    config = options.pop("config", None) or SimulationConfig()
+    options.setdefault("clock", config.clock or VirtualClock())
+    sink = MemoryResultSink()
+
+    simu = Simulation(
+        data.copy(), start_slot, scenario.steps, scenario.mechanism, scenario.grid_fee,
+        redis_config=redis_config, namespace=namespace or f"scenario:{scenario.name}",
+        seed=seed, order_source=order_source, sink=sink,
+        config=config, transport=transport, **options)
+    prev_slot, index = simu.simulate()
+    simu.closeSimulation(prev_slot, index)
+
+    results = sink.get_df()
+    if results.empty:
+        return results
+    return results.assign(
+        Scenario=scenario.name, Mechanism=scenario.mechanism,
+        Grid_fee=str(scenario.grid_fee), Seed=seed)
+
+
+def run_scenarios(data, scenarios, order_source, max_workers=None, redis_config=None, transport="memory",
+                  seed=0):
+    """
+    Runs many scenarios in parallel worker processes.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Time slots, as expected by `Simulation`.
+    scenarios : list of Scenario
+        Runs to perform (see `scenario_grid`).
+    order_source : callable
+        Returns the order records of a slot; it must be picklable (e.g. a
+        `FrameOrderSource` or a module-level function).
+    max_workers : int, optional
+        Number of worker processes (all cores by default).
+    redis_config : dict, optional
+        Redis connection settings of the runs.
+    transport : str, default="memory"
+        Transport of the runs: ``"memory"`` (one in-process stand-in per
+        run) or ``"redis"`` to go through a Redis server.
+    seed : int or np.random.SeedSequence, default=0
+        Seed of the sweep: a scenario without seed runs with
+        ``scenario_seed(seed, i)``, `i` being its index in `scenarios`, so
+        the sweep is reproducible. The seed of every run is reported in the
+        ``Seed`` column.
+
+    Returns
+    -------
+    pd.DataFrame
+        Transactions of all the runs, in the order of `scenarios`.
+    """
+    sweep = uuid.uuid4().hex[:8]
+    with ProcessPoolExecutor(max_workers) as pool:
+        futures = [
+            pool.submit(run_scenario, data, scenario, order_source, redis_config,
+                        f"sweep-{sweep}:{i}:{scenario.name}", transport, scenario_seed(seed, i))
+            for i, scenario in enumerate(scenarios)
+        ]
+        results = [future.result() for future in futures]
+    results = [df for df in results if not df.empty]
+    if not results:
+        return pd.DataFrame()
+    return pd.concat(results, ignore_index=True)
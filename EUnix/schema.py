@@ -0,0 +1,49 @@
+"""
+Column names of the orders and transactions exchanged with the platform.
+
+Plain Python only (no numpy or pandas), so that agents and worker
+processes can build and check order records without loading the data
+stack.
+"""
+
+# Columns of `EUnix.auctions.orders.OrderManager`
+ORDER_COLUMNS = (
+    'User',
+    'User_id',
+    'Unit_area',
+    'Order_id',
+    'energy_qty',
+    'energy_rate',
+    'bid_offer_time',
+    'delivery_time',
+    'type',
+    'attributes',
+    'requirements',
+    'power[kW]',
+    'area',
+    'direction',
+)
+
+# Order columns sent by the agents, with the keys of their JSON records
+ORDER_RECORD_KEYS = {
+    'User': 'User',
+    'User_id': 'User_id',
+    'Unit_area': 'Unit_area',
+    'Order_id': 'Order_id',
+    'energy_qty': 'energy_qty',
+    'energy_rate': 'energy_rate',
+    'bid_offer_time': 'bid-offer-time',
+    'delivery_time': 'delivery-time',
+    'type': 'Type',
+}
+
+# Columns of `EUnix.transactions.transactions.TransactionManager`
+TRANSACTION_COLUMNS = (
+    "Trans_id", "Buyer", "Buyer_id", "Unit_area", "Bid_id", "Bid_qty",
+    "Bid_rate", "Bid_time", "Seller", "Seller_id", "Offer_id", "Offer_qty",
+    "Offer_rate", "Offer_time", "Clearing_rate", "Matched_qty",
+    "Delivery_time", "Trans_type"
+)
+
+# Numeric transaction columns (blank on the records of the other side)
+TRANSACTION_NUMERIC = ('Matched_qty', 'Clearing_rate', 'Bid_rate', 'Offer_rate', 'Bid_qty', 'Offer_qty')
@@ -1,103 +1,323 @@
-import time
+import contextlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import EUnix as mp
+from EUnix.clock import RealTimeClock
+from EUnix.metrics import SlotMetrics
+from EUnix.pipeline import SlotPipeline
+from EUnix.redisconnection import codec
+from EUnix.tariffs import GridFee
 from EUnix.redisconnection.publish import ProcessSlots as pps
 from EUnix.transactions import stats
-import pandas as pd
+from EUnix.transactions.sink import make_sink
+
+
+class SimulationConfig():
+    """
+    How a `Simulation` talks to the agents and reports its slots.
+
+    Parameters
+    ----------
+    clock : Clock, optional
+        Decides when gates close: a `RealTimeClock` (default) or a
+        `VirtualClock` for as-fast-as-possible runs (see `EUnix.clock`).
+    transport : str or Transport, optional
+        Carries the messages with the agents: ``"redis"`` (default),
+        ``"memory"`` for an in-process stand-in without a server, or any
+        `EUnix.redisconnection.transport.Transport`.
+    encoding : {"json", "npy"}, default="json"
+        Encoding of the published transactions. Agents may push orders as
+        JSON records or binary batches either way (see
+        `EUnix.redisconnection.codec`).
+    sink : ResultSink, optional
+        Receives the transactions of every slot as soon as it is cleared
+        (see `EUnix.transactions.sink`). By default a CSV sink on
+        `output_file` (a Parquet sink for ``.parquet`` files).
+    output_file : str or None, default="output.csv"
+        File of the default sink; no output when None.
+    metrics : MetricsSink or list of MetricsSink, optional
+        Receives the timings and counts of the stages of every slot (see
+        `EUnix.metrics`).
+    profiler : SlotProfiler, optional
+        Profiles selected or slow slots (see `EUnix.profiling`) and writes
+        its reports next to the results.
+    """
+
+    def __init__(self, clock = None, transport = None, encoding = "json", sink = None,
+                 output_file = "output.csv", metrics = None, profiler = None):
+        if encoding not in codec.ENCODINGS:
+            raise ValueError(f"Unknown encoding: {encoding}")
+        self.clock = clock
+        self.transport = transport
+        self.encoding = encoding
+        self.sink = sink
+        self.output_file = output_file
+        self.metrics = metrics
+        self.profiler = profiler
+
+    def replace(self, **changes):
+        """Returns a copy of the settings with `changes`."""
+        unknown = set(changes) - set(vars(self))
+        if unknown:
+            raise TypeError(f"Unknown simulation settings: {', '.join(sorted(unknown))}")
+        return type(self)(**{**vars(self), **changes})
 
 
 class Simulation():
- 
-    def __init__(self, data, startSlot = None, steps = 96, mmc = "p2p", grid_fee = 0):
-        """TODO: to be defined."""
-        self.pub_ins = pps(data,startSlot, steps)
+
+    slots_class = pps  # Publishes the slots and talks to the agents
+
+    def __init__(self, data, startSlot = None, steps = 96, mmc = "p2p", grid_fee = 0, redis_config = None,
+                 partition = None, workers = None, namespace = None, seed = None,
+                 mechanism_kwargs = None, order_source = None, config = None, **settings):
+        """
+        Market simulation over consecutive time slots.
+
+        Every slot opens a gate during which agents (or `order_source`)
+        submit orders. Once it closes, its orders are cleared with the
+        mechanism `mmc`, and the transactions and statistics are written to
+        the sink and published, while the next gate is already open.
+
+        Parameters
+        ----------
+        data : pd.DataFrame
+            Time slots, one per row, in a ``Datetime`` column
+            (``%Y-%m-%dT%H:%M``).
+        startSlot : str, optional
+            First slot simulated.
+        steps : int, default=96
+            Number of slots simulated.
+        mmc : str, default="p2p"
+            Market mechanism (key of `EUnix.market.MECHANISM`). Every
+            mechanism clears the orders of a slot as one batch once its
+            gate has closed, "continuous" included: it replays them by
+            ``bid_offer_time`` on limit order books built for that slot
+            and dropped afterwards. Orders are not matched while the gate
+            is open; use `Market.submit_order` for that.
+        grid_fee : float or GridFee, default=0
+            Flat fee or `EUnix.tariffs.GridFee` with per-area or time-of-use
+            fees.
+        redis_config : dict, optional
+            Redis connection settings (see `ProcessSlots`).
+        partition : str or callable, optional
+            Clears every slot as independent markets (e.g. ``"Unit_area"``,
+            see `Market.run`) on a pool of `workers` processes kept for the
+            whole simulation.
+        workers : int, optional
+            Number of processes of the partition pool.
+        namespace : str, optional
+            Prefix of every Redis key and channel of the run.
+        seed : int, optional
+            With the "p2p" mechanism, makes the pairs drawn reproducible.
+            Every slot, and every partition of a slot, draws from its own
+            seed derived from `seed` and the slot (see `Market.run`).
+        mechanism_kwargs : dict, optional
+            Keyword arguments of the mechanism.
+        order_source : callable, optional
+            Returns the order records of a slot, replayed into the slot
+            right after its gate opens.
+        config : SimulationConfig, optional
+            Clock, transport, encoding, result sink, metrics and profiler.
+        **settings
+            Settings of `SimulationConfig`, overriding those of `config`.
+
+        Statistics accumulated over all cleared slots are kept in `stats`
+        (see `EUnix.transactions.stats.StreamingStats`).
+        """
+        config = SimulationConfig(**settings) if config is None else config.replace(**settings)
+        self.config = config
+        self.clock = RealTimeClock() if config.clock is None else config.clock
+        self.encoding = config.encoding
+        self.pub_ins = self.slots_class(data,startSlot, steps, redis_config, self.clock, namespace, config.transport, self.encoding)
         self.simu_slots=self.pub_ins.get_timeSlot()
         self.mmc = mmc
-        self.grid_fee = grid_fee
+        self.grid_fee = GridFee.coerce(grid_fee)
+        self.stats = stats.StreamingStats()
+        self.partition = partition
+        self.workers = workers
+        self.executor = None
+        self.mechanism_kwargs = dict(mechanism_kwargs or {})
+        self.seed = seed if mmc == "p2p" and "r" not in self.mechanism_kwargs else None
+        self.order_source = order_source
+        sink = config.sink
+        if sink is None and config.output_file is not None:
+            sink = make_sink(config.output_file)
+        self.sink = sink
+        metrics = config.metrics
+        self.metrics = metrics if isinstance(metrics, SlotMetrics) else SlotMetrics(metrics)
+        self.profiler = config.profiler
+        if self.profiler is not None and self.profiler.directory is None:
+            self.profiler.directory = os.path.dirname(getattr(sink, "path", None) or config.output_file or "") or "."
+        self.pipeline = None
 
 
     def mach_function(self, prev_step):
-        
-        bid_offer_data = self.pub_ins.read_from_redis(prev_step) #Read market bids and offers data time
-        
-        if bid_offer_data is None:
+        """Clears the slot `prev_step`: ingest, clear, post-process and publish"""
+        orders = self.ingest(prev_step) #Read market bids and offers data time
+        if orders is None:
             print(f"No Bid or Offer data received for slot {prev_step}")
-            return  
-
-        #print(bid_offer_data)
-        mar= mp.Market()
-
-        for record in bid_offer_data:
-                # Adjust price for offers only
-            if record['Type'] is False:  # Offer
-                adjusted_rate = record['energy_rate'] + self.grid_fee
-            else:  # Bid
-                adjusted_rate = record['energy_rate']
-            mar.accept_order(
-                record["User"],           # User
-                record['User_id'],        # User_id 
-                record['Unit_area'],      # User_area
-                record['Order_id'],       # Order_id
-                record['energy_qty'],     # energy_qty
-                adjusted_rate,    # energy_rate
-                record['bid-offer-time'], # bid-offer-time
-                record['delivery-time'],  # delivery-time
-                record['Type']            # Type
-        )
-            
-        #orders = mar.get_oders()
-        #print(orders)
-        transactions, extras = mar.run(self.mmc) #Match bids and offers time
-        trans_df = transactions.get_df()
-        if trans_df.empty:
-            print("The results is empty.")
         else:
-            #Update grid fees
-            trans_df["User Rate"] = trans_df.apply(lambda row: row["Clearing_rate"] 
-            if row["Trans_type"] == "Buying" else row["Clearing_rate"] - self.grid_fee,
-            axis=1)
-            trans_df["Offer_rate"] = pd.to_numeric(trans_df["Offer_rate"], errors="coerce")
-            trans_df["Offer_rate"] = trans_df["Offer_rate"].apply(lambda x: x - self.grid_fee if pd.notnull(x) else x)
-            
-            trans_stat = stats.compute_statis(trans_df)
-            print(trans_stat)#Calculate and publish statistics
-            json_data_res = trans_df.to_json(orient='records', indent=4)
-            for unit_area, group_df in trans_df.groupby("Unit_area"):
-                result_json = group_df.to_json(orient='records')
-                key = f"market_result:{unit_area}:{prev_step}"
-                self.pub_ins.send_to_redis(key, result_json)
-                
-            self.pub_ins.send_to_redis("simulation result", json_data_res)
-            self.pub_ins.send_to_redis(f"result statistics:{prev_step}", trans_stat)            
-            print(f"The result of {prev_step} is stored in the exchange")
+            trans_df = self.clear(orders, prev_step) #Match bids and offers time
+            if trans_df.empty:
+                print("The results is empty.")
+            else:
+                trans_stat = self.post(prev_step, trans_df)
+                self.publish(prev_step, trans_df, trans_stat)
+        self.finish_slot(prev_step)
         return
 
 
 
-    def simulate(self):
-        for index, row in self.simu_slots.iterrows():
-            slot = (row['Datetime']).isoformat()
-            self.pub_ins.publish_slot(slot, index, "Begin") #start new  market slot
-            if index ==0:
-                prev_slot = slot
-                continue
+    def profiled(self, slot, stage):
+        """Context manager profiling `stage` of `slot` with the `profiler`, if any"""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.stage(slot, stage)
+
+
+
+    def finish_slot(self, slot):
+        """Ends the measures of a published slot"""
+        self.metrics.finish(slot)
+        if self.profiler is not None:
+            self.profiler.finish(slot)
+
+
+
+    def ingest(self, slot):
+        """Takes the orders submitted for `slot`, as columns (None when there are none)"""
+        with self.profiled(slot, "ingest"):
+            with self.metrics.stage(slot, "read"):
+                bid_offer_data = self.pub_ins.read_from_redis(slot)
+            if bid_offer_data is None:
+                return None
+            with self.metrics.stage(slot, "decode"):
+                orders = codec.order_columns(bid_offer_data)
+            if orders is not None:
+                self.metrics.count(slot, "orders", len(orders['type']))
+        return orders
 
-            self.mach_function(prev_slot) #Match previous slot
-            self.pub_ins.publish_slot(prev_slot, index, "Results") #Market  slot ends and results published
 
 
+    def clear(self, orders, slot=None):
+        """Matches the `orders` of `slot` (columns of `ingest`) and returns the transactions"""
+        with self.profiled(slot, "clear"):
+            with self.metrics.stage(slot, "accept"):
+                mar= mp.Market(fees=self.grid_fee) #Grid fees are applied by the market
+                mar.accept_orders(**orders) #Whole batch into the columnar order book
+
+            #orders = mar.get_oders()
+            #print(orders)
+            if self.partition is not None and self.executor is None:
+                self.executor = ProcessPoolExecutor(self.workers)
+            with self.metrics.stage(slot, "match"):
+                seed = None if self.seed is None else mp.child_seed(self.seed, slot) #Own stream per slot
+                mar.run(self.mmc, partition=self.partition, executor=self.executor, seed=seed, **self.mechanism_kwargs)
+            with self.metrics.stage(slot, "fees"):
+                trans_df = mar.get_results() #Transactions with grid fees removed for sellers
+                if not trans_df.empty:
+                    # Numeric columns as floats (blank entries become null), parsed
+                    # once for the statistics, the sink and the publication
+                    trans_df = stats.coerce_numeric(trans_df)
+            self.metrics.count(slot, "transactions", len(trans_df))
+        return trans_df
+
+
+
+    def post(self, slot, trans_df):
+        """Computes the statistics of a cleared slot and writes its results to the sink
+
+        `trans_df` comes from `clear`, with numeric columns already parsed.
+        """
+        with self.profiled(slot, "post"):
+            with self.metrics.stage(slot, "stats"):
+                trans_stat = stats.compute_statis(trans_df)
+                self.stats.update(trans_df, slot) #Statistics over the whole run
+            if self.sink is not None:
+                with self.metrics.stage(slot, "sink"):
+                    self.sink.write(trans_df, slot) #Results kept as soon as the slot is cleared
+            print(trans_stat)#Calculate and publish statistics
+        return trans_stat
+
+
+
+    def result_batch(self, slot, trans_df, trans_stat):
+        """Entries published for a cleared slot, as (key, data) pairs"""
+        if self.encoding == "npy":
+            # One binary block per area; statistics stay JSON
+            batch = [
+                (f"market_result:{unit_area}:{slot}", codec.encode_transactions(trans_df.iloc[rows]))
+                for unit_area, rows in trans_df.groupby("Unit_area").indices.items()
+            ]
+            batch.append((f"result statistics:{slot}", trans_stat))
+            return batch
+
+        # Serialise the frame once, one record per line, and slice it per area
+        records = trans_df.to_json(orient='records', lines=True).splitlines()
+        batch = [
+            (f"market_result:{unit_area}:{slot}", "[" + ",".join(records[i] for i in rows) + "]")
+            for unit_area, rows in trans_df.groupby("Unit_area").indices.items()
+        ]
+        batch.append((f"result statistics:{slot}", trans_stat))
+        return batch
+
+
+
+    def publish(self, slot, trans_df, trans_stat):
+        """Publishes the results of a cleared slot"""
+        with self.profiled(slot, "publish"):
+            with self.metrics.stage(slot, "publish"):
+                batch = self.result_batch(slot, trans_df, trans_stat)
+                self.pub_ins.send_many_to_redis(batch)
+            self.metrics.count_published(slot, batch)
+        print(f"The result of {slot} is stored in the exchange")
+
+
+
+    def simulate(self, pipelined = False, queue_size = 2):
+        """Runs the market slots
+
+        With `pipelined`, closed slots are processed by a `SlotPipeline`
+        (see `EUnix.pipeline`) on worker threads while the next gates run;
+        `queue_size` bounds the slots waiting at every stage.
+        """
+        if pipelined:
+            self.pipeline = SlotPipeline(self, queue_size)
+        for index, (_, row) in enumerate(self.simu_slots.iterrows()): #Step numbers start at 0 from startSlot
+            slot = (row['Datetime']).isoformat()
+            self.pub_ins.publish_slot(slot, index, "Begin") #start new  market slot
+            self.clock.open_gate(slot)
+            if self.order_source is not None:
+                self.pub_ins.submit_orders(slot, self.order_source(slot)) #Replay orders of the slot
+            if index !=0 and self.pipeline is not None:
+                self.pipeline.submit(prev_slot, index) #Match previous slot in the background
+            elif index !=0:
+                self.mach_function(prev_slot) #Match previous slot
+                self.pub_ins.publish_slot(prev_slot, index, "Results") #Market  slot ends and results published
+
             prev_slot = slot
-            time.sleep(1)
+            self.clock.wait_gate(slot, self.pub_ins) #Gate closes on deadline or once all agents submitted
         return prev_slot, index
         
     
     def closeSimulation(self, prev_slot, index):
-        self.mach_function(prev_slot)
-        self.pub_ins.publish_slot(prev_slot, index, "Results") #Publication of last results announcement
-        time.sleep(1)
+        if self.pipeline is not None:
+            self.pipeline.submit(prev_slot, index)
+            self.pipeline.close() #Waits for the publication of every slot
+            self.pipeline = None
+        else:
+            self.mach_function(prev_slot)
+            self.pub_ins.publish_slot(prev_slot, index, "Results") #Publication of last results announcement
+        self.clock.sleep(1)
         self.pub_ins.publish_slot("End", index +1, "end")
 
-        output_results = self.pub_ins.read_from_redis("simulation result")
-        self.pub_ins.json_to_csv(output_results, "output.csv")
+        if self.sink is not None:
+            self.sink.close()
+        self.metrics.close()
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
         print("End of Simulation")
         self.pub_ins.delete_from_redis("registraion")
 
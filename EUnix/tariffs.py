@@ -0,0 +1,120 @@
+"""
+Grid fees and tariffs applied around market clearing.
+
+Sellers pay the grid fee: before matching it is added to the rate of every
+offer, and after matching it is taken back from the prices received by the
+sellers. Both steps are columnar operations on the order book and on the
+transaction block.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _lookup(column, fee_of, default=0.0):
+    """Vectorized lookup of `fee_of(value)`, evaluated once per distinct value."""
+    codes, uniques = pd.factorize(column)
+    fees = np.empty(len(uniques) + 1)
+    fees[:-1] = [fee_of(value) for value in uniques]
+    fees[-1] = default  # missing values
+    return fees[codes]
+
+
+class GridFee():
+    """
+    Grid fee charged to sellers, in the unit of `energy_rate`.
+
+    The fee of an offer is the sum of a flat part, a part depending on its
+    ``Unit_area`` and a time-of-use part depending on the hour of its
+    ``delivery_time``.
+
+    Parameters
+    ----------
+    flat : float, default=0
+        Fee charged on every offer.
+    per_area : dict, optional
+        Fee per ``Unit_area``; areas not listed pay `default_area_fee`.
+    time_of_use : sequence or dict, optional
+        Fee per hour of delivery: 24 values indexed by hour, or a dict
+        ``{hour: fee}`` (hours not listed pay no time-of-use fee).
+    default_area_fee : float, default=0
+        Area fee of the areas missing from `per_area`.
+    """
+
+    def __init__(self, flat=0, per_area=None, time_of_use=None, default_area_fee=0):
+        self.flat = flat
+        self.per_area = per_area
+        self.default_area_fee = default_area_fee
+        if time_of_use is not None and not isinstance(time_of_use, dict):
+            time_of_use = dict(enumerate(time_of_use))
+        self.time_of_use = time_of_use
+
+    @classmethod
+    def coerce(cls, fee):
+        """Returns `fee` as a `GridFee` (a number is a flat fee)."""
+        if isinstance(fee, cls):
+            return fee
+        return cls(flat=fee or 0)
+
+    def _area_fee(self, area):
+        return self.per_area.get(area, self.default_area_fee)
+
+    def _tou_fee(self, delivery):
+        hour = pd.to_datetime(delivery, errors='coerce').hour
+        return self.time_of_use.get(hour, 0.0)
+
+    def offer_fee(self, unit_area, delivery_time):
+        """Fee of a single offer."""
+        fee = float(self.flat)
+        if self.per_area is not None:
+            fee += self._area_fee(unit_area)
+        if self.time_of_use is not None:
+            fee += self._tou_fee(delivery_time)
+        return fee
+
+    def order_fees(self, orders):
+        """Fee of every order of the book (zero for bids)."""
+        fees = np.full(len(orders), float(self.flat))
+        if self.per_area is not None:
+            fees += _lookup(orders['Unit_area'], self._area_fee, self.default_area_fee)
+        if self.time_of_use is not None:
+            fees += _lookup(orders['delivery_time'], self._tou_fee)
+        fees[orders['type'].to_numpy(dtype=bool)] = 0.0
+        return fees
+
+    def apply_orders(self, orders):
+        """
+        Adds the fee to the rate of every offer.
+
+        Returns
+        -------
+        orders : pd.DataFrame
+            New order book with adjusted ``energy_rate``.
+        offer_fees : pd.Series
+            Fee charged, indexed by the ``Order_id`` of the offers.
+        """
+        fees = self.order_fees(orders)
+        orders = orders.assign(energy_rate=orders['energy_rate'].to_numpy() + fees)
+        offers = ~orders['type'].to_numpy(dtype=bool)
+        offer_fees = pd.Series(fees[offers], index=orders['Order_id'].to_numpy()[offers])
+        offer_fees = offer_fees[~offer_fees.index.duplicated()]
+        return orders, offer_fees
+
+    def apply_transactions(self, trans_df, offer_fees):
+        """
+        Removes the fee from the prices seen by the sellers.
+
+        `offer_fees` maps the ``Order_id`` of the offers to their fee (a
+        Series or a dict).
+
+        Adds a ``User Rate`` column (clearing rate for buyers, clearing rate
+        minus the fee for sellers) and reports ``Offer_rate`` without the fee.
+        """
+        fee = trans_df['Offer_id'].map(offer_fees).to_numpy(dtype=float)
+        fee = np.nan_to_num(fee)
+        clearing = pd.to_numeric(trans_df['Clearing_rate'], errors='coerce').to_numpy(dtype=float)
+        selling = (trans_df['Trans_type'] != "Buying").to_numpy()
+        offer_rate = pd.to_numeric(trans_df['Offer_rate'], errors='coerce').to_numpy(dtype=float)
+        return trans_df.assign(**{
+            "User Rate": np.where(selling, clearing - fee, clearing),
+            "Offer_rate": offer_rate - fee,
+        })
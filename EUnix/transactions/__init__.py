@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from EUnix.transactions.transactions import *
-from EUnix.transactions.processing import *
+from EUnix.lazy import lazy_exports
 
 
+_NAMES = {
+    'TransactionManager': 'EUnix.transactions.transactions',
+    'new_trans_ids': 'EUnix.transactions.transactions',
+    'split_transactions_merged_players': 'EUnix.transactions.processing',
+}
+__all__ = list(_NAMES)
+
+__getattr__, __dir__ = lazy_exports(__name__, (
+    'EUnix.transactions.transactions',
+    'EUnix.transactions.processing',
+), names=_NAMES)
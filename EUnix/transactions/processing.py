@@ -6,42 +6,91 @@ Copyright (c) 2025, Godwin Okwuibe
 
 This file includes modifications made by Godwin Okwuibe in 2025.
 """
+import numpy as np
 import pandas as pd
+from EUnix.auctions.process import merged_order_ids
 from EUnix.transactions.transactions import TransactionManager
 
 
+# Columns describing each side of a transaction, and the order columns they come from
+SIDE_COLUMNS = {
+    'Buying': {'Buyer': 'User', 'Buyer_id': 'User_id', 'Bid_id': 'Order_id', 'Bid_qty': 'energy_qty',
+               'Bid_rate': 'energy_rate', 'Bid_time': 'bid_offer_time', 'Unit_area': 'Unit_area'},
+    'Selling': {'Seller': 'User', 'Seller_id': 'User_id', 'Offer_id': 'Order_id', 'Offer_qty': 'energy_qty',
+                'Offer_rate': 'energy_rate', 'Offer_time': 'bid_offer_time', 'Unit_area': 'Unit_area'},
+}
+
+
 def split_transactions_merged_players(transactions, bids, mapping, fees=None):
     """
+    Splits the transactions of aggregated orders among the original orders.
 
-    """
-    new_trans = TransactionManager()
+    Every transaction row is matched to the aggregated order of its own side
+    (``Bid_id`` of "Buying" rows, ``Offer_id`` of "Selling" rows) and
+    replaced by one row per member of that group. The matched quantity is
+    shared pro rata to the quantities of the members (equally when they are
+    all zero), and the columns of the row's own side are restored from the
+    original orders. The counterparty columns keep the aggregated order.
 
-    for _, t in transactions.get_df().iterrows():
-        bid_id = t.bid
-        original_rows = mapping.get(bid_id, [])
+    Parameters
+    ----------
+    transactions : TransactionManager
+        Transactions of the aggregated order book.
+    bids : pd.DataFrame
+        Original order book.
+    mapping : np.ndarray
+        Group of every original order, as returned by `merge_same_price`.
+    fees : dict, optional
+        Fees per ``User`` of the aggregated book; the fee of an aggregated
+        user is shared among the members like the quantity.
 
-        # Proportional share of quantity
-        total_quantity = bids.iloc[original_rows]["quantity"].sum()
-        proportions = bids.iloc[original_rows]["quantity"] / total_quantity if total_quantity > 0 else 0
+    Returns
+    -------
+    TransactionManager, or (TransactionManager, dict) when `fees` is given.
+    """
+    df = transactions.get_df()
+    if df.empty:
+        return (transactions, fees) if fees is not None else transactions
 
-        # Optional fee for the merged transaction
-        fee_per_user = None
-        if len(original_rows) > 1 and fees is not None:
-            fee_per_user = fees.pop(t.user, None)
+    mapping = np.asarray(mapping)
+    counts = np.bincount(mapping)
+    qty = bids['energy_qty'].to_numpy(dtype=float)
+    group_qty = np.bincount(mapping, weights=qty)
+    share = np.where(group_qty[mapping] > 0, qty / np.where(group_qty > 0, group_qty, 1)[mapping],
+                     1 / counts[mapping])
 
-        for row_idx in original_rows:
-            user_row = bids.iloc[row_idx]
-            t_values = t.copy()
+    # Group of the own side of every transaction row
+    buying = (df['Trans_type'] == 'Buying').to_numpy()
+    own_id = np.where(buying, df['Bid_id'].to_numpy(dtype=object), df['Offer_id'].to_numpy(dtype=object))
+    group = pd.Index(merged_order_ids(bids, mapping)).get_indexer(own_id)
+    if (group < 0).any():
+        raise ValueError("Transactions refer to orders missing from the aggregated book")
 
-            # Update bid and quantity for disaggregated transaction
-            t_values.bid = row_idx
-            t_values.quantity *= proportions[row_idx]
+    # One row per (transaction, member of its group), members taken from the sorted mapping
+    members = np.argsort(mapping, kind='stable')
+    starts = np.cumsum(counts) - counts
+    reps = counts[group]
+    row = np.repeat(np.arange(len(df)), reps)
+    offset = np.arange(reps.sum()) - np.repeat(np.cumsum(reps) - reps, reps)
+    member = members[starts[group][row] + offset]
 
-            # Update fee per user if applicable
-            if fee_per_user is not None:
-                user_id = user_row.user
-                fees[user_id] = fee_per_user * proportions[row_idx]
+    columns = {name: df[name].to_numpy(dtype=object)[row] for name in TransactionManager.name_col}
+    columns['Matched_qty'] = df['Matched_qty'].to_numpy(dtype=float)[row] * share[member]
+    buying = buying[row]
+    for side, rows in (('Buying', buying), ('Selling', ~buying)):
+        for name, source in SIDE_COLUMNS[side].items():
+            columns[name][rows] = bids[source].to_numpy(dtype=object)[member[rows]]
 
-            new_trans.add_transaction(*t_values.values)
+    new_trans = TransactionManager()
+    new_trans.add_transactions(**columns)
 
-    return (new_trans, fees) if fees is not None else new_trans
+    if fees is not None:
+        users = bids['User'].to_numpy(dtype=object)
+        merged_users = merged_order_ids(bids, mapping)
+        for g in np.flatnonzero(counts > 1):
+            fee = fees.pop(merged_users[g], None)
+            if fee is not None:
+                for m in np.flatnonzero(mapping == g):
+                    fees[users[m]] = fees.get(users[m], 0) + fee * share[m]
+        return new_trans, fees
+    return new_trans
@@ -0,0 +1,159 @@
+"""
+Sinks receiving the transactions of every slot as soon as it is cleared.
+
+A sink buffers at most `buffer_rows` transactions before appending them to
+its file, so the memory used by the results does not grow with the length
+of the simulation, and nothing depends on the expiry of Redis keys.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from EUnix.transactions.stats import NUMERIC_COLS
+
+
+class ResultSink():
+    """
+    Base class of the result sinks.
+
+    `write` receives the transactions of a slot; they are stored with the
+    slot in an extra ``Slot`` column. The columns of the first block fix
+    those of the output: later blocks are aligned to them.
+    """
+
+    def __init__(self, buffer_rows=10000):
+        self.buffer_rows = buffer_rows
+        self.columns = None
+        self.rows = 0
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, trans_df, slot):
+        """Adds the transactions `trans_df` of `slot`."""
+        if trans_df.empty:
+            return
+        block = trans_df.assign(Slot=slot)
+        if self.columns is None:
+            self.columns = list(block.columns)
+        else:
+            block = block.reindex(columns=self.columns)
+        self._buffer.append(block)
+        self._buffered += len(block)
+        self.rows += len(block)
+        if self._buffered >= self.buffer_rows:
+            self.flush()
+
+    def flush(self):
+        """Writes out the buffered transactions."""
+        if self._buffer:
+            block = pd.concat(self._buffer, ignore_index=True)
+            self._buffer = []
+            self._buffered = 0
+            self._append(block)
+
+    def _append(self, block):
+        raise NotImplementedError
+
+    def close(self):
+        """Flushes the buffer and releases the output."""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvResultSink(ResultSink):
+    """
+    Appends the transactions to a CSV file, chunk by chunk.
+
+    The file is created (or truncated) with the header at the first chunk.
+    """
+
+    def __init__(self, path, buffer_rows=10000):
+        super().__init__(buffer_rows)
+        self.path = path
+        self._started = False
+
+    def _append(self, block):
+        block.to_csv(self.path, mode='a' if self._started else 'w',
+                     header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        super().close()
+        if self._started:
+            print(f"Result data successfully saved to {self.path}")
+
+
+class ParquetResultSink(ResultSink):
+    """
+    Appends the transactions to a Parquet file, one row group per chunk.
+
+    Requires the optional ``pyarrow`` package. Numeric transaction columns
+    are stored as float64 (blanks become nulls) and the others as strings.
+    """
+
+    def __init__(self, path, buffer_rows=10000):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError("ParquetResultSink requires the 'pyarrow' package") from e
+        super().__init__(buffer_rows)
+        self.path = path
+        self._pa = pyarrow
+        self._writer = None
+
+    def _table(self, block):
+        pa = self._pa
+        arrays = []
+        for name in block.columns:
+            values = block[name]
+            if name in NUMERIC_COLS or pd.api.types.is_numeric_dtype(values):
+                arrays.append(pa.array(pd.to_numeric(values, errors='coerce').to_numpy(dtype=float),
+                                       type=pa.float64(), from_pandas=True))
+            else:
+                mask = values.isna().to_numpy()
+                arrays.append(pa.array(values.astype(str).to_numpy(dtype=object), type=pa.string(),
+                                       mask=mask))
+        return pa.Table.from_arrays(arrays, names=list(block.columns))
+
+    def _append(self, block):
+        table = self._table(block)
+        if self._writer is None:
+            self._writer = self._pa.parquet.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+
+    def close(self):
+        super().close()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            print(f"Result data successfully saved to {self.path}")
+
+
+class MemoryResultSink(ResultSink):
+    """Keeps the transactions in memory, e.g. for back-tests and sweeps."""
+
+    def __init__(self):
+        super().__init__(buffer_rows=np.inf)
+
+    def flush(self):
+        pass  # the buffer is the storage
+
+    def get_df(self):
+        """Returns all the transactions written so far."""
+        if not self._buffer:
+            return pd.DataFrame()
+        return pd.concat(self._buffer, ignore_index=True)
+
+
+def make_sink(path):
+    """Returns a sink writing to `path`: Parquet for ``.parquet`` files, CSV otherwise."""
+    if os.path.splitext(path)[1].lower() in ('.parquet', '.pq'):
+        return ParquetResultSink(path)
+    return CsvResultSink(path)
@@ -1,14 +1,39 @@
+from collections import deque
+
 import pandas as pd
 import numpy as np
 
+from EUnix.schema import TRANSACTION_NUMERIC
+
+
+NUMERIC_COLS = list(TRANSACTION_NUMERIC)
+
+
+def numeric_columns(dfr):
+    """Returns the numeric transaction columns as float arrays.
+
+    Blank entries (e.g. ``Bid_qty`` of a selling record) become NaN.
+    Columns that are already float are returned as they are, so a frame
+    coerced once (see `coerce_numeric`) is not parsed again. The frame
+    itself is left untouched.
+    """
+    return {
+        col: dfr[col].to_numpy() if dfr[col].dtype == np.float64
+        else pd.to_numeric(dfr[col], errors='coerce').to_numpy(dtype=float)
+        for col in NUMERIC_COLS
+    }
+
+
+def coerce_numeric(dfr):
+    """Returns `dfr` with float numeric columns (`dfr` itself when they already are)."""
+    if all(dfr[col].dtype == np.float64 for col in NUMERIC_COLS):
+        return dfr
+    return dfr.assign(**numeric_columns(dfr))
+
+
 def compute_statis(dfr):
-    # Ensure correct data types
-    dfr['Matched_qty'] = pd.to_numeric(dfr['Matched_qty'], errors='coerce')
-    dfr['Clearing_rate'] = pd.to_numeric(dfr['Clearing_rate'], errors='coerce')
-    dfr['Bid_rate'] = pd.to_numeric(dfr['Bid_rate'], errors='coerce')
-    dfr['Offer_rate'] = pd.to_numeric(dfr['Offer_rate'], errors='coerce')
-    dfr['Bid_qty'] = pd.to_numeric(dfr['Bid_qty'], errors='coerce')
-    dfr['Offer_qty'] = pd.to_numeric(dfr['Offer_qty'], errors='coerce')
+    # Ensure correct data types, on a copy of the numeric columns only
+    dfr = coerce_numeric(dfr)
 
     stats = {}
 
@@ -23,8 +48,12 @@ def compute_statis(dfr):
         'Clearing Price Volatility (Std Dev)': dfr['Clearing_rate'].std()
     }
 
+    # Only the columns used below are filtered by side, not the whole frame
+    buying = (dfr['Trans_type'] == 'Buying').to_numpy()
+    selling = (dfr['Trans_type'] == 'Selling').to_numpy()
+
     # 📈 Buyer Statistics
-    buyers = dfr[dfr['Trans_type'] == 'Buying']
+    buyers = dfr[['Bid_rate', 'Bid_qty']][buying]
     stats['buyers'] = {
         'Average Bid Price': buyers['Bid_rate'].mean(),
         'Median Bid Rate': buyers['Bid_rate'].median(),
@@ -34,7 +63,7 @@ def compute_statis(dfr):
     }
 
     # 📉 Seller Statistics
-    sellers = dfr[dfr['Trans_type'] == 'Selling']
+    sellers = dfr[['Offer_rate', 'Offer_qty']][selling]
     stats['sellers'] = {
         'Average Offer Price': sellers['Offer_rate'].mean(),
         'Median Offer Rate': sellers['Offer_rate'].median(),
@@ -54,3 +83,247 @@ def compute_statis(dfr):
     }
 
     return stats
+
+
+class RunningMoments:
+    """
+    Count, mean, variance, min and max of a stream of values.
+
+    Batches are folded in with the parallel form of Welford's algorithm
+    (Chan et al.), so each update is a single vectorized pass and the state
+    is a handful of numbers. NaN values are ignored.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _combine(self, count, mean, m2, vmin, vmax):
+        if count == 0:
+            return self
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+        return self
+
+    def update(self, values):
+        """Adds a batch of values."""
+        x = np.asarray(values, dtype=float)
+        x = x[~np.isnan(x)]
+        if x.size == 0:
+            return self
+        mean = x.mean()
+        return self._combine(x.size, mean, ((x - mean) ** 2).sum(), x.min(), x.max())
+
+    def merge(self, other):
+        """Adds the values summarised by another `RunningMoments`."""
+        return self._combine(other.count, other.mean, other.m2, other.min, other.max)
+
+    @property
+    def variance(self):
+        """Sample variance (``ddof=1``, as in pandas)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        return np.sqrt(self.variance)
+
+    def summary(self):
+        """Mean, min and max, NaN when no value was seen."""
+        empty = self.count == 0
+        return {
+            'mean': np.nan if empty else self.mean,
+            'min': np.nan if empty else self.min,
+            'max': np.nan if empty else self.max,
+        }
+
+
+class QuantileSketch:
+    """
+    Mergeable approximate quantiles in bounded memory.
+
+    Values are summarised by at most `size` weighted centroids. When there
+    are more, neighbouring centroids (in sorted order) are merged into
+    `size` buckets of equal weight, with one sort and one `np.bincount`.
+
+    Parameters
+    ----------
+    size : int, default=100
+        Maximum number of centroids kept.
+    """
+
+    def __init__(self, size=100):
+        self.size = size
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    def _add(self, means, weights):
+        means = np.concatenate([self.means, means])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        if means.size > self.size:
+            cum = np.cumsum(weights)
+            bucket = ((cum - weights / 2) / cum[-1] * self.size).astype(int)
+            bucket = np.minimum(bucket, self.size - 1)
+            w = np.bincount(bucket, weights, minlength=self.size)
+            m = np.bincount(bucket, weights * means, minlength=self.size)
+            kept = w > 0
+            means, weights = m[kept] / w[kept], w[kept]
+        self.means, self.weights = means, weights
+        return self
+
+    def update(self, values):
+        """Adds a batch of values (NaN values are ignored)."""
+        x = np.asarray(values, dtype=float)
+        x = x[~np.isnan(x)]
+        return self._add(x, np.ones(x.size))
+
+    def merge(self, other):
+        """Adds the values summarised by another sketch."""
+        return self._add(other.means, other.weights)
+
+    def quantile(self, q):
+        """Approximate `q`-quantile (0 <= q <= 1), NaN when empty."""
+        if self.weights.size == 0:
+            return np.nan
+        cum = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), cum, self.means))
+
+
+class MarketAggregate:
+    """
+    Mergeable aggregates of a set of transactions.
+
+    Parameters
+    ----------
+    sketch_size : int, default=100
+        Number of centroids of the quantile sketches.
+    """
+
+    def __init__(self, sketch_size=100):
+        self.slots = 0
+        self.transactions = 0
+        self.matched_qty = 0.0
+        self.traded_value = 0.0
+        self.bid_volume = 0.0
+        self.offer_volume = 0.0
+        self.clearing = RunningMoments()
+        self.bid = RunningMoments()
+        self.offer = RunningMoments()
+        self.clearing_sketch = QuantileSketch(sketch_size)
+        self.bid_sketch = QuantileSketch(sketch_size)
+        self.offer_sketch = QuantileSketch(sketch_size)
+
+    def update(self, dfr):
+        """Adds the transactions of one slot, in one vectorized pass."""
+        cols = numeric_columns(dfr)
+        buying = (dfr['Trans_type'] == 'Buying').to_numpy()
+        selling = (dfr['Trans_type'] == 'Selling').to_numpy()
+        qty, rate = cols['Matched_qty'], cols['Clearing_rate']
+
+        self.slots += 1
+        self.transactions += dfr['Trans_id'].nunique()
+        self.matched_qty += np.nansum(qty)
+        self.traded_value += np.nansum(qty * rate)
+        self.bid_volume += np.nansum(cols['Bid_qty'][buying])
+        self.offer_volume += np.nansum(cols['Offer_qty'][selling])
+        self.clearing.update(rate)
+        self.clearing_sketch.update(rate)
+        self.bid.update(cols['Bid_rate'][buying])
+        self.bid_sketch.update(cols['Bid_rate'][buying])
+        self.offer.update(cols['Offer_rate'][selling])
+        self.offer_sketch.update(cols['Offer_rate'][selling])
+        return self
+
+    def merge(self, other):
+        """Adds the aggregates of another `MarketAggregate`."""
+        self.slots += other.slots
+        self.transactions += other.transactions
+        self.matched_qty += other.matched_qty
+        self.traded_value += other.traded_value
+        self.bid_volume += other.bid_volume
+        self.offer_volume += other.offer_volume
+        for name in ('clearing', 'bid', 'offer', 'clearing_sketch', 'bid_sketch', 'offer_sketch'):
+            getattr(self, name).merge(getattr(other, name))
+        return self
+
+    def report(self):
+        """Returns the aggregates in the layout of `compute_statis`."""
+        bid, offer = self.bid.summary(), self.offer.summary()
+        return {
+            'market': {
+                'Number of Slots': self.slots,
+                'Total Matched Quantity': self.matched_qty,
+                'Average Clearing Price': self.clearing.mean if self.clearing.count else np.nan,
+                'Weighted Average Clearing Price': (
+                    self.traded_value / self.matched_qty if self.matched_qty else np.nan
+                ),
+                'Median Clearing Price': self.clearing_sketch.quantile(0.5),
+                'Clearing Price Volatility (Std Dev)': self.clearing.std,
+            },
+            'buyers': {
+                'Average Bid Price': bid['mean'],
+                'Median Bid Rate': self.bid_sketch.quantile(0.5),
+                'Min Bid Rate': bid['min'],
+                'Max Bid Rate': bid['max'],
+                'Total bid volume': self.bid_volume,
+            },
+            'sellers': {
+                'Average Offer Price': offer['mean'],
+                'Median Offer Rate': self.offer_sketch.quantile(0.5),
+                'Min Offer Rate': offer['min'],
+                'Max Offer Rate': offer['max'],
+                'Total Offer volume': self.offer_volume,
+            },
+            'matching': {
+                'Number of Unique Transactions': self.transactions,
+            },
+        }
+
+
+class StreamingStats:
+    """
+    Statistics accumulated slot by slot over a whole simulation.
+
+    Whole-run aggregates take constant memory; the last `window` slots are
+    also kept (one `MarketAggregate` each) for rolling-window reports.
+
+    Parameters
+    ----------
+    window : int, default=96
+        Number of most recent slots covered by `rolling_report`.
+    sketch_size : int, default=100
+        Number of centroids of the quantile sketches.
+    """
+
+    def __init__(self, window=96, sketch_size=100):
+        self.sketch_size = sketch_size
+        self.total = MarketAggregate(sketch_size)
+        self.recent = deque(maxlen=window)
+
+    def update(self, dfr, slot=None):
+        """Adds the transactions of one slot."""
+        slot_agg = MarketAggregate(self.sketch_size).update(dfr)
+        self.total.merge(slot_agg)
+        self.recent.append((slot, slot_agg))
+        return slot_agg
+
+    def report(self):
+        """Whole-run statistics."""
+        return self.total.report()
+
+    def rolling_report(self, window=None):
+        """Statistics of the last `window` slots (all kept slots by default)."""
+        recent = list(self.recent)[-window:] if window else list(self.recent)
+        agg = MarketAggregate(self.sketch_size)
+        for _, slot_agg in recent:
+            agg.merge(slot_agg)
+        return agg.report()
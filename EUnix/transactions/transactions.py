@@ -6,23 +6,73 @@ Copyright (c) 2025, Godwin Okwuibe
 
 This file includes modifications made by Godwin Okwuibe in 2025.
 """
-import pandas as pd
+import os
+
+import numpy as np
+
+from EUnix.schema import TRANSACTION_COLUMNS
+
+
+_HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype="S1")
+_UUID_DIGITS = [i for i in range(36) if i not in (8, 13, 18, 23)]
+
+
+def new_trans_ids(n):
+    """
+    Generates `n` random (version 4) UUID strings at once.
+
+    Equivalent to ``[str(uuid.uuid4()) for _ in range(n)]`` but built with
+    array operations on a single block of random bytes.
+
+    Returns
+    -------
+    np.ndarray
+        Array of `n` UUID strings.
+    """
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    text = np.full((n, 36), b"-", dtype="S1")
+    digits = np.empty((n, 32), dtype="S1")
+    digits[:, 0::2] = _HEX_DIGITS[raw >> 4]
+    digits[:, 1::2] = _HEX_DIGITS[raw & 0x0F]
+    text[:, _UUID_DIGITS] = digits
+    return text.view("S36").ravel().astype(str)
+
+
+def _as_column(values, n):
+    """Turns a scalar or a sequence into a column array of length `n`."""
+    if np.ndim(values) == 0 or isinstance(values, str):
+        if isinstance(values, str) or values is None:
+            return np.full(n, values, dtype=object)
+        return np.full(n, values)
+    if isinstance(values, np.ndarray):
+        return values
+    col = np.empty(n, dtype=object)
+    col[:] = list(values)
+    return col
 
 
 class TransactionManager:
+    """
+    Stores transactions as a list of column chunks.
 
+    Every chunk maps each column name to an array and is never modified
+    once stored, so merging managers only concatenates their chunk lists.
+    Rows added one at a time with `add_transaction` are buffered and turned
+    into a chunk when needed. The DataFrame (and Arrow table) built from the
+    chunks is cached until new transactions are added.
+    """
 
-    name_col = [
-        "Trans_id", "Buyer", "Buyer_id", "Unit_area", "Bid_id", "Bid_qty",
-        "Bid_rate", "Bid_time", "Seller", "Seller_id", "Offer_id", "Offer_qty",
-        "Offer_rate", "Offer_time", "Clearing_rate", "Matched_qty",
-        "Delivery_time", "Trans_type"
-    ]
+    name_col = list(TRANSACTION_COLUMNS)
 
     def __init__(self):
         """Initializes an empty transaction manager."""
         self.n_trans = 0
-        self.trans = []
+        self._chunks = []
+        self._rows = []
+        self._df = None
+        self._arrow = None
 
     def add_transaction(
         self, Trans_id, Buyer, Buyer_id, Unit_area, Bid_id, Bid_qty,
@@ -64,24 +114,124 @@ class TransactionManager:
             Bid_time, Seller, Seller_id, Offer_id, Offer_qty, Offer_rate,
             Offer_time, Clearing_rate, Matched_qty, Delivery_time, Trans_type
         )
-        self.trans.append(new_trans)
+        self._rows.append(new_trans)
         self.n_trans += 1
+        self._df = self._arrow = None
         return self.n_trans - 1
 
+    def add_transactions(
+        self, Trans_id, Buyer, Buyer_id, Unit_area, Bid_id, Bid_qty,
+        Bid_rate, Bid_time, Seller, Seller_id, Offer_id, Offer_qty,
+        Offer_rate, Offer_time, Clearing_rate, Matched_qty,
+        Delivery_time, Trans_type
+    ):
+        """
+        Adds a block of transactions given column by column.
+
+        Every parameter is either a sequence with one entry per transaction
+        or a scalar shared by the whole block. See `add_transaction` for the
+        meaning of each column.
+
+        Returns
+        -------
+        range
+            Indices of the transactions added.
+        """
+        columns = [
+            Trans_id, Buyer, Buyer_id, Unit_area, Bid_id, Bid_qty, Bid_rate,
+            Bid_time, Seller, Seller_id, Offer_id, Offer_qty, Offer_rate,
+            Offer_time, Clearing_rate, Matched_qty, Delivery_time, Trans_type
+        ]
+        n = max(
+            (len(col) for col in columns if np.ndim(col) == 1 and not isinstance(col, str)),
+            default=1
+        )
+        self._flush()
+        if n:
+            self._chunks.append({
+                name: _as_column(col, n) for name, col in zip(self.name_col, columns)
+            })
+        self.n_trans += n
+        self._df = self._arrow = None
+        return range(self.n_trans - n, self.n_trans)
+
+    def _flush(self):
+        """Moves the rows added one at a time into a new chunk."""
+        if self._rows:
+            columns = zip(*self._rows)
+            n = len(self._rows)
+            self._chunks.append({
+                name: _as_column(col, n) for name, col in zip(self.name_col, columns)
+            })
+            self._rows = []
+
     def get_df(self):
+        """
+        Returns all stored transactions as a pandas DataFrame.
+
+        The frame is cached until new transactions are added, so it must be
+        treated as read-only.
 
-        return pd.DataFrame(self.trans, columns=self.name_col)
+        Returns
+        -------
+        pd.DataFrame
+            DataFrame of all stored transactions.
+        """
+        if self._df is None:
+            import pandas as pd  # Loaded on first use, see `EUnix.schema`
+            self._flush()
+            if not self._chunks:
+                self._df = pd.DataFrame(columns=self.name_col)
+            else:
+                data = {
+                    name: np.concatenate([chunk[name] for chunk in self._chunks])
+                    for name in self.name_col
+                }
+                self._df = pd.DataFrame(data, columns=self.name_col, copy=False).infer_objects()
+        return self._df
+
+    def to_arrow(self):
+        """
+        Returns all stored transactions as a `pyarrow.Table`.
+
+        Requires the optional ``pyarrow`` package. Columns mixing numbers and
+        blanks (e.g. ``Bid_qty`` on selling records) are stored as strings.
+        The table is cached until new transactions are added.
+        """
+        if self._arrow is None:
+            try:
+                import pyarrow as pa
+            except ImportError as e:
+                raise ImportError("to_arrow requires the 'pyarrow' package") from e
+
+            df = self.get_df()
+            arrays = []
+            for name in self.name_col:
+                try:
+                    arrays.append(pa.array(df[name], from_pandas=True))
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    arrays.append(pa.array(df[name].astype(str)))
+            self._arrow = pa.Table.from_arrays(arrays, names=self.name_col)
+        return self._arrow
+
+    @property
+    def trans(self):
+        """All stored transactions as a list of tuples."""
+        return list(self.get_df().itertuples(index=False, name=None))
 
     def merge(self, other):
+        """
+        Returns a new manager holding the transactions of both managers.
 
+        Only the chunk lists are concatenated; no transaction is copied.
+        """
         assert isinstance(other, TransactionManager), "Must merge with another TransactionManager"
 
+        self._flush()
+        other._flush()
         merged = TransactionManager()
-        for t in self.trans:
-            merged.add_transaction(*t)
-        for t in other.trans:
-            merged.add_transaction(*t)
-
+        merged._chunks = self._chunks + other._chunks
+        merged.n_trans = self.n_trans + other.n_trans
         return merged
 
     def __repr__(self):
@@ -0,0 +1,90 @@
+"""
+Synthetic order books for the benchmarks.
+
+Orders are generated in the format sent by the agents (the records read
+by `Simulation.mach_function`) and can be loaded into an `OrderManager`.
+"""
+import numpy as np
+import pandas as pd
+
+from EUnix.auctions.orders import OrderManager
+
+
+PRICE_DISTRIBUTIONS = ("uniform", "normal", "clustered")
+
+
+def synthetic_prices(n, buying, distribution="uniform", price_range=(5.0, 30.0), r=None):
+    """
+    Draws `n` prices in cent/kWh for bids (`buying`) or offers.
+
+    - "uniform": bids and offers spread over the whole `price_range`.
+    - "normal": bids centred above the middle of the range and offers below
+      it, so that only the tails of the two sides cross.
+    - "clustered": uniform prices on a grid of 1 cent, which gives many
+      orders at the same price.
+    """
+    r = np.random.RandomState(0) if r is None else r
+    low, high = price_range
+    if distribution == "uniform":
+        prices = r.uniform(low, high, n)
+    elif distribution == "normal":
+        mid, width = (low + high) / 2, (high - low) / 6
+        prices = r.normal(np.where(buying, mid + width, mid - width), width, n)
+    elif distribution == "clustered":
+        prices = np.round(r.uniform(low, high, n))
+    else:
+        raise ValueError(f"Unknown price distribution: {distribution}")
+    return np.round(np.clip(prices, low, high), 2)
+
+
+def synthetic_records(n_orders, buy_share=0.5, areas=1, distribution="uniform",
+                      price_range=(5.0, 30.0), qty_range=(0.1, 10.0),
+                      slot="2014-12-01T00:00:00", seed=0):
+    """
+    Returns a DataFrame of `n_orders` bids and offers, one record per row.
+
+    Parameters
+    ----------
+    n_orders : int
+        Number of orders.
+    buy_share : float, default=0.5
+        Probability of an order being a bid.
+    areas : int, default=1
+        Number of distinct ``Unit_area``.
+    distribution : str, default="uniform"
+        Price distribution, see `synthetic_prices`.
+    price_range : tuple, default=(5.0, 30.0)
+        Bounds of the prices.
+    qty_range : tuple, default=(0.1, 10.0)
+        Bounds of the (uniform) quantities in kWh.
+    slot : str
+        Bid-offer and delivery time of every order.
+    seed : int, default=0
+        Seed of the generator.
+    """
+    r = np.random.RandomState(seed)
+    buying = r.rand(n_orders) < buy_share
+    users = np.char.add("user", np.arange(n_orders).astype(str))
+    return pd.DataFrame({
+        "User": users,
+        "User_id": np.char.add("id-", users),
+        "Unit_area": np.char.add("area", r.randint(0, areas, n_orders).astype(str)),
+        "Order_id": np.char.add("order", np.arange(n_orders).astype(str)),
+        "energy_qty": np.round(r.uniform(*qty_range, n_orders), 3),
+        "energy_rate": synthetic_prices(n_orders, buying, distribution, price_range, r),
+        "bid-offer-time": slot,
+        "delivery-time": slot,
+        "Type": buying,
+    })
+
+
+def synthetic_book(n_orders, **kwargs):
+    """Returns an `OrderManager` holding `synthetic_records(n_orders, **kwargs)`."""
+    records = synthetic_records(n_orders, **kwargs)
+    book = OrderManager(capacity=n_orders)
+    book.add_orders(
+        records["User"], records["User_id"], records["Unit_area"], records["Order_id"],
+        records["energy_qty"], records["energy_rate"], records["bid-offer-time"],
+        records["delivery-time"], records["Type"].to_numpy(),
+    )
+    return book
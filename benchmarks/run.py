@@ -0,0 +1,208 @@
+"""
+Benchmarks of the market pipeline against the size of the order book.
+
+Every case is timed on synthetic order books (see `benchmarks.orderbook`)
+of increasing size; the best wall time over `--repeat` runs and the peak
+memory traced by `tracemalloc` during a separate run are reported.
+
+Run from the repository root::
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output bench.csv
+    python -m benchmarks.run --baseline bench.csv
+
+With `--baseline`, the cases slower than the baseline by more than
+`--tolerance` are listed and the command exits with status 1.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from EUnix.auctions.process import merge_same_price
+from EUnix.clock import VirtualClock
+from EUnix.mechanisms.continuous import continuous_double_auction
+from EUnix.mechanisms.p2p_random import p2p_random
+from EUnix.mechanisms.uniform import uniform_price_mechanism
+from EUnix.mechanisms import uniform_process as dv
+from EUnix.redisconnection import codec
+from EUnix.redisconnection.transport import decode_entry, encode_entry
+from EUnix.simulation import Simulation
+from EUnix.transactions.stats import compute_statis
+
+from benchmarks.orderbook import PRICE_DISTRIBUTIONS, synthetic_book, synthetic_records
+
+
+SLOT = "2014-12-01T00:00:00"
+
+
+# Every case takes the generation settings and returns a function to time;
+# the preparation done before returning is not measured.
+
+def bench_p2p_random(n, **book):
+    orders = synthetic_book(n, **book).get_df()
+    r = np.random.RandomState(0)
+    return lambda: p2p_random(orders, r=r)
+
+
+def bench_p2p_random_compatible(n, **book):
+    orders = synthetic_book(n, **book).get_df()
+    r = np.random.RandomState(0)
+    return lambda: p2p_random(orders, r=r, pairing="compatible")
+
+
+def bench_uniform_price_mechanism(n, **book):
+    orders = synthetic_book(n, **book).get_df()
+    return lambda: uniform_price_mechanism(orders)
+
+
+def bench_continuous_double_auction(n, **book):
+    orders = synthetic_book(n, **book).get_df()
+    return lambda: continuous_double_auction(orders)
+
+
+def bench_intersect_stepwise(n, **book):
+    orders = synthetic_book(n, **book).get_df()
+    buy, _ = dv.demand_curve_from_bids(orders)
+    sell, _ = dv.supply_curve_from_bids(orders)
+    return lambda: dv.intersect_stepwise(buy, sell)
+
+
+def bench_merge_same_price(n, **book):
+    orders = synthetic_book(n, **book).get_df()
+    return lambda: merge_same_price(orders)
+
+
+def bench_compute_statis(n, **book):
+    orders = synthetic_book(n, **book).get_df()
+    trans_df = p2p_random(orders, r=np.random.RandomState(0))[0].get_df()
+    return lambda: compute_statis(trans_df)
+
+
+def memory_simulation():
+    """Single-slot p2p `Simulation` on an in-memory transport, without output."""
+    data = pd.DataFrame({"Datetime": ["2014-12-01T00:00", "2014-12-01T00:15"]})
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Simulation(data, "2014-12-01T00:00", 1, "p2p", clock=VirtualClock(),
+                          seed=0, transport="memory", output_file=None)
+
+
+def bench_mach_function(n, **book):
+    simu = memory_simulation()
+    simu.pub_ins.submit_orders(SLOT, synthetic_records(n, slot=SLOT, **book).to_dict("records"))
+
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            simu.mach_function(SLOT)
+    return run
+
+
+def bench_submit_orders(n, **book):
+    simu = memory_simulation()
+    records = synthetic_records(n, slot=SLOT, **book).to_dict("records")
+    return lambda: simu.pub_ins.submit_orders(SLOT, records)
+
+
+def bench_ingest_json(n, **book):
+    entries = [encode_entry(record) for record in synthetic_records(n, slot=SLOT, **book).to_dict("records")]
+    return lambda: codec.order_columns([decode_entry(entry) for entry in entries])
+
+
+def bench_ingest_npy(n, **book):
+    entry = codec.encode_orders(synthetic_records(n, slot=SLOT, **book))
+    return lambda: codec.order_columns([decode_entry(entry)])
+
+
+CASES = {
+    "p2p_random": bench_p2p_random,
+    "p2p_random_compatible": bench_p2p_random_compatible,
+    "uniform_price_mechanism": bench_uniform_price_mechanism,
+    "continuous_double_auction": bench_continuous_double_auction,
+    "intersect_stepwise": bench_intersect_stepwise,
+    "merge_same_price": bench_merge_same_price,
+    "compute_statis": bench_compute_statis,
+    "mach_function": bench_mach_function,
+    "submit_orders": bench_submit_orders,
+    "ingest_json": bench_ingest_json,
+    "ingest_npy": bench_ingest_npy,
+}
+
+
+def measure(case, n, repeat=3, **book):
+    """Returns the best time (s) over `repeat` runs and the peak memory (bytes)."""
+    times = []
+    for _ in range(repeat):
+        func = case(n, **book)
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    func = case(n, **book)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def run_benchmarks(sizes, cases=None, repeat=3, **book):
+    """Runs `cases` (all by default) on every size and returns a DataFrame."""
+    rows = []
+    for name in cases or CASES:
+        for n in sizes:
+            seconds, peak = measure(CASES[name], n, repeat, **book)
+            rows.append({"case": name, "orders": n, "seconds": seconds, "peak_mb": peak / 2**20})
+            print(f"{name:<26} {n:>9} orders {seconds * 1e3:>10.2f} ms {peak / 2**20:>9.2f} MB",
+                  flush=True)
+    return pd.DataFrame(rows)
+
+
+def regressions(results, baseline, tolerance=0.25):
+    """Returns the rows of `results` slower than `baseline` by more than `tolerance`."""
+    merged = results.merge(baseline, on=["case", "orders"], suffixes=("", "_baseline"))
+    merged["ratio"] = merged["seconds"] / merged["seconds_baseline"]
+    return merged[merged["ratio"] > 1 + tolerance]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--areas", type=int, default=1)
+    parser.add_argument("--distribution", choices=PRICE_DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--buy-share", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="CSV file the results are written to")
+    parser.add_argument("--baseline", help="CSV file of earlier results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="relative slowdown reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.sizes, args.cases, args.repeat, areas=args.areas,
+        distribution=args.distribution, buy_share=args.buy_share, seed=args.seed)
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+    if args.baseline:
+        slower = regressions(results, pd.read_csv(args.baseline), args.tolerance)
+        for row in slower.itertuples():
+            print(f"REGRESSION {row.case} at {row.orders} orders: "
+                  f"{row.seconds_baseline * 1e3:.2f} ms -> {row.seconds * 1e3:.2f} ms")
+        if not slower.empty:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
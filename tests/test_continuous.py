@@ -0,0 +1,119 @@
+import pytest
+
+from EUnix.auctions.orders import OrderManager
+from EUnix.market import Market
+from EUnix.mechanisms.continuous import LimitOrderBook, continuous_double_auction
+
+SLOT = "2014-12-01T00:15"
+
+
+def order(oid, is_bid, qty, rate, time="2014-12-01T00:00"):
+    return {'User': f"u-{oid}", 'User_id': f"id-{oid}", 'Unit_area': "A", 'Order_id': oid,
+            'energy_qty': qty, 'energy_rate': rate, 'bid_offer_time': time,
+            'delivery_time': SLOT, 'type': is_bid}
+
+
+def trades(rows):
+    """(Bid_id, Offer_id, Clearing_rate, Matched_qty) of the buying rows."""
+    return [(r[4], r[10], r[14], r[15]) for r in rows if r[17] == "Buying"]
+
+
+def test_incoming_order_trades_at_resting_prices_best_first():
+    book = LimitOrderBook()
+    assert book.submit(order("s0", False, 2.0, 6.0)) == []
+    assert book.submit(order("s1", False, 2.0, 5.0)) == []
+    assert book.submit(order("s2", False, 2.0, 9.0)) == []
+
+    rows = book.submit(order("b0", True, 3.0, 7.0))
+
+    assert trades(rows) == [("b0", "s1", 5.0, 2.0), ("b0", "s0", 6.0, 1.0)]
+    assert book.best_offer()['Order_id'] == "s0"
+    assert book.best_offer()['remaining'] == 1.0
+    assert book.best_bid() is None
+    assert book.last_price == 6.0
+
+
+def test_unmatched_rest_of_the_order_rests_in_the_book():
+    book = LimitOrderBook()
+    book.submit(order("s0", False, 1.0, 5.0))
+
+    rows = book.submit(order("b0", True, 4.0, 5.0))
+
+    assert trades(rows) == [("b0", "s0", 5.0, 1.0)]
+    assert book.best_bid()['remaining'] == 3.0
+    assert len(book) == 1
+
+
+def test_same_price_orders_match_in_order_of_arrival():
+    book = LimitOrderBook()
+    book.submit(order("b0", True, 1.0, 8.0, time="2014-12-01T00:05"))
+    book.submit(order("b1", True, 1.0, 8.0, time="2014-12-01T00:01"))
+
+    rows = book.submit(order("s0", False, 1.0, 8.0))
+
+    assert trades(rows) == [("b0", "s0", 8.0, 1.0)]
+
+
+def test_missing_and_string_times_rest_side_by_side():
+    book = LimitOrderBook()
+    book.submit(order("b0", True, 1.0, 8.0, time=None))
+    book.submit(order("b1", True, 1.0, 8.0, time="2014-12-01T00:01"))
+    book.submit(order("b2", True, 1.0, 8.0, time=None))
+
+    rows = book.submit(order("s0", False, 3.0, 8.0))
+
+    assert [t[0] for t in trades(rows)] == ["b0", "b1", "b2"]
+
+
+def test_submit_leaves_the_callers_order_untouched():
+    book = LimitOrderBook()
+    resting = order("s0", False, 2.0, 5.0)
+    incoming = order("b0", True, 1.0, 6.0)
+    resting_copy, incoming_copy = dict(resting), dict(incoming)
+
+    book.submit(resting)
+    book.submit(incoming)
+
+    assert resting == resting_copy
+    assert incoming == incoming_copy
+    assert book.best_offer()['remaining'] == 1.0
+
+
+def test_auction_replays_orders_by_time_and_keeps_the_books():
+    om = OrderManager()
+    for o in (order("b0", True, 2.0, 7.0, "2014-12-01T00:03"),
+              order("s0", False, 1.0, 6.0, "2014-12-01T00:01"),
+              order("s1", False, 3.0, 7.0, "2014-12-01T00:02")):
+        om.add_order(*o.values())
+    books = {}
+
+    trans, extra = continuous_double_auction(om.get_df(), books)
+
+    df = trans.get_df()
+    buying = df[df['Trans_type'] == "Buying"]
+    assert list(zip(buying['Offer_id'], buying['Clearing_rate'], buying['Matched_qty'])) == [
+        ("s0", 6.0, 1.0), ("s1", 7.0, 1.0)]
+    assert extra[SLOT] == {'resting bids': 0, 'resting offers': 1, 'last price': 7.0}
+
+    later = OrderManager()
+    later.add_order(*order("b1", True, 5.0, 8.0, "2014-12-01T00:04").values())
+    trans, extra = continuous_double_auction(later.get_df(), books)
+    df = trans.get_df()
+    assert df[df['Trans_type'] == "Buying"]['Matched_qty'].tolist() == [2.0]
+    assert extra[SLOT]['resting bids'] == 1
+
+
+def test_market_submit_order_adds_the_grid_fee_to_offers():
+    mar = Market(fees=1.0)
+    mar.submit_order(*order("s0", False, 2.0, 5.0).values())
+    mar.submit_order(*order("b0", True, 1.0, 5.5).values())
+    assert mar.transactions.get_df().empty
+
+    mar.submit_order(*order("b1", True, 1.0, 6.0).values())
+
+    df = mar.get_results()
+    buying = df[df['Trans_type'] == "Buying"]
+    assert buying['Bid_id'].tolist() == ["b1"]
+    assert buying['Clearing_rate'].tolist() == pytest.approx([6.0])
+    assert mar.close_book(SLOT).best_bid()['Order_id'] == "b0"
+    assert mar.close_book(SLOT) is None
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+import EUnix
+import EUnix.mechanisms
+import EUnix.mechanisms.p2p_random
+from EUnix.auctions.process import merge_same_price
+from EUnix.mechanisms.uniform import uniform_price_mechanism
+from EUnix.transactions.processing import split_transactions_merged_players
+
+
+def test_star_import_keeps_the_former_names():
+    namespace = {}
+    exec("from EUnix import *", namespace)
+
+    assert namespace['p2p_random'] is sys.modules['EUnix.mechanisms.p2p_random'].p2p_random
+    assert namespace['uniform_price_mechanism'] is uniform_price_mechanism
+    assert namespace['merge_same_price'] is merge_same_price
+    assert namespace['split_transactions_merged_players'] is split_transactions_merged_players
+    assert namespace['Market'] is EUnix.Market
+
+
+def test_submodules_do_not_shadow_exported_functions():
+    p2p_module = sys.modules['EUnix.mechanisms.p2p_random']
+    assert EUnix.mechanisms.p2p_random is p2p_module.p2p_random
+    assert EUnix.p2p_random is p2p_module.p2p_random
+    assert EUnix.mechanisms.continuous is sys.modules['EUnix.mechanisms.continuous']
+
+
+def test_import_loads_no_dependency():
+    code = "import sys, EUnix; print(sorted({'pandas', 'numpy', 'redis'} & set(sys.modules)))"
+    root = os.path.dirname(os.path.dirname(EUnix.__file__))
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=root)
+    assert out.stdout.strip() == "[]"
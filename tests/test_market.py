@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from EUnix.market import Market, child_seed
+
+
+def market(n_areas=3, n=12, seed=0):
+    """Market with `n` bids and `n` offers spread over `n_areas` areas."""
+    r = np.random.RandomState(seed)
+    mar = Market()
+    for i in range(2 * n):
+        is_bid = i < n
+        rate = r.uniform(10, 20) if is_bid else r.uniform(5, 15)
+        mar.accept_order(f"u{i}", f"id{i}", f"A{i % n_areas}", f"o{i}", float(r.randint(1, 5)), rate,
+                         "2014-12-01T00:00", "2014-12-01T00:15", is_bid)
+    return mar
+
+
+def pairs(trans):
+    df = trans.get_df()
+    df = df[df['Trans_type'] == "Buying"]
+    return sorted(zip(df['Bid_id'], df['Offer_id'], df['Matched_qty']))
+
+
+def test_child_seed_depends_only_on_seed_and_key():
+    assert child_seed(7, "A0").spawn_key == child_seed(7, "A0").spawn_key
+    assert child_seed(7, "A0").generate_state(2).tolist() != child_seed(7, "A1").generate_state(2).tolist()
+    assert child_seed(7, "A0").generate_state(2).tolist() != child_seed(8, "A0").generate_state(2).tolist()
+    nested = child_seed(child_seed(7, "slot"), "A0")
+    assert nested.spawn_key == child_seed(7, "slot").spawn_key + child_seed(7, "A0").spawn_key
+
+
+def test_seeded_run_is_reproducible():
+    first, _ = market().run("p2p", seed=3)
+    again, _ = market().run("p2p", seed=3)
+    assert pairs(first) == pairs(again)
+
+
+def test_partition_draws_do_not_depend_on_the_executor():
+    in_process, _ = market(n_areas=1).run("p2p", partition="Unit_area", seed=3)
+    direct, _ = market(n_areas=1).run("p2p", seed=child_seed(3, "A0"))
+    assert pairs(in_process) == pairs(direct)
+
+    with ThreadPoolExecutor(2) as pool:
+        threaded, _ = market().run("p2p", partition="Unit_area", executor=pool, seed=3)
+    with ThreadPoolExecutor(1) as pool:
+        single, _ = market().run("p2p", partition="Unit_area", executor=pool, seed=3)
+    assert pairs(threaded) == pairs(single)
+
+
+def test_partition_draws_do_not_depend_on_the_other_partitions():
+    full = market()
+    full_trans, _ = full.run("p2p", partition="Unit_area", seed=3)
+    area = full.bm.get_df()['Unit_area'].astype(str)
+
+    alone = Market()
+    df = full.bm.get_df()
+    kept = df[area == "A1"]
+    alone.accept_orders(*(kept[name].to_numpy(dtype=object) for name in df.columns))
+    alone_trans, _ = alone.run("p2p", partition="Unit_area", seed=3)
+
+    assert pairs(alone_trans) == [p for p in pairs(full_trans) if p[0] in set(kept['Order_id'])]
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from EUnix.auctions.orders import OrderManager
+from EUnix.auctions.process import merge_same_price, merged_order_ids
+from EUnix.mechanisms.mechanism import Mechanism
+from EUnix.mechanisms.p2p_random import p2p_random
+from EUnix.transactions.processing import split_transactions_merged_players
+from EUnix.transactions.transactions import TransactionManager
+
+
+def book(*orders):
+    """Order book of (Order_id, type, energy_qty, energy_rate) tuples."""
+    om = OrderManager()
+    for i, (oid, is_bid, qty, rate) in enumerate(orders):
+        om.add_order(f"u{i}", f"id{i}", "A", oid, qty, rate,
+                     "2014-12-01T00:00", "2014-12-01T00:15", is_bid)
+    return om.get_df()
+
+
+def trade(trans, bid, offer, qty, rate=7.0):
+    """Adds the Buying and Selling rows of a trade between two orders (Series)."""
+    for side in ("Buying", "Selling"):
+        trans.add_transaction(
+            "t", bid['User'], bid['User_id'], "A", bid['Order_id'], bid['energy_qty'], bid['energy_rate'],
+            "2014-12-01T00:00", offer['User'], offer['User_id'], offer['Order_id'], offer['energy_qty'],
+            offer['energy_rate'], "2014-12-01T00:00", rate, qty, "2014-12-01T00:15", side)
+
+
+ORDERS = (
+    ("b0", True, 2.0, 10.0),
+    ("b1", True, 6.0, 10.000001),
+    ("b2", True, 1.0, 8.0),
+    ("s0", False, 1.0, 5.0),
+    ("s1", False, 3.0, 5.0),
+    ("s2", False, 4.0, 10.0),
+)
+
+
+def test_merge_groups_each_side_by_rounded_price():
+    merged, mapping = merge_same_price(book(*ORDERS))
+
+    assert mapping.tolist() == [0, 0, 1, 2, 2, 3]
+    assert merged['energy_qty'].tolist() == [8.0, 1.0, 4.0, 4.0]
+    assert merged['type'].tolist() == [True, True, False, False]
+    assert merged['energy_rate'].tolist() == [10.0, 8.0, 5.0, 10.0]
+    # Groups of several orders get synthetic ids, single orders keep theirs
+    assert merged['Order_id'].tolist() == ["merged-0", "b2", "merged-2", "s2"]
+    assert merged['User'].tolist() == ["merged-0", "u2", "merged-2", "u5"]
+
+
+def test_split_shares_the_quantity_pro_rata():
+    orders = book(*ORDERS)
+    merged, mapping = merge_same_price(orders)
+    trans = TransactionManager()
+    trade(trans, merged.iloc[0], merged.iloc[2], 4.0)
+
+    df = split_transactions_merged_players(trans, orders, mapping).get_df()
+
+    buying = df[df['Trans_type'] == "Buying"]
+    assert buying['Bid_id'].tolist() == ["b0", "b1"]
+    assert buying['Buyer'].tolist() == ["u0", "u1"]
+    assert buying['Matched_qty'].tolist() == pytest.approx([1.0, 3.0])
+    assert buying['Offer_id'].tolist() == ["merged-2", "merged-2"]
+    selling = df[df['Trans_type'] == "Selling"]
+    assert selling['Offer_id'].tolist() == ["s0", "s1"]
+    assert selling['Matched_qty'].tolist() == pytest.approx([1.0, 3.0])
+    assert selling['Bid_id'].tolist() == ["merged-0", "merged-0"]
+
+
+def test_split_shares_zero_quantities_equally_and_keeps_single_orders():
+    orders = book(("b0", True, 0.0, 9.0), ("b1", True, 0.0, 9.0), ("s0", False, 2.0, 5.0))
+    merged, mapping = merge_same_price(orders)
+    trans = TransactionManager()
+    trade(trans, merged.iloc[0], merged.iloc[1], 2.0)
+
+    df = split_transactions_merged_players(trans, orders, mapping).get_df()
+
+    assert df['Matched_qty'].tolist() == pytest.approx([1.0, 1.0, 2.0])
+    assert df['Bid_id'].tolist() == ["b0", "b1", "merged-0"]
+    assert df['Offer_id'].tolist() == ["s0", "s0", "s0"]
+
+
+def test_split_shares_the_fees_of_merged_users():
+    orders = book(*ORDERS)
+    merged, mapping = merge_same_price(orders)
+    trans = TransactionManager()
+    trade(trans, merged.iloc[0], merged.iloc[3], 4.0)
+
+    _, fees = split_transactions_merged_players(trans, orders, mapping, {"merged-0": 8.0, "u5": 1.0})
+
+    assert fees == pytest.approx({"u0": 2.0, "u1": 6.0, "u5": 1.0})
+
+
+def test_synthetic_ids_avoid_real_ids():
+    orders = book(("b0", True, 1.0, 9.0), ("b1", True, 1.0, 9.0), ("merged-0", False, 1.0, 5.0))
+
+    merged, mapping = merge_same_price(orders)
+    ids = merged['Order_id'].tolist()
+    assert ids == ["merged-merged-0", "merged-0"]
+    assert merged_order_ids(orders, mapping).tolist() == ids
+
+    trans = TransactionManager()
+    trade(trans, merged.iloc[0], merged.iloc[1], 1.0)
+    df = split_transactions_merged_players(trans, orders, mapping).get_df()
+    assert df['Bid_id'].tolist() == ["b0", "b1", "merged-merged-0"]
+    assert df['Offer_id'].tolist() == ["merged-0", "merged-0", "merged-0"]
+    assert df['Matched_qty'].tolist() == pytest.approx([0.5, 0.5, 1.0])
+
+
+def test_mechanism_with_merge_trades_the_original_orders():
+    orders = book(*ORDERS)
+    trans, _ = Mechanism(p2p_random, orders, merge=True, r=np.random.RandomState(0)).run()
+    df = trans.get_df()
+
+    buying = df[df['Trans_type'] == "Buying"]
+    selling = df[df['Trans_type'] == "Selling"]
+    assert set(buying['Bid_id']) <= {"b0", "b1", "b2"}
+    assert set(selling['Offer_id']) <= {"s0", "s1", "s2"}
+    assert buying['Matched_qty'].sum() == pytest.approx(selling['Matched_qty'].sum())
+    # No original order trades more than its own quantity
+    qty = dict(zip(orders['Order_id'], orders['energy_qty']))
+    for side, col in ((buying, 'Bid_id'), (selling, 'Offer_id')):
+        for oid, matched in side.groupby(col, observed=True)['Matched_qty'].sum().items():
+            assert matched <= qty[oid] + 1e-9
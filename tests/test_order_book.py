@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from EUnix.auctions.book import OrderBook
+from EUnix.auctions.orders import OrderManager
+from EUnix.market import Market
+from EUnix.mechanisms.uniform import UniformPrice
+
+
+def manager(*orders):
+    """OrderManager holding (type, energy_qty, energy_rate) triples."""
+    om = OrderManager()
+    for i, (is_bid, qty, rate) in enumerate(orders):
+        om.add_order(f"u{i}", f"id{i}", "A", f"o{i}", qty, rate,
+                     "2014-12-01T00:00", "2014-12-01T00:15", is_bid)
+    return om
+
+
+def test_sides_are_sorted_by_price_with_earlier_rows_first_on_ties():
+    book = OrderBook(manager(
+        (True, 1.0, 9.0), (False, 2.0, 6.0), (True, 3.0, 10.0), (True, 4.0, 9.0),
+        (False, 5.0, 5.0), (False, 6.0, 6.0),
+    ).get_df())
+
+    assert book.bids.tolist() == [2, 0, 3]
+    assert book.offers.tolist() == [4, 1, 5]
+    assert book.bid_rates.tolist() == [10.0, 9.0, 9.0]
+    assert book.bid_cum.tolist() == [3.0, 4.0, 8.0]
+    assert book.offer_cum.tolist() == [5.0, 7.0, 13.0]
+    assert not book.one_sided()
+
+
+def test_curves_end_with_sentinels_and_carry_the_labels():
+    df = manager((True, 1.0, 9.0), (False, 2.0, 6.0), (True, 3.0, 10.0)).get_df().iloc[[2, 1, 0]]
+    book = OrderBook(df)
+
+    demand, bid_labels = book.demand_curve()
+    supply, offer_labels = book.supply_curve()
+    assert demand.tolist() == [[3.0, 10.0], [4.0, 9.0], [np.inf, 0.0]]
+    assert supply.tolist() == [[2.0, 6.0], [np.inf, np.inf]]
+    assert bid_labels.tolist() == [2, 0]
+    assert offer_labels.tolist() == [1]
+
+
+def test_arrays_are_read_only_and_one_sided_books_are_detected():
+    book = OrderBook(manager((True, 1.0, 9.0), (True, 2.0, 8.0)).get_df())
+    with pytest.raises(ValueError):
+        book.rates[0] = 1.0
+    assert book.one_sided()
+    assert OrderBook(manager().get_df()).one_sided()
+
+
+def test_edited_frames_are_cleared_with_their_new_prices():
+    om = manager((True, 5.0, 9.0), (False, 5.0, 8.0))
+    df = om.get_df()
+    assert UniformPrice(df).run()[1]['clearing price'] == 8.5
+
+    df['energy_rate'] = [10.0, 20.0]
+
+    assert UniformPrice(df).run()[1] == []
+    assert om.get_df()['energy_rate'].tolist() == [9.0, 8.0]
+
+
+def test_manager_book_is_cached_until_orders_are_added():
+    om = manager((True, 5.0, 9.0), (False, 5.0, 8.0))
+    book = om.book()
+    df = om.get_df()
+    df['energy_rate'] = [1.0, 2.0]
+    assert om.book() is book
+    assert book.rates.tolist() == [9.0, 8.0]
+
+    om.add_order("u2", "id2", "A", "o2", 1.0, 7.0, "2014-12-01T00:00", "2014-12-01T00:15", False)
+
+    assert om.book() is not book
+    assert om.book().offers.tolist() == [2, 1]
+
+
+def test_market_clears_with_the_book_of_its_orders():
+    mar = Market()
+    mar.bm = manager((True, 5.0, 9.0), (False, 5.0, 8.0), (False, 2.0, 7.0))
+    _, extra = mar.run("uniform")
+    assert extra == {'clearing quantity': 5.0, 'clearing price': 8.5}
+
+    mar.accept_order("u3", "id3", "A", "o3", 4.0, 6.0, "2014-12-01T00:00", "2014-12-01T00:15", False)
+    _, extra = mar.run("uniform")
+    assert extra['clearing quantity'] == 5.0
+    assert extra['clearing price'] == pytest.approx(8.0)
@@ -0,0 +1,141 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from EUnix.auctions.orders import OrderManager
+from EUnix.mechanisms.p2p_random import P2PTrading, p2p_random
+
+
+def book(*orders):
+    """Order book of (type, energy_qty, energy_rate) triples, bids first by convention."""
+    om = OrderManager()
+    for i, (is_bid, qty, rate) in enumerate(orders):
+        om.add_order(f"u{i}", f"id{i}", "A", f"o{i}", qty, rate,
+                     "2014-12-01T00:00", "2014-12-01T00:15", is_bid)
+    return om.get_df()
+
+
+def traded(trans):
+    """Buying records of the transactions, one per traded pair."""
+    df = trans.get_df()
+    return df[df['Trans_type'] == "Buying"]
+
+
+PAIRINGS = ["uniform", "compatible", "all_pairs"]
+
+
+@pytest.mark.parametrize("pairing", PAIRINGS)
+def test_single_pair_trades_min_quantity_at_weighted_price(pairing):
+    orders = book((True, 5.0, 10.0), (False, 3.0, 6.0))
+    trans, extra = p2p_random(orders, p_coef=0.25, r=np.random.RandomState(0), pairing=pairing)
+
+    df = trans.get_df()
+    assert list(df['Trans_type']) == ["Buying", "Selling"]
+    assert df['Trans_id'].nunique() == 1
+    assert list(df['Unit_area']) == ["A", "A"]
+    row = df.iloc[0]
+    assert (row['Bid_id'], row['Offer_id']) == ("o0", "o1")
+    assert row['Matched_qty'] == 3.0
+    assert row['Clearing_rate'] == pytest.approx(0.25 * 10.0 + 0.75 * 6.0)
+    assert extra['trading_list'] == [[(0, 1)]]
+
+
+@pytest.mark.parametrize("pairing", PAIRINGS)
+def test_prices_that_never_cross_do_not_trade(pairing):
+    orders = book((True, 5.0, 4.0), (True, 1.0, 5.0), (False, 3.0, 6.0))
+    trans, extra = p2p_random(orders, r=np.random.RandomState(0), pairing=pairing)
+    assert trans.get_df().empty
+    assert extra['trading_list'] == []
+
+
+@pytest.mark.parametrize("pairing", PAIRINGS)
+def test_every_pair_is_drawn_at_most_once(pairing):
+    # One bid can only trade with the cheaper of two offers
+    orders = book((True, 5.0, 10.0), (False, 2.0, 12.0), (False, 2.0, 8.0))
+    for seed in range(20):
+        trans, extra = p2p_random(orders, r=np.random.RandomState(seed), pairing=pairing)
+        pairs = [pair for trading in extra['trading_list'] for pair in trading]
+        assert len(pairs) == len(set(pairs))
+        df = traded(trans)
+        assert list(df['Offer_id']) == ["o2"]
+        assert df['Matched_qty'].sum() == 2.0
+
+
+def volumes(pairing, seeds=200):
+    # B0 (10) can trade with S2 (4) and S3 (8), B1 (5) only with S2
+    orders = book((True, 1.0, 10.0), (True, 1.0, 5.0), (False, 1.0, 4.0), (False, 1.0, 8.0))
+    return np.array([
+        traded(p2p_random(orders, r=np.random.RandomState(seed), pairing=pairing)[0])['Matched_qty'].sum()
+        for seed in range(seeds)
+    ])
+
+
+def test_uniform_pairing_draws_crossing_pairs_uniformly():
+    # The first pair is B0-S2 (then B1 has no seller left), B0-S3 or B1-S2,
+    # each with probability 1/3; the last two trade both units
+    vol = volumes("uniform")
+    assert set(vol) == {1.0, 2.0}
+    assert 0.55 < (vol == 2.0).mean() < 0.78
+
+
+def test_all_pairs_pairing_wastes_the_round_of_incompatible_pairs():
+    # The first round pairs B0-S2 and B1-S3 (no trade, and B1-S2 can no
+    # longer happen) or B0-S3 and B1-S2, each with probability 1/2
+    vol = volumes("all_pairs")
+    assert set(vol) == {1.0, 2.0}
+    assert 0.4 < (vol == 2.0).mean() < 0.6
+
+
+def test_compatible_pairing_only_draws_sellers_a_buyer_can_pay():
+    # B1 first (1/2), or B0 first with S3 (1/4), trades both units
+    vol = volumes("compatible")
+    assert set(vol) == {1.0, 2.0}
+    assert 0.65 < (vol == 2.0).mean() < 0.85
+
+
+@pytest.mark.parametrize("pairing", PAIRINGS)
+def test_same_seed_same_matches_and_quantities_within_orders(pairing):
+    r = np.random.RandomState(7)
+    is_bid = r.rand(60) < 0.5
+    orders = book(*zip(is_bid.tolist(), r.randint(1, 10, 60).astype(float).tolist(),
+                       r.randint(5, 30, 60).astype(float).tolist()))
+
+    first = traded(p2p_random(orders, r=np.random.RandomState(3), pairing=pairing)[0])
+    second = traded(p2p_random(orders, r=np.random.RandomState(3), pairing=pairing)[0])
+    cols = ['Bid_id', 'Offer_id', 'Matched_qty', 'Clearing_rate']
+    pd.testing.assert_frame_equal(first[cols].reset_index(drop=True), second[cols].reset_index(drop=True))
+
+    assert (first['Bid_rate'] >= first['Offer_rate']).all()
+    qty = orders.set_index('Order_id')['energy_qty']
+    for side in ('Bid_id', 'Offer_id'):
+        matched = first.groupby(side)['Matched_qty'].sum()
+        assert (matched <= qty[matched.index]).all()
+
+
+@pytest.mark.parametrize("pairing", PAIRINGS)
+def test_no_crossing_pair_is_left(pairing):
+    r = np.random.RandomState(11)
+    is_bid = r.rand(200) < 0.5
+    # Mostly non-crossing prices: bids 5-15, offers 14-30
+    rates = np.where(is_bid, r.uniform(5, 15, 200), r.uniform(14, 30, 200))
+    orders = book(*zip(is_bid.tolist(), r.randint(1, 10, 200).astype(float).tolist(), rates.tolist()))
+
+    df = traded(p2p_random(orders, r=np.random.RandomState(0), pairing=pairing)[0])
+
+    left = orders.set_index('Order_id')['energy_qty'].copy()
+    for side in ('Bid_id', 'Offer_id'):
+        matched = df.groupby(side)['Matched_qty'].sum()
+        left[matched.index] -= matched
+    active = orders[(left > 1e-9).to_numpy()]
+    assert active.loc[active['type'], 'energy_rate'].max() < active.loc[~active['type'], 'energy_rate'].min()
+
+
+def test_unknown_pairing_is_rejected():
+    with pytest.raises(ValueError):
+        p2p_random(book((True, 1.0, 10.0), (False, 1.0, 5.0)), pairing="random")
+
+
+def test_mechanism_passes_the_pairing():
+    orders = book((True, 5.0, 10.0), (False, 3.0, 6.0))
+    trans, _ = P2PTrading(orders, r=np.random.RandomState(0), pairing="compatible").run()
+    assert traded(trans)['Matched_qty'].sum() == 3.0
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from EUnix.scenarios import FrameOrderSource, run_scenarios, scenario_grid, scenario_seed
+
+
+def test_frame_order_source_matches_slots_in_any_time_format():
+    orders = pd.DataFrame({
+        "delivery-time": ["2014-12-01T00:15", "2014-12-01 00:15:00", pd.Timestamp("2014-12-01T00:30"), None],
+        "energy_qty": [1.0, 2.0, 3.0, 4.0],
+    })
+    source = FrameOrderSource(orders)
+
+    slot = pd.Timestamp("2014-12-01T00:15").isoformat()
+    assert [o["energy_qty"] for o in source(slot)] == [1.0, 2.0]
+    assert [o["energy_qty"] for o in source("2014-12-01T00:30:00")] == [3.0]
+    assert source("2014-12-01T00:45:00") == []
+
+
+def test_sweeps_without_seeds_are_reproducible():
+    data = pd.DataFrame({"Datetime": ["2014-12-01T00:00", "2014-12-01T00:15"]})
+    orders = pd.DataFrame([
+        {"User": f"u{i}", "User_id": f"id{i}", "Unit_area": "A", "Order_id": f"o{i}",
+         "energy_qty": float(1 + i % 3), "energy_rate": float(5 + (7 * i) % 20),
+         "bid-offer-time": "2014-12-01T00:00", "delivery-time": "2014-12-01T00:00", "Type": bool(i % 2)}
+        for i in range(40)
+    ])
+    scenarios = scenario_grid(grid_fees=(0, 1), steps=1, output_file=None)
+
+    first = run_scenarios(data, scenarios, FrameOrderSource(orders), max_workers=2)
+    again = run_scenarios(data, scenarios, FrameOrderSource(orders), max_workers=2)
+
+    assert first.groupby("Scenario")["Seed"].first().tolist() == [scenario_seed(0, 0), scenario_seed(0, 1)]
+    cols = ["Scenario", "Seed", "Bid_id", "Offer_id", "Matched_qty"]
+    pd.testing.assert_frame_equal(first[cols], again[cols])
+    assert scenario_seed(0, 0) != scenario_seed(1, 0)
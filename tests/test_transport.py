@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from EUnix.redisconnection import codec
+from EUnix.redisconnection.async_publish import AsyncProcessSlots
+from EUnix.redisconnection.async_transport import AsyncRedisTransport
+from EUnix.redisconnection.transport import MemoryTransport, decode_entry, encode_entry
+
+RECORD = {"User": "u0", "energy_qty": 1.5, "Type": True}
+
+
+@pytest.mark.parametrize("value", [RECORD, [1, 2], "text", 3.0, None])
+def test_json_entries_round_trip(value):
+    entry = encode_entry(value)
+    assert isinstance(entry, str)
+    assert decode_entry(entry) == value
+    assert decode_entry(entry.encode()) == value
+
+
+BATCH = codec.encode_orders({
+    "User": ["u0"], "User_id": ["id0"], "Unit_area": ["A"], "Order_id": ["o0"], "energy_qty": [1.0],
+    "energy_rate": [5.0], "bid_offer_time": ["2014-12-01T00:00"], "delivery_time": ["2014-12-01T00:15"],
+    "type": [True],
+})
+
+
+def test_binary_batches_are_stored_as_they_are():
+    batch = BATCH
+    assert encode_entry(batch) == batch
+    assert encode_entry(bytearray(batch)) == batch
+    assert decode_entry(encode_entry(batch)) == batch
+
+
+@pytest.mark.parametrize("value", [b'{"User": "u0"}', bytearray(b"EUN"), b""])
+def test_other_bytes_are_rejected(value):
+    with pytest.raises(ValueError):
+        encode_entry(value)
+
+
+@pytest.mark.parametrize("chunk_size", [0, -1, 1.5])
+def test_drain_rejects_chunk_sizes_below_one(chunk_size):
+    transport = MemoryTransport()
+    transport.push("k", 1, 2)
+    with pytest.raises(ValueError):
+        transport.drain("k", chunk_size)
+    assert list(transport.drain("k", 1)) == [[1], [2]]
+
+
+def test_async_redis_entries_are_decoded_apart_from_the_reads():
+    transport = AsyncRedisTransport()
+    entries = [encode_entry(RECORD).encode(), BATCH]
+    assert transport.decode(entries) == [RECORD, BATCH]
+
+
+def test_async_slots_read_entries_and_count_submitters():
+    slots = AsyncProcessSlots(None, transport="memory")
+
+    async def read():
+        await slots.submit_orders("slot", [{"User_id": "id1"}, {"User_id": "id2"}])
+        await slots.submit_orders("slot", [BATCH])
+        counted = await slots.count_submitters("slot")
+        return counted, await slots.read_from_redis("slot")
+
+    counted, entries = asyncio.run(read())
+    assert counted == 3
+    assert slots.decode(entries) == [{"User_id": "id1"}, {"User_id": "id2"}, BATCH]
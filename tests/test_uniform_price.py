@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from EUnix.auctions.orders import OrderManager
+from EUnix.mechanisms import uniform_process as dv
+from EUnix.mechanisms.uniform import uniform_price_mechanism
+
+
+def book(bids, offers):
+    """Order book of (energy_rate, energy_qty) bids and offers."""
+    om = OrderManager()
+    for i, (is_bid, (rate, qty)) in enumerate([(True, o) for o in bids] + [(False, o) for o in offers]):
+        om.add_order(f"u{i}", f"id{i}", "A", f"o{i}", qty, rate,
+                     "2014-12-01T00:00", "2014-12-01T00:15", is_bid)
+    return om.get_df()
+
+
+def curves(orders):
+    return dv.demand_curve_from_bids(orders)[0], dv.supply_curve_from_bids(orders)[0]
+
+
+def test_curves_are_cumulative_and_sorted():
+    buy, sell = curves(book([(25, 2), (30, 3)], [(15, 4), (10, 2)]))
+    np.testing.assert_array_equal(buy, [[3, 30], [5, 25], [np.inf, 0]])
+    np.testing.assert_array_equal(sell, [[2, 10], [6, 15], [np.inf, np.inf]])
+
+
+def test_marginal_bid_and_offer():
+    # Demand 30x3, 25x2, 20x4; supply 10x2, 15x4, 22x3, 28x5: the bid of 20
+    # still covers the offer of 15 on [5, 6), not the offer of 22 after it
+    orders = book([(30, 3), (25, 2), (20, 4)], [(10, 2), (15, 4), (22, 3), (28, 5)])
+    assert dv.intersect_stepwise(*curves(orders)) == (6, 17.5, 2, 1)
+
+    trans, extra = uniform_price_mechanism(orders)
+    df = trans.get_df()
+    assert extra == {'clearing quantity': 6, 'clearing price': 17.5}
+    assert (df['Clearing_rate'] == 17.5).all()
+    buying = df[df['Trans_type'] == "Buying"].set_index('Bid_id')['Matched_qty']
+    selling = df[df['Trans_type'] == "Selling"].set_index('Offer_id')['Matched_qty']
+    assert buying.to_dict() == {"o0": 3, "o1": 2, "o2": 1}
+    assert selling.to_dict() == {"o3": 2, "o4": 4}
+
+
+def test_every_crossing_unit_clears():
+    # The cumulative curves were summed a second time: only the first unit cleared
+    orders = book([(30, 1), (29, 1), (28, 1)], [(10, 1), (11, 1), (12, 1)])
+    assert dv.intersect_stepwise(*curves(orders)) == (3, 20, 2, 2)
+
+    df = uniform_price_mechanism(orders)[0].get_df()
+    assert len(df) == 6
+    assert df.groupby('Trans_type')['Matched_qty'].sum().to_dict() == {"Buying": 3, "Selling": 3}
+
+
+def test_short_demand_clears_part_of_the_offer():
+    orders = book([(30, 3)], [(10, 5)])
+    assert dv.intersect_stepwise(*curves(orders)) == (3, 20, 0, 0)
+    df = uniform_price_mechanism(orders)[0].get_df()
+    assert df.set_index('Trans_type')['Matched_qty'].to_dict() == {"Buying": 3, "Selling": 3}
+
+
+@pytest.mark.parametrize("bids, offers", [
+    ([(5, 1), (4, 2)], [(6, 1), (8, 3)]),
+    ([(5, 1)], []),
+    ([], [(6, 1)]),
+])
+def test_no_crossing(bids, offers):
+    orders = book(bids, offers)
+    assert dv.intersect_stepwise(*curves(orders)) == (None, None, None, None)
+    trans, extra = uniform_price_mechanism(orders)
+    assert trans.get_df().empty
+    assert extra == []
+
+
+def walk(buy, sell):
+    """Marginal bid and offer found by walking both curves breakpoint by breakpoint."""
+    i = j = 0
+    last = None
+    while np.isfinite(buy[i, 0]) and np.isfinite(sell[j, 0]) and buy[i, 1] >= sell[j, 1]:
+        last = (i, j)
+        bq, sq = buy[i, 0], sell[j, 0]
+        i, j = i + (bq <= sq), j + (sq <= bq)
+    if last is None:
+        return None, None, None, None
+    i, j = last
+    return min(buy[i, 0], sell[j, 0]), (buy[i, 1] + sell[j, 1]) / 2, i, j
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_a_walk_along_the_curves(seed):
+    r = np.random.RandomState(seed)
+    bids = list(zip(r.randint(5, 30, 15).tolist(), r.randint(1, 5, 15).tolist()))
+    offers = list(zip(r.randint(5, 30, 15).tolist(), r.randint(1, 5, 15).tolist()))
+    buy, sell = curves(book(bids, offers))
+    assert dv.intersect_stepwise(buy, sell) == walk(buy, sell)